@@ -0,0 +1,66 @@
+"""
+Benchmark script for Module 1: Load Profile Synthesis
+Measures load-profile generation throughput (profiles/sec) at fleet scale.
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from load_synthesis import iter_load_matrix_chunks
+
+
+def benchmark_load_synthesis(num_profiles: int, timestamps: pd.DatetimeIndex,
+                             chunk_size: int = 5000, dtype: np.dtype = np.float32) -> dict:
+    """
+    Time batched generation of `num_profiles` load profiles.
+
+    Chunks are generated and discarded so peak memory stays bounded by
+    `chunk_size` rows regardless of fleet size.
+    """
+    profile_ids = range(1, num_profiles + 1)
+    checksum = 0.0
+
+    start = time.perf_counter()
+    for _, chunk in iter_load_matrix_chunks(timestamps, profile_ids, chunk_size=chunk_size, dtype=dtype):
+        checksum += float(chunk.sum(dtype=np.float64))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'num_profiles': num_profiles,
+        'timesteps': len(timestamps),
+        'seconds': elapsed,
+        'profiles_per_sec': num_profiles / elapsed if elapsed > 0 else float('inf'),
+        'mean_load_kw': checksum / (num_profiles * len(timestamps))
+    }
+
+
+def main():
+    """Run the load synthesis benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark batched load profile synthesis")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[200, 10_000, 100_000],
+                        help="Fleet sizes to benchmark")
+    parser.add_argument('--start-date', default='2023-08-01')
+    parser.add_argument('--end-date', default='2023-08-31')
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    end = pd.to_datetime(args.end_date) + pd.Timedelta(days=1)
+    timestamps = pd.date_range(start=args.start_date, end=end, freq='15min')[:-1]
+
+    print("=" * 60)
+    print("MODULE 1 LOAD SYNTHESIS BENCHMARK")
+    print("=" * 60)
+    print(f"Timesteps per profile: {len(timestamps)}")
+
+    for size in args.sizes:
+        result = benchmark_load_synthesis(size, timestamps, chunk_size=args.chunk_size)
+        print(f"{result['num_profiles']:>8} profiles: {result['seconds']:8.2f}s "
+              f"({result['profiles_per_sec']:,.0f} profiles/sec, "
+              f"mean load {result['mean_load_kw']:.3f} kW)")
+
+
+if __name__ == "__main__":
+    main()
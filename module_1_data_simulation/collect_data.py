@@ -15,6 +15,9 @@ import logging
 from pathlib import Path
 from dotenv import load_dotenv
 
+from load_synthesis import generate_load_matrix, iter_load_matrix_chunks
+from load_store import LoadProfileStore
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -186,76 +189,46 @@ class VPPDataCollector:
         # Fallback to synthetic data
         return self._generate_synthetic_solar_data()
     
-    def generate_load_profiles(self) -> None:
-        """Generate residential load profiles."""
+    def generate_load_profiles(self, num_profiles: int = 200, write_csv: bool = True) -> None:
+        """
+        Generate residential load profiles.
+        
+        Profiles are written to the columnar load store (data/load_store/) and,
+        unless write_csv is False, also as per-profile CSVs for older readers.
+        """
         logger.info("Generating residential load profiles...")
         
         # Generate 200 diverse residential load profiles to support scaled fleet
-        num_profiles = 200
-        
         start_date = pd.to_datetime(self.config["start_date"])
         end_date = pd.to_datetime(self.config["end_date"]) + timedelta(days=1)
         timestamps = pd.date_range(start=start_date, end=end_date, freq='15min')[:-1]
         
-        for i in range(1, num_profiles + 1):
-            load_profile = self._generate_single_load_profile(timestamps, profile_id=i)
-            
-            profile_df = pd.DataFrame({
-                'timestamp': timestamps,
-                'load_kw': load_profile
-            })
-            
-            # Save individual profile
-            profile_path = self.load_profiles_dir / f"profile_{i}.csv"
-            profile_df.to_csv(profile_path, index=False)
-            
+        # Build the (households x timesteps) matrix in batches
+        profile_ids = list(range(1, num_profiles + 1))
+        
+        def chunks_with_csv_export():
+            for start, chunk in iter_load_matrix_chunks(timestamps, profile_ids):
+                if write_csv:
+                    for row, load_values in enumerate(chunk):
+                        profile_df = pd.DataFrame({
+                            'timestamp': timestamps,
+                            'load_kw': load_values
+                        })
+                        
+                        # Save individual profile
+                        profile_path = self.load_profiles_dir / f"profile_{profile_ids[start + row]}.csv"
+                        profile_df.to_csv(profile_path, index=False)
+                yield start, chunk
+        
+        LoadProfileStore.write(
+            LoadProfileStore.default_path(self.data_dir), timestamps, profile_ids, chunks_with_csv_export()
+        )
+        
         logger.info(f"Generated {num_profiles} load profiles")
     
     def _generate_single_load_profile(self, timestamps: pd.DatetimeIndex, profile_id: int) -> np.ndarray:
         """Generate a single realistic residential load profile."""
-        np.random.seed(profile_id)  # For reproducibility
-        
-        # Base load characteristics
-        base_load = 0.5 + np.random.normal(0, 0.1)  # 0.3-0.7 kW base load
-        
-        # Daily pattern coefficients
-        morning_peak = 1.5 + np.random.normal(0, 0.3)  # 6-9 AM
-        evening_peak = 2.0 + np.random.normal(0, 0.4)  # 6-10 PM
-        
-        load_profile = []
-        
-        for ts in timestamps:
-            hour = ts.hour
-            minute = ts.minute
-            day_of_week = ts.weekday()
-            
-            # Base load
-            load = base_load
-            
-            # Daily patterns
-            if 6 <= hour <= 9:  # Morning peak
-                load += morning_peak * np.exp(-((hour - 7.5) ** 2) / 2)
-            elif 18 <= hour <= 22:  # Evening peak
-                load += evening_peak * np.exp(-((hour - 20) ** 2) / 4)
-            elif 22 <= hour or hour <= 6:  # Night/early morning
-                load *= 0.6
-            
-            # Weekend patterns (slightly different)
-            if day_of_week >= 5:  # Weekend
-                if 8 <= hour <= 11:  # Late morning
-                    load += 0.5 * morning_peak
-                if 12 <= hour <= 14:  # Afternoon
-                    load += 0.3 * evening_peak
-            
-            # Add some randomness
-            load += np.random.normal(0, 0.1)
-            
-            # Ensure non-negative
-            load = max(0.1, load)
-            
-            load_profile.append(load)
-        
-        return np.array(load_profile)
+        return generate_load_matrix(timestamps, [profile_id])[0]
     
     def _resample_to_15min(self, df: pd.DataFrame) -> pd.DataFrame:
         """Convert data to 15-minute intervals."""
@@ -379,13 +352,18 @@ class VPPDataCollector:
             assert len(solar_df) > 0, "Solar data is empty"
             assert all(col in solar_df.columns for col in ['timestamp', 'generation_kw_per_kw_installed'])
             
-            # Check load profiles
-            load_files = list(self.load_profiles_dir.glob("profile_*.csv"))
-            assert len(load_files) > 0, "No load profiles generated"
-            
-            # Validate a sample load profile
-            sample_profile = pd.read_csv(load_files[0])
-            assert all(col in sample_profile.columns for col in ['timestamp', 'load_kw'])
+            # Check load profiles (columnar store, falling back to per-profile CSVs)
+            if LoadProfileStore.exists(self.data_dir):
+                store = LoadProfileStore.open(self.data_dir)
+                assert len(store) > 0, "Load store is empty"
+                assert store.num_timesteps > 0, "Load store has no timesteps"
+            else:
+                load_files = list(self.load_profiles_dir.glob("profile_*.csv"))
+                assert len(load_files) > 0, "No load profiles generated"
+                
+                # Validate a sample load profile
+                sample_profile = pd.read_csv(load_files[0])
+                assert all(col in sample_profile.columns for col in ['timestamp', 'load_kw'])
             
             logger.info("Data validation successful!")
             return True
@@ -13,6 +13,8 @@ from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+from load_store import LoadProfileStore
+
 # Configure matplotlib for better plots
 plt.style.use('seaborn-v0_8')
 plt.rcParams['figure.figsize'] = (12, 8)
@@ -30,7 +32,8 @@ class VPPDataDashboard:
         self.data_dir = Path(data_dir)
         self.market_data = None
         self.solar_data = None
-        self.load_profiles = {}
+        self.load_profiles = {}  # Per-profile CSVs (when there is no load store)
+        self.load_store = None
         self.load_data()
     
     def load_data(self):
@@ -53,9 +56,13 @@ class VPPDataDashboard:
             self.solar_data.set_index('timestamp', inplace=True)
             logger.info(f"✅ Loaded {len(self.solar_data)} solar data points")
         
-        # Load load profiles
+        # Load load profiles (memory-mapped store, falling back to per-profile CSVs)
         load_profiles_dir = self.data_dir / "load_profiles"
-        if load_profiles_dir.exists():
+        if LoadProfileStore.exists(self.data_dir):
+            # Households are read from the memory-mapped store when plotted
+            self.load_store = LoadProfileStore.open(self.data_dir)
+            logger.info(f"✅ Opened load store with {len(self.load_store)} load profiles")
+        elif load_profiles_dir.exists():
             profile_files = list(load_profiles_dir.glob("profile_*.csv"))
             for profile_file in profile_files:
                 profile_name = profile_file.stem
@@ -65,6 +72,31 @@ class VPPDataDashboard:
                 self.load_profiles[profile_name] = profile_df
             logger.info(f"✅ Loaded {len(self.load_profiles)} load profiles")
     
+    def profile_names(self):
+        """Names of the available load profiles ("profile_N")."""
+        if self.load_store is not None:
+            return [f"profile_{profile_id}" for profile_id in self.load_store.profile_ids]
+        return list(self.load_profiles)
+    
+    def load_profile(self, profile_name):
+        """One household's load as a timestamp-indexed DataFrame (read from the store on demand)."""
+        if self.load_store is not None:
+            profile_id = int(profile_name[len("profile_"):])
+            return pd.DataFrame({'load_kw': self.load_store.household(profile_id)},
+                                index=self.load_store.timestamps.rename('timestamp'))
+        return self.load_profiles[profile_name]
+    
+    def all_loads(self):
+        """Load of every household, one column per profile."""
+        if self.load_store is not None:
+            return pd.DataFrame(np.asarray(self.load_store.load_kw, dtype=np.float64),
+                                index=self.load_store.timestamps.rename('timestamp'),
+                                columns=self.profile_names())
+        all_loads = pd.DataFrame()
+        for profile_name, profile_data in self.load_profiles.items():
+            all_loads[profile_name] = profile_data['load_kw']
+        return all_loads
+    
     def create_market_analysis(self):
         """Generate market data analysis and visualizations."""
         if self.market_data is None:
@@ -258,7 +290,7 @@ class VPPDataDashboard:
         
     def create_load_analysis(self):
         """Generate load profile analysis and visualizations."""
-        if not self.load_profiles:
+        if not self.profile_names():
             logger.error("Load profiles not available")
             return
         
@@ -270,17 +302,15 @@ class VPPDataDashboard:
                     fontsize=16, fontweight='bold')
         
         # Combine all load profiles for analysis
-        all_loads = pd.DataFrame()
-        for profile_name, profile_data in self.load_profiles.items():
-            all_loads[profile_name] = profile_data['load_kw']
+        all_loads = self.all_loads()
         
         # 1. Individual load profiles (sample)
         ax1 = axes[0, 0]
-        sample_profiles = list(self.load_profiles.keys())[:5]  # Show first 5 profiles
+        sample_profiles = self.profile_names()[:5]  # Show first 5 profiles
         colors = ['#2E86AB', '#A23B72', '#F18F01', '#C73E1D', '#592E83']
         
         for i, profile_name in enumerate(sample_profiles):
-            profile_data = self.load_profiles[profile_name]
+            profile_data = self.load_profile(profile_name)
             ax1.plot(profile_data.index, profile_data['load_kw'], 
                     linewidth=1, alpha=0.8, color=colors[i], label=profile_name.replace('_', ' ').title())
         
@@ -357,7 +387,7 @@ class VPPDataDashboard:
         print("🏠 LOAD PROFILE SUMMARY STATISTICS")
         print("="*60)
         print(f"📊 Load Statistics:")
-        print(f"   Households: {len(self.load_profiles)}")
+        print(f"   Households: {len(self.profile_names())}")
         print(f"   Average Load: {household_averages.mean():.2f} kW")
         print(f"   Load Range: {household_averages.min():.2f} - {household_averages.max():.2f} kW")
         print(f"   Peak Hour Load: {peak_loads.mean():.2f} kW (6-9 PM)")
@@ -367,7 +397,7 @@ class VPPDataDashboard:
         
     def create_integrated_analysis(self):
         """Create integrated analysis showing market, solar, and load interactions."""
-        if self.market_data is None or self.solar_data is None or not self.load_profiles:
+        if self.market_data is None or self.solar_data is None or not self.profile_names():
             logger.error("Some data not available for integrated analysis")
             return
         
@@ -379,9 +409,7 @@ class VPPDataDashboard:
                     fontsize=16, fontweight='bold')
         
         # Combine all load profiles
-        all_loads = pd.DataFrame()
-        for profile_name, profile_data in self.load_profiles.items():
-            all_loads[profile_name] = profile_data['load_kw']
+        all_loads = self.all_loads()
         total_load = all_loads.sum(axis=1)
         
         # 1. Market prices vs solar generation
@@ -0,0 +1,236 @@
+"""
+VPP Agent PoC - Module 1: Columnar Load Profile Store
+Single on-disk store for the fleet load matrix, readable via memory mapping.
+
+Layout of ``data/load_store/``:
+    load_kw.npy                float32 matrix, time-major with shape (timesteps, households)
+    load_kw_by_household.npy   the same values household-major, shape (households, timesteps)
+    timestamps.npy             int64 nanoseconds since epoch, shared by every household
+    manifest.json              profile ids, shape and dtype; written last, marks the store complete
+
+Opening the store only parses the manifest and the timestamp index. Both
+matrices are memory-mapped: time slices (the state propagator) read one
+contiguous row of load_kw.npy and single households (the dashboard) one
+contiguous row of load_kw_by_household.npy, so neither touches the rest of
+the data. Stores written before the household-major copy existed fall back to
+a strided read of load_kw.npy, which touches every page of the file.
+"""
+
+import json
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+STORE_DIRNAME = "load_store"
+LOAD_FILE = "load_kw.npy"
+HOUSEHOLD_LOAD_FILE = "load_kw_by_household.npy"
+TIMESTAMPS_FILE = "timestamps.npy"
+MANIFEST_FILE = "manifest.json"
+STORE_VERSION = 2
+
+
+class LoadProfileStore:
+    """Memory-mapped, read-only view of the fleet load matrix."""
+
+    def __init__(self, store_dir: Union[str, Path]):
+        """
+        Open an existing load store.
+
+        Args:
+            store_dir: Directory containing the store files
+        """
+        self.store_dir = Path(store_dir)
+        manifest_path = self.store_dir / MANIFEST_FILE
+        if not manifest_path.exists():
+            raise FileNotFoundError(f"Load store manifest not found: {manifest_path}")
+
+        with open(manifest_path) as f:
+            self.manifest = json.load(f)
+
+        self.profile_ids: List[int] = [int(pid) for pid in self.manifest["profile_ids"]]
+        self._row_of = {pid: row for row, pid in enumerate(self.profile_ids)}
+        self._timestamps_ns = np.load(self.store_dir / TIMESTAMPS_FILE)
+        self._timestamps: Optional[pd.DatetimeIndex] = None
+        self.load_kw = np.load(self.store_dir / LOAD_FILE, mmap_mode='r')
+
+        expected_shape = (len(self._timestamps_ns), len(self.profile_ids))
+        if self.load_kw.shape != expected_shape:
+            raise ValueError(f"Load store shape {self.load_kw.shape} does not match manifest {expected_shape}")
+
+        # Household-major copy (None for version 1 stores)
+        self.household_kw: Optional[np.ndarray] = None
+        household_file = self.manifest.get("household_file")
+        if household_file is not None:
+            self.household_kw = np.load(self.store_dir / household_file, mmap_mode='r')
+            if self.household_kw.shape != expected_shape[::-1]:
+                raise ValueError(f"Household-major load shape {self.household_kw.shape} "
+                                 f"does not match manifest {expected_shape[::-1]}")
+
+    @staticmethod
+    def default_path(data_dir: Union[str, Path]) -> Path:
+        """Return the store location inside a Module 1 data directory."""
+        return Path(data_dir) / STORE_DIRNAME
+
+    @classmethod
+    def exists(cls, data_dir: Union[str, Path]) -> bool:
+        """Check whether a complete store exists in a Module 1 data directory."""
+        return (cls.default_path(data_dir) / MANIFEST_FILE).exists()
+
+    @classmethod
+    def open(cls, data_dir: Union[str, Path]) -> "LoadProfileStore":
+        """Open the store inside a Module 1 data directory."""
+        return cls(cls.default_path(data_dir))
+
+    @classmethod
+    def write(
+        cls,
+        store_dir: Union[str, Path],
+        timestamps: pd.DatetimeIndex,
+        profile_ids: List[int],
+        chunks: Iterable[Tuple[int, np.ndarray]]
+    ) -> "LoadProfileStore":
+        """
+        Write a store from household-major chunks of the load matrix.
+
+        Args:
+            store_dir: Output directory (created if needed)
+            timestamps: Timestamps shared by all households
+            profile_ids: Profile id of each household column
+            chunks: Iterable of (first_household_index, chunk[households, timesteps])
+
+        Returns:
+            LoadProfileStore: The newly written store, opened for reading
+        """
+        store_dir = Path(store_dir)
+        store_dir.mkdir(parents=True, exist_ok=True)
+        timestamps = pd.DatetimeIndex(timestamps)
+
+        # Remove a stale manifest first so a partial write is never read as complete
+        manifest_path = store_dir / MANIFEST_FILE
+        if manifest_path.exists():
+            manifest_path.unlink()
+
+        shape = (len(timestamps), len(profile_ids))
+        load_kw = np.lib.format.open_memmap(store_dir / LOAD_FILE, mode='w+', dtype=np.float32, shape=shape)
+        household_kw = np.lib.format.open_memmap(
+            store_dir / HOUSEHOLD_LOAD_FILE, mode='w+', dtype=np.float32, shape=shape[::-1]
+        )
+        written = 0
+        for start, chunk in chunks:
+            load_kw[:, start:start + chunk.shape[0]] = chunk.T
+            household_kw[start:start + chunk.shape[0]] = chunk
+            written += chunk.shape[0]
+        load_kw.flush()
+        household_kw.flush()
+        del load_kw, household_kw
+
+        if written != len(profile_ids):
+            raise ValueError(f"Wrote {written} households, expected {len(profile_ids)}")
+
+        np.save(store_dir / TIMESTAMPS_FILE, timestamps.asi8.astype(np.int64))
+
+        manifest = {
+            "version": STORE_VERSION,
+            "layout": "time_major",
+            "household_file": HOUSEHOLD_LOAD_FILE,
+            "dtype": "float32",
+            "num_timesteps": shape[0],
+            "num_profiles": shape[1],
+            "start": str(timestamps[0]) if len(timestamps) else None,
+            "end": str(timestamps[-1]) if len(timestamps) else None,
+            "profile_ids": [int(pid) for pid in profile_ids]
+        }
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        return cls(store_dir)
+
+    def __len__(self) -> int:
+        """Number of households in the store."""
+        return len(self.profile_ids)
+
+    def __getitem__(self, row: int) -> pd.DataFrame:
+        """
+        Return the household at position ``row`` of ``profile_ids`` as a
+        timestamp/load_kw DataFrame, like the per-profile CSV list.
+
+        Use ``household(profile_id)`` to look a household up by profile id.
+        """
+        return pd.DataFrame({
+            'timestamp': self.timestamps,
+            'load_kw': self._household_row(row).astype(np.float64)
+        })
+
+    @property
+    def num_timesteps(self) -> int:
+        """Number of timesteps in the store."""
+        return len(self._timestamps_ns)
+
+    @property
+    def timestamps(self) -> pd.DatetimeIndex:
+        """Shared timestamp index (built on first access)."""
+        if self._timestamps is None:
+            self._timestamps = pd.DatetimeIndex(self._timestamps_ns.view('datetime64[ns]'))
+        return self._timestamps
+
+    def household(self, profile_id: int) -> np.ndarray:
+        """
+        Read the full load series of one household.
+
+        Args:
+            profile_id: Profile identifier (e.g. 1 for profile_1)
+
+        Returns:
+            np.ndarray: Load in kW for every timestep
+        """
+        if profile_id not in self._row_of:
+            raise KeyError(f"Unknown load profile: {profile_id}")
+        return self._household_row(self._row_of[profile_id])
+
+    def _household_row(self, row: int) -> np.ndarray:
+        """Load series of the household at position ``row`` of ``profile_ids``."""
+        if self.household_kw is not None:
+            return np.array(self.household_kw[row])
+        return np.array(self.load_kw[:, row])
+
+    def rows(self, profile_ids: Iterable[int]) -> np.ndarray:
+        """
+        Column index of each profile in the load matrix.
+
+        Args:
+            profile_ids: Profile identifiers
+
+        Returns:
+            np.ndarray: Row of each profile, for indexing ``time_slice`` results
+        """
+        try:
+            return np.array([self._row_of[int(pid)] for pid in profile_ids], dtype=np.int64)
+        except KeyError as e:
+            raise KeyError(f"Unknown load profile: {e.args[0]}") from None
+
+    def time_index(self, timestamp) -> int:
+        """Return the index of the last timestep at or before ``timestamp``."""
+        ts_ns = pd.Timestamp(timestamp).value
+        idx = int(np.searchsorted(self._timestamps_ns, ts_ns, side='right')) - 1
+        if idx < 0:
+            raise KeyError(f"Timestamp {timestamp} precedes the load store")
+        return idx
+
+    def time_slice(self, index: int) -> np.ndarray:
+        """
+        Read the load of every household at one timestep.
+
+        Args:
+            index: Timestep index
+
+        Returns:
+            np.ndarray: Load in kW ordered like ``profile_ids``
+        """
+        return np.array(self.load_kw[index])
+
+    def load_at(self, timestamp) -> np.ndarray:
+        """Read the load of every household at the timestep covering ``timestamp``."""
+        return self.time_slice(self.time_index(timestamp))
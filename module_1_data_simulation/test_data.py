@@ -9,6 +9,11 @@ from pathlib import Path
 import logging
 from datetime import datetime, timedelta
 
+import tempfile
+
+from load_synthesis import generate_load_matrix, iter_load_matrix_chunks
+from load_store import LoadProfileStore
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -155,6 +160,124 @@ def test_data_consistency():
     
     return errors
 
+def _reference_load_profile(timestamps, profile_id):
+    """Scalar per-timestep reference for the load profile model."""
+    rng = np.random.RandomState(profile_id)
+    base_load = 0.5 + rng.normal(0, 0.1)
+    morning_peak = 1.5 + rng.normal(0, 0.3)
+    evening_peak = 2.0 + rng.normal(0, 0.4)
+    
+    load_profile = []
+    for ts in timestamps:
+        hour = ts.hour
+        load = base_load
+        if 6 <= hour <= 9:
+            load += morning_peak * np.exp(-((hour - 7.5) ** 2) / 2)
+        elif 18 <= hour <= 22:
+            load += evening_peak * np.exp(-((hour - 20) ** 2) / 4)
+        elif 22 <= hour or hour <= 6:
+            load *= 0.6
+        if ts.weekday() >= 5:
+            if 8 <= hour <= 11:
+                load += 0.5 * morning_peak
+            if 12 <= hour <= 14:
+                load += 0.3 * evening_peak
+        load += rng.normal(0, 0.1)
+        load_profile.append(max(0.1, load))
+    
+    return np.array(load_profile)
+
+def test_load_synthesis():
+    """Test that batched load synthesis matches the per-profile model."""
+    logger.info("Testing batched load synthesis...")
+    
+    errors = []
+    timestamps = pd.date_range(start="2023-08-01", periods=4 * 24 * 7, freq="15min")
+    profile_ids = [1, 2, 17, 200]
+    
+    load_matrix = generate_load_matrix(timestamps, profile_ids)
+    
+    if load_matrix.shape != (len(profile_ids), len(timestamps)):
+        errors.append(f"Unexpected load matrix shape: {load_matrix.shape}")
+    
+    # Each batch row must equal the scalar reference for that profile
+    for row, profile_id in enumerate(profile_ids):
+        reference = _reference_load_profile(timestamps, profile_id)
+        if not np.allclose(load_matrix[row], reference, rtol=0, atol=1e-12):
+            errors.append(f"Profile {profile_id} differs from scalar reference")
+    
+    # Rows are independent of batch composition
+    single = generate_load_matrix(timestamps, [17])[0]
+    if not np.array_equal(single, load_matrix[2]):
+        errors.append("Profile output depends on batch composition")
+    
+    # Chunked generation reassembles to the same matrix
+    chunks = [chunk for _, chunk in iter_load_matrix_chunks(timestamps, profile_ids, chunk_size=3)]
+    if not np.array_equal(np.vstack(chunks), load_matrix):
+        errors.append("Chunked generation differs from single batch")
+    
+    if load_matrix.min() < 0.1:
+        errors.append("Load matrix contains values below the 0.1 kW floor")
+    
+    if generate_load_matrix(timestamps, profile_ids, dtype=np.float32).dtype != np.float32:
+        errors.append("Requested float32 output was not honoured")
+    
+    logger.info("✅ Load synthesis check completed")
+    
+    return errors
+
+def test_load_store():
+    """Test that the columnar load store round-trips the load matrix."""
+    logger.info("Testing columnar load store...")
+    
+    errors = []
+    timestamps = pd.date_range(start="2023-08-01", periods=4 * 24 * 2, freq="15min")
+    profile_ids = [1, 2, 3, 4, 5]
+    load_matrix = generate_load_matrix(timestamps, profile_ids)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = LoadProfileStore.write(
+            LoadProfileStore.default_path(tmp_dir), timestamps, profile_ids,
+            iter_load_matrix_chunks(timestamps, profile_ids, chunk_size=2)
+        )
+        
+        if not LoadProfileStore.exists(tmp_dir):
+            errors.append("Load store manifest was not written")
+        
+        if not isinstance(store.load_kw, np.memmap):
+            errors.append("Load matrix is not memory-mapped")
+        
+        if len(store) != len(profile_ids) or store.num_timesteps != len(timestamps):
+            errors.append(f"Unexpected load store shape: {store.load_kw.shape}")
+        
+        if not store.timestamps.equals(timestamps):
+            errors.append("Load store timestamps differ from the source index")
+        
+        if not np.array_equal(store.household(3), load_matrix[2].astype(np.float32)):
+            errors.append("Household read differs from generated profile")
+        
+        if not np.array_equal(store.time_slice(10), load_matrix[:, 10].astype(np.float32)):
+            errors.append("Time slice read differs from generated matrix")
+        
+        if not np.array_equal(store.load_at(timestamps[10] + pd.Timedelta(minutes=5)), store.time_slice(10)):
+            errors.append("Timestamp lookup did not resolve to the covering timestep")
+        
+        if not np.array_equal(store.household_kw, store.load_kw.T):
+            errors.append("Household-major copy differs from the time-major matrix")
+        
+        profile_df = store[0]
+        if list(profile_df.columns) != ['timestamp', 'load_kw'] or len(profile_df) != len(timestamps):
+            errors.append("Household DataFrame does not match the CSV profile format")
+        
+        if not np.array_equal(store[2]['load_kw'].values, store.household(store.profile_ids[2])):
+            errors.append("Positional and profile-id household reads differ")
+        
+        del store, profile_df
+    
+    logger.info("✅ Load store check completed")
+    
+    return errors
+
 def generate_data_summary():
     """Generate a summary report of the collected data."""
     logger.info("Generating data summary...")
@@ -224,8 +347,14 @@ def main():
     # Test data consistency
     consistency_errors = test_data_consistency()
     
+    # Test batched load synthesis
+    synthesis_errors = test_load_synthesis()
+    
+    # Test columnar load store
+    store_errors = test_load_store()
+    
     # Combine all errors
-    all_errors = integrity_errors + consistency_errors
+    all_errors = integrity_errors + consistency_errors + synthesis_errors + store_errors
     
     if all_errors:
         logger.error("❌ Validation failed with errors:")
@@ -0,0 +1,66 @@
+"""
+Benchmark script for Module 2: Fleet Generation and Columnar Fleet State
+Measures bulk fleet generation time, fleet-wide update time and the time of
+one 15-minute state step at scale.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from fleet_generator import FleetGenerator
+
+
+def benchmark_fleet(generator: FleetGenerator, n: int, random_seed: int = 42) -> dict:
+    """Time bulk generation of n prosumers and one fleet-wide update pass."""
+    start = time.perf_counter()
+    state = generator.create_fleet_state(n, random_seed=random_seed, load_scale_jitter=0.1)
+    generation_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, discharge = state.available_flexibility_kw()
+    state.bess_discharge(discharge)
+    state.ev_charge(state.ev_available_charge_kw())
+    update_seconds = time.perf_counter() - start
+
+    # One 15-minute interval of load, solar and EV movement (mid-day, half the EVs away)
+    load_kw = 1.5 * state.columns["load_scale"]
+    start = time.perf_counter()
+    state.step(load_kw, 0.6, ev_plugged_in=np.arange(n) % 2 == 0, ev_driving_kw=1.0)
+    step_seconds = time.perf_counter() - start
+
+    return {
+        'n': n,
+        'generation_seconds': generation_seconds,
+        'update_ms': update_seconds * 1000,
+        'step_ms': step_seconds * 1000,
+        'numeric_mb': state.nbytes() / 1e6,
+        'available_discharge_mw': float(discharge.sum()) / 1000
+    }
+
+
+def main():
+    """Run the fleet generation benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark bulk fleet generation")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help="Fleet sizes to benchmark")
+    parser.add_argument('--data-path', default="../module_1_data_simulation/data")
+    args = parser.parse_args()
+
+    generator = FleetGenerator(data_path=args.data_path)
+
+    print("=" * 60)
+    print("MODULE 2 FLEET GENERATION BENCHMARK")
+    print("=" * 60)
+
+    for n in args.sizes:
+        result = benchmark_fleet(generator, n)
+        print(f"{result['n']:>9} prosumers: generate {result['generation_seconds']:6.2f}s, "
+              f"update {result['update_ms']:8.1f}ms, step {result['step_ms']:8.1f}ms, "
+              f"{result['numeric_mb']:7.1f} MB numeric, "
+              f"{result['available_discharge_mw']:.1f} MW available")
+
+
+if __name__ == "__main__":
+    main()
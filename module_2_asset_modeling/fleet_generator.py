@@ -9,8 +9,17 @@ import pandas as pd
 import numpy as np
 import random
 import os
-from typing import List, Dict, Any
+import sys
+from typing import List, Dict, Any, Optional, Union
 from prosumer_models import Prosumer, BESS, ElectricVehicle, SolarPV
+from fleet_state import FleetState
+
+# Module 1 provides the columnar load store reader
+module_1_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'module_1_data_simulation')
+if module_1_path not in sys.path:
+    sys.path.append(module_1_path)
+
+from load_store import LoadProfileStore
 
 
 class FleetGenerator:
@@ -26,6 +35,7 @@ class FleetGenerator:
             data_path: Path to Module 1 data directory
         """
         self.data_path = data_path
+        self.load_store: Optional[LoadProfileStore] = None
         self.load_profiles = self._load_profile_data()
         self.solar_data = self._load_solar_data()
         
@@ -62,9 +72,49 @@ class FleetGenerator:
             {"capacity_kw": 10.0, "weight": 0.15},  # Very large system
             {"capacity_kw": 12.0, "weight": 0.10}   # Premium system
         ]
+        
+        # Preference profiles with different risk tolerance and participation levels.
+        # Numeric fields are (low, high) uniform ranges; lists are choices.
+        self.preference_profiles = [
+            {  # Conservative
+                "backup_power_hours": (6, 12),
+                "participation_willingness": (0.3, 0.6),
+                "min_compensation_per_kwh": (0.20, 0.35),
+                "max_discharge_percent": (30, 50),
+                "ev_priority": ["high", "medium"]
+            },
+            {  # Moderate
+                "backup_power_hours": (3, 8),
+                "participation_willingness": (0.6, 0.8),
+                "min_compensation_per_kwh": (0.12, 0.25),
+                "max_discharge_percent": (50, 70),
+                "ev_priority": ["medium", "medium", "low"]
+            },
+            {  # Aggressive
+                "backup_power_hours": (1, 4),
+                "participation_willingness": (0.8, 0.95),
+                "min_compensation_per_kwh": (0.08, 0.18),
+                "max_discharge_percent": (70, 85),
+                "ev_priority": ["low", "medium"]
+            }
+        ]
+        
+        # EV departure times (most people leave between 6-9 AM, weighted towards 7-8 AM)
+        self.ev_departure_hours = [6, 7, 7, 7, 8, 8, 9]
+        self.ev_departure_minutes = [0, 15, 30, 45]
     
-    def _load_profile_data(self) -> List[pd.DataFrame]:
-        """Load all load profile CSV files."""
+    def _load_profile_data(self) -> Union[LoadProfileStore, List[pd.DataFrame]]:
+        """
+        Load household load profiles.
+        
+        Uses the memory-mapped load store when Module 1 has written one, so
+        startup does not parse any CSVs. Otherwise falls back to reading every
+        per-profile CSV file.
+        """
+        if LoadProfileStore.exists(self.data_path):
+            self.load_store = LoadProfileStore.open(self.data_path)
+            return self.load_store
+        
         profiles = []
         profile_dir = os.path.join(self.data_path, "load_profiles")
         
@@ -100,38 +150,21 @@ class FleetGenerator:
     
     def _generate_user_preferences(self) -> Dict[str, Any]:
         """Generate realistic user preferences."""
-        # Preference profiles with different risk tolerance and participation levels
+        # Draw every profile's values, then pick one profile
         preference_profiles = [
-            {  # Conservative
-                "backup_power_hours": random.uniform(6, 12),
-                "participation_willingness": random.uniform(0.3, 0.6),
-                "min_compensation_per_kwh": random.uniform(0.20, 0.35),
-                "max_discharge_percent": random.uniform(30, 50),
-                "ev_priority": random.choice(["high", "medium"])
-            },
-            {  # Moderate
-                "backup_power_hours": random.uniform(3, 8),
-                "participation_willingness": random.uniform(0.6, 0.8),
-                "min_compensation_per_kwh": random.uniform(0.12, 0.25),
-                "max_discharge_percent": random.uniform(50, 70),
-                "ev_priority": random.choice(["medium", "medium", "low"])
-            },
-            {  # Aggressive
-                "backup_power_hours": random.uniform(1, 4),
-                "participation_willingness": random.uniform(0.8, 0.95),
-                "min_compensation_per_kwh": random.uniform(0.08, 0.18),
-                "max_discharge_percent": random.uniform(70, 85),
-                "ev_priority": random.choice(["low", "medium"])
+            {
+                key: random.choice(spec) if isinstance(spec, list) else random.uniform(*spec)
+                for key, spec in profile.items()
             }
+            for profile in self.preference_profiles
         ]
         
         return random.choice(preference_profiles)
     
     def _generate_ev_charging_schedule(self) -> str:
         """Generate realistic EV charging deadline (departure time)."""
-        # Most people leave between 6-9 AM
-        hour = random.choice([6, 7, 7, 7, 8, 8, 9])  # Weighted towards 7-8 AM
-        minute = random.choice([0, 15, 30, 45])
+        hour = random.choice(self.ev_departure_hours)
+        minute = random.choice(self.ev_departure_minutes)
         return f"{hour:02d}:{minute:02d}"
     
     def create_prosumer_fleet(self, n: int, random_seed: int = 42) -> List[Prosumer]:
@@ -217,16 +250,120 @@ class FleetGenerator:
         
         return fleet
     
-    def get_fleet_statistics(self, fleet: List[Prosumer]) -> Dict[str, Any]:
+    def create_fleet_state(
+        self,
+        n: int,
+        random_seed: int = 42,
+        load_scale: float = 1.0,
+        load_scale_jitter: float = 0.0
+    ) -> FleetState:
+        """
+        Generate a columnar fleet of n prosumers in bulk.
+        
+        Every asset flag, configuration index and preference is drawn for the
+        whole fleet at once from a seeded NumPy Generator, using the same
+        distributions as create_prosumer_fleet. Load profiles are assigned
+        round-robin, so n may exceed the number of available profiles.
+        
+        Args:
+            n: Number of prosumers to generate
+            random_seed: Seed for the NumPy Generator
+            load_scale: Multiplier applied to every assigned load profile
+            load_scale_jitter: Std. dev. of a per-prosumer log-normal load multiplier
+                (0 keeps all prosumers on the same profile identical)
+            
+        Returns:
+            FleetState holding the generated fleet
+        """
+        num_profiles = len(self.load_profiles)
+        if num_profiles == 0:
+            raise ValueError("No load profiles available for fleet generation")
+        
+        rng = np.random.default_rng(random_seed)
+        state = FleetState(n)
+        cols = state.columns
+        
+        # Identity and load profile assignment (round-robin)
+        cols["prosumer_id"][:] = [f"prosumer_{i + 1:03d}" for i in range(n)]
+        profile_names = np.array([f"profile_{i + 1}" for i in range(num_profiles)], dtype=object)
+        cols["load_profile_id"][:] = profile_names[np.arange(n) % num_profiles]
+        cols["load_scale"][:] = load_scale
+        if load_scale_jitter > 0:
+            cols["load_scale"] *= np.exp(rng.normal(0.0, load_scale_jitter, size=n))
+        
+        # User preferences: pick a profile type, then draw its ranges
+        preference_type = rng.integers(0, len(self.preference_profiles), size=n)
+        for type_idx, profile in enumerate(self.preference_profiles):
+            rows = np.flatnonzero(preference_type == type_idx)
+            for key, spec in profile.items():
+                if isinstance(spec, list):
+                    choices = np.array(spec, dtype=object)
+                    cols[key][rows] = choices[rng.integers(0, len(choices), size=rows.size)]
+                else:
+                    cols[key][rows] = rng.uniform(spec[0], spec[1], size=rows.size)
+        
+        # Asset ownership
+        cols["has_bess"][:] = rng.random(n) < self.asset_probabilities["has_bess"]
+        cols["has_ev"][:] = rng.random(n) < self.asset_probabilities["has_ev"]
+        cols["has_solar"][:] = rng.random(n) < self.asset_probabilities["has_solar"]
+        
+        # BESS
+        rows = np.flatnonzero(cols["has_bess"])
+        config_idx = self._weighted_choice_indices(rng, self.bess_configs, rows.size)
+        cols["bess_capacity_kwh"][rows] = self._config_values(self.bess_configs, "capacity_kwh")[config_idx]
+        cols["bess_max_power_kw"][rows] = self._config_values(self.bess_configs, "max_power_kw")[config_idx]
+        cols["bess_current_soc_percent"][rows] = rng.uniform(40, 80, size=rows.size)
+        cols["bess_min_soc_percent"][rows] = rng.uniform(5, 15, size=rows.size)
+        cols["bess_max_soc_percent"][rows] = rng.uniform(90, 98, size=rows.size)
+        
+        # EV
+        rows = np.flatnonzero(cols["has_ev"])
+        config_idx = self._weighted_choice_indices(rng, self.ev_configs, rows.size)
+        cols["ev_battery_capacity_kwh"][rows] = self._config_values(self.ev_configs, "battery_capacity_kwh")[config_idx]
+        cols["ev_max_charge_power_kw"][rows] = self._config_values(self.ev_configs, "max_charge_power_kw")[config_idx]
+        cols["ev_current_soc_percent"][rows] = rng.uniform(60, 85, size=rows.size)
+        cols["ev_min_departure_soc_percent"][rows] = rng.uniform(75, 90, size=rows.size)
+        deadlines = np.array(
+            [f"{h:02d}:{m:02d}" for h in self.ev_departure_hours for m in self.ev_departure_minutes], dtype=object
+        )
+        hour_idx = rng.integers(0, len(self.ev_departure_hours), size=rows.size)
+        minute_idx = rng.integers(0, len(self.ev_departure_minutes), size=rows.size)
+        cols["ev_charge_deadline"][rows] = deadlines[hour_idx * len(self.ev_departure_minutes) + minute_idx]
+        cols["ev_is_plugged_in"][rows] = rng.random(rows.size) < 0.8  # 80% are plugged in
+        
+        # Solar PV
+        rows = np.flatnonzero(cols["has_solar"])
+        config_idx = self._weighted_choice_indices(rng, self.solar_configs, rows.size)
+        cols["solar_capacity_kw"][rows] = self._config_values(self.solar_configs, "capacity_kw")[config_idx]
+        cols["solar_efficiency"][rows] = rng.uniform(0.80, 0.90, size=rows.size)
+        
+        return state
+    
+    @staticmethod
+    def _weighted_choice_indices(rng: np.random.Generator, choices: List[Dict[str, Any]], size: int,
+                                 weight_key: str = 'weight') -> np.ndarray:
+        """Draw `size` weighted indices into a list of configuration dictionaries."""
+        weights = np.array([choice[weight_key] for choice in choices], dtype=np.float64)
+        return rng.choice(len(choices), size=size, p=weights / weights.sum())
+    
+    @staticmethod
+    def _config_values(choices: List[Dict[str, Any]], key: str) -> np.ndarray:
+        """Collect one field of a configuration list as an array."""
+        return np.array([choice[key] for choice in choices], dtype=np.float64)
+    
+    def get_fleet_statistics(self, fleet: Union[List[Prosumer], FleetState]) -> Dict[str, Any]:
         """
         Generate statistics about the fleet composition.
         
         Args:
-            fleet: List of Prosumer objects
+            fleet: List of Prosumer objects or a FleetState
             
         Returns:
             Dict with fleet statistics
         """
+        if isinstance(fleet, FleetState):
+            return self._get_fleet_state_statistics(fleet)
+        
         stats = {
             "total_prosumers": len(fleet),
             "asset_counts": {
@@ -254,6 +391,37 @@ class FleetGenerator:
         
         return stats
     
+    def _get_fleet_state_statistics(self, state: FleetState) -> Dict[str, Any]:
+        """Fleet statistics computed directly from the columnar arrays."""
+        cols = state.columns
+        has_bess, has_ev, has_solar = cols["has_bess"], cols["has_ev"], cols["has_solar"]
+        
+        stats = {
+            "total_prosumers": len(state),
+            "asset_counts": {
+                "bess": int(has_bess.sum()),
+                "ev": int(has_ev.sum()),
+                "solar": int(has_solar.sum())
+            },
+            "asset_percentages": {},
+            "total_capacities": {
+                "bess_kwh": float(cols["bess_capacity_kwh"][has_bess].sum()),
+                "ev_kwh": float(cols["ev_battery_capacity_kwh"][has_ev].sum()),
+                "solar_kw": float(cols["solar_capacity_kw"][has_solar].sum()),
+                "bess_power_kw": float(cols["bess_max_power_kw"][has_bess].sum())
+            },
+            "participation_stats": {
+                "mean_willingness": float(np.mean(cols["participation_willingness"])),
+                "mean_min_compensation": float(np.mean(cols["min_compensation_per_kwh"])),
+                "mean_backup_hours": float(np.mean(cols["backup_power_hours"]))
+            }
+        }
+        
+        for asset in stats["asset_counts"]:
+            stats["asset_percentages"][asset] = (stats["asset_counts"][asset] / len(state)) * 100
+        
+        return stats
+    
     def export_fleet_summary(self, fleet: List[Prosumer], output_file: str = "fleet_summary.csv") -> None:
         """
         Export fleet summary to CSV for analysis.
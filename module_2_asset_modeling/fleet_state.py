@@ -0,0 +1,823 @@
+"""
+Columnar Fleet State for VPP LLM Agent - Module 2
+
+This module stores a whole prosumer fleet as a struct of NumPy arrays (one
+array per asset parameter or state variable) and provides fleet-wide,
+vectorized versions of the BESS, EV and Solar PV operations defined in
+prosumer_models.py.
+
+Existing code that expects Prosumer objects can iterate the fleet as
+lightweight views. A view holds only (state, index); every attribute read or
+write goes straight to the underlying arrays, and the asset methods are the
+same functions used by the pydantic models.
+
+FleetSnapshot gives independent, copy-on-write copies of a fleet, so that
+several consumers (e.g. the agentic and centralized approaches in Module 5)
+can each modify their own view without copying the whole fleet.
+"""
+
+import json
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from prosumer_models import Prosumer, BESS, ElectricVehicle, SolarPV
+
+
+# Column name -> (dtype, default). Numeric defaults mirror the pydantic models.
+FLEET_COLUMNS: Dict[str, Tuple[Any, Any]] = {
+    # Prosumer
+    "prosumer_id": (object, ""),
+    "location": (object, "Los Angeles, CA"),
+    "load_profile_id": (object, ""),
+    "current_load_kw": (np.float64, 0.0),
+    "backup_power_hours": (np.float64, 4.0),
+    "comfort_temperature_range": (object, (68, 76)),
+    "ev_priority": (object, "medium"),
+    "participation_willingness": (np.float64, 0.8),
+    "min_compensation_per_kwh": (np.float64, 0.15),
+    "max_discharge_percent": (np.float64, 60.0),
+    # Multiplier applied to the assigned load profile (bulk-generated fleets)
+    "load_scale": (np.float64, 1.0),
+    # BESS
+    "has_bess": (np.bool_, False),
+    "bess_capacity_kwh": (np.float64, 0.0),
+    "bess_max_power_kw": (np.float64, 0.0),
+    "bess_current_soc_percent": (np.float64, 50.0),
+    "bess_min_soc_percent": (np.float64, 10.0),
+    "bess_max_soc_percent": (np.float64, 95.0),
+    "bess_charge_efficiency": (np.float64, 0.95),
+    "bess_discharge_efficiency": (np.float64, 0.95),
+    # Electric vehicle
+    "has_ev": (np.bool_, False),
+    "ev_battery_capacity_kwh": (np.float64, 0.0),
+    "ev_max_charge_power_kw": (np.float64, 0.0),
+    "ev_current_soc_percent": (np.float64, 70.0),
+    "ev_min_departure_soc_percent": (np.float64, 80.0),
+    "ev_charge_deadline": (object, "07:00"),
+    "ev_is_plugged_in": (np.bool_, True),
+    "ev_charge_efficiency": (np.float64, 0.92),
+    # Solar PV
+    "has_solar": (np.bool_, False),
+    "solar_capacity_kw": (np.float64, 0.0),
+    "solar_efficiency": (np.float64, 0.85),
+}
+
+# Maximum EV SOC used by ElectricVehicle.charge / get_available_charge_power_kw
+EV_MAX_SOC_PERCENT = 95.0
+
+# Intervals per hour for available-capacity calculations (15-minute steps)
+INTERVALS_PER_HOUR = 4
+
+ArrayLike = Union[float, np.ndarray]
+
+
+class _Column:
+    """Descriptor mapping a view attribute to a FleetState column."""
+
+    def __init__(self, column: str):
+        self.column = column
+
+    def __get__(self, view, owner=None):
+        if view is None:
+            return self
+        return view._state.get_value(self.column, view._index)
+
+    def __set__(self, view, value):
+        view._state.set_value(self.column, view._index, value)
+
+
+class _AssetView:
+    """Base class for views onto one row of a FleetState."""
+
+    __slots__ = ("_state", "_index")
+
+    def __init__(self, state: "FleetState", index: int):
+        self._state = state
+        self._index = index
+
+
+class BESSView(_AssetView):
+    """BESS-compatible view onto a FleetState row."""
+
+    __slots__ = ()
+
+    capacity_kwh = _Column("bess_capacity_kwh")
+    max_power_kw = _Column("bess_max_power_kw")
+    current_soc_percent = _Column("bess_current_soc_percent")
+    min_soc_percent = _Column("bess_min_soc_percent")
+    max_soc_percent = _Column("bess_max_soc_percent")
+    charge_efficiency = _Column("bess_charge_efficiency")
+    discharge_efficiency = _Column("bess_discharge_efficiency")
+
+    get_available_charge_capacity_kw = BESS.get_available_charge_capacity_kw
+    get_available_discharge_capacity_kw = BESS.get_available_discharge_capacity_kw
+    charge = BESS.charge
+    discharge = BESS.discharge
+    get_status = BESS.get_status
+
+
+class EVView(_AssetView):
+    """ElectricVehicle-compatible view onto a FleetState row."""
+
+    __slots__ = ()
+
+    battery_capacity_kwh = _Column("ev_battery_capacity_kwh")
+    max_charge_power_kw = _Column("ev_max_charge_power_kw")
+    current_soc_percent = _Column("ev_current_soc_percent")
+    min_departure_soc_percent = _Column("ev_min_departure_soc_percent")
+    charge_deadline = _Column("ev_charge_deadline")
+    is_plugged_in = _Column("ev_is_plugged_in")
+    charge_efficiency = _Column("ev_charge_efficiency")
+
+    get_charging_requirement_kwh = ElectricVehicle.get_charging_requirement_kwh
+    get_available_charge_power_kw = ElectricVehicle.get_available_charge_power_kw
+    charge = ElectricVehicle.charge
+
+
+class SolarView(_AssetView):
+    """SolarPV-compatible view onto a FleetState row."""
+
+    __slots__ = ()
+
+    capacity_kw = _Column("solar_capacity_kw")
+    efficiency = _Column("solar_efficiency")
+
+    get_generation_kw = SolarPV.get_generation_kw
+
+
+class ProsumerView(_AssetView):
+    """
+    Prosumer-compatible view onto a FleetState row.
+
+    Supports the attributes and methods of Prosumer; use to_prosumer() where a
+    real pydantic object is required.
+    """
+
+    __slots__ = ()
+
+    prosumer_id = _Column("prosumer_id")
+    location = _Column("location")
+    load_profile_id = _Column("load_profile_id")
+    current_load_kw = _Column("current_load_kw")
+    backup_power_hours = _Column("backup_power_hours")
+    comfort_temperature_range = _Column("comfort_temperature_range")
+    ev_priority = _Column("ev_priority")
+    participation_willingness = _Column("participation_willingness")
+    min_compensation_per_kwh = _Column("min_compensation_per_kwh")
+    max_discharge_percent = _Column("max_discharge_percent")
+
+    @property
+    def bess(self) -> Optional[BESSView]:
+        return BESSView(self._state, self._index) if self._state.get_value("has_bess", self._index) else None
+
+    @property
+    def ev(self) -> Optional[EVView]:
+        return EVView(self._state, self._index) if self._state.get_value("has_ev", self._index) else None
+
+    @property
+    def solar(self) -> Optional[SolarView]:
+        return SolarView(self._state, self._index) if self._state.get_value("has_solar", self._index) else None
+
+    update_load = Prosumer.update_load
+    get_net_load_kw = Prosumer.get_net_load_kw
+    get_available_flexibility_kw = Prosumer.get_available_flexibility_kw
+    evaluate_market_opportunity = Prosumer.evaluate_market_opportunity
+    get_available_capacity_kw = Prosumer.get_available_capacity_kw
+    get_status_summary = Prosumer.get_status_summary
+
+    def to_prosumer(self) -> Prosumer:
+        """Materialize this row as a standalone pydantic Prosumer."""
+        return self._state.to_prosumer(self._index)
+
+    def __repr__(self) -> str:
+        return f"ProsumerView(prosumer_id={self.prosumer_id!r}, index={self._index})"
+
+
+class FleetState:
+    """
+    Struct-of-arrays container for a prosumer fleet.
+
+    Every column in FLEET_COLUMNS is a contiguous NumPy array of length n.
+    Asset parameters for prosumers without that asset keep their defaults and
+    are masked by the has_bess / has_ev / has_solar flags.
+    """
+
+    def __init__(self, n: int):
+        """
+        Allocate a fleet of n prosumers with default parameters.
+
+        Args:
+            n: Number of prosumers
+        """
+        self.n = int(n)
+        self.columns: Dict[str, np.ndarray] = {}
+        for name, (dtype, default) in FLEET_COLUMNS.items():
+            if dtype is object:
+                column = np.empty(self.n, dtype=object)
+                column.fill(default)
+            else:
+                column = np.full(self.n, default, dtype=dtype)
+            self.columns[name] = column
+        self._index_by_id: Optional[Dict[str, int]] = None
+
+    # ------------------------------------------------------------------
+    # Construction and conversion
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_prosumers(cls, prosumers: Sequence[Prosumer]) -> "FleetState":
+        """
+        Build a FleetState from a list of Prosumer objects.
+
+        Args:
+            prosumers: Prosumer objects (or ProsumerViews)
+
+        Returns:
+            FleetState holding a copy of every parameter and state variable
+        """
+        state = cls(len(prosumers))
+        cols = state.columns
+
+        for i, p in enumerate(prosumers):
+            cols["prosumer_id"][i] = p.prosumer_id
+            cols["location"][i] = p.location
+            cols["load_profile_id"][i] = p.load_profile_id
+            cols["current_load_kw"][i] = p.current_load_kw
+            cols["backup_power_hours"][i] = p.backup_power_hours
+            cols["comfort_temperature_range"][i] = p.comfort_temperature_range
+            cols["ev_priority"][i] = p.ev_priority
+            cols["participation_willingness"][i] = p.participation_willingness
+            cols["min_compensation_per_kwh"][i] = p.min_compensation_per_kwh
+            cols["max_discharge_percent"][i] = p.max_discharge_percent
+
+            if p.bess is not None:
+                cols["has_bess"][i] = True
+                cols["bess_capacity_kwh"][i] = p.bess.capacity_kwh
+                cols["bess_max_power_kw"][i] = p.bess.max_power_kw
+                cols["bess_current_soc_percent"][i] = p.bess.current_soc_percent
+                cols["bess_min_soc_percent"][i] = p.bess.min_soc_percent
+                cols["bess_max_soc_percent"][i] = p.bess.max_soc_percent
+                cols["bess_charge_efficiency"][i] = p.bess.charge_efficiency
+                cols["bess_discharge_efficiency"][i] = p.bess.discharge_efficiency
+
+            if p.ev is not None:
+                cols["has_ev"][i] = True
+                cols["ev_battery_capacity_kwh"][i] = p.ev.battery_capacity_kwh
+                cols["ev_max_charge_power_kw"][i] = p.ev.max_charge_power_kw
+                cols["ev_current_soc_percent"][i] = p.ev.current_soc_percent
+                cols["ev_min_departure_soc_percent"][i] = p.ev.min_departure_soc_percent
+                cols["ev_charge_deadline"][i] = p.ev.charge_deadline
+                cols["ev_is_plugged_in"][i] = p.ev.is_plugged_in
+                cols["ev_charge_efficiency"][i] = p.ev.charge_efficiency
+
+            if p.solar is not None:
+                cols["has_solar"][i] = True
+                cols["solar_capacity_kw"][i] = p.solar.capacity_kw
+                cols["solar_efficiency"][i] = p.solar.efficiency
+
+        return state
+
+    def to_prosumer(self, index: int) -> Prosumer:
+        """Materialize one row as a standalone pydantic Prosumer."""
+        value = lambda name: self.get_value(name, index)
+
+        bess = None
+        if value("has_bess"):
+            bess = BESS(
+                capacity_kwh=value("bess_capacity_kwh"),
+                max_power_kw=value("bess_max_power_kw"),
+                current_soc_percent=value("bess_current_soc_percent"),
+                min_soc_percent=value("bess_min_soc_percent"),
+                max_soc_percent=value("bess_max_soc_percent"),
+                charge_efficiency=value("bess_charge_efficiency"),
+                discharge_efficiency=value("bess_discharge_efficiency")
+            )
+
+        ev = None
+        if value("has_ev"):
+            ev = ElectricVehicle(
+                battery_capacity_kwh=value("ev_battery_capacity_kwh"),
+                max_charge_power_kw=value("ev_max_charge_power_kw"),
+                current_soc_percent=value("ev_current_soc_percent"),
+                min_departure_soc_percent=value("ev_min_departure_soc_percent"),
+                charge_deadline=value("ev_charge_deadline"),
+                is_plugged_in=value("ev_is_plugged_in"),
+                charge_efficiency=value("ev_charge_efficiency")
+            )
+
+        solar = None
+        if value("has_solar"):
+            solar = SolarPV(
+                capacity_kw=value("solar_capacity_kw"),
+                efficiency=value("solar_efficiency")
+            )
+
+        return Prosumer(
+            prosumer_id=value("prosumer_id"),
+            location=value("location"),
+            bess=bess,
+            ev=ev,
+            solar=solar,
+            load_profile_id=value("load_profile_id"),
+            current_load_kw=value("current_load_kw"),
+            backup_power_hours=value("backup_power_hours"),
+            comfort_temperature_range=value("comfort_temperature_range"),
+            ev_priority=value("ev_priority"),
+            participation_willingness=value("participation_willingness"),
+            min_compensation_per_kwh=value("min_compensation_per_kwh"),
+            max_discharge_percent=value("max_discharge_percent")
+        )
+
+    def to_prosumers(self) -> List[Prosumer]:
+        """Materialize the whole fleet as pydantic Prosumer objects."""
+        return [self.to_prosumer(i) for i in range(self.n)]
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Export every column as an array np.savez can store without pickling.
+
+        String columns become fixed-width unicode arrays; other object columns
+        (e.g. comfort_temperature_range tuples) are JSON-encoded under a
+        "json:" key prefix.
+        """
+        arrays = {}
+        for name, column in self.columns.items():
+            if column.dtype != object:
+                arrays[name] = column
+            elif all(isinstance(value, str) for value in column):
+                arrays[name] = column.astype(str)
+            else:
+                arrays[f"json:{name}"] = np.array([json.dumps(value) for value in column], dtype=str)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "FleetState":
+        """Rebuild a FleetState from to_arrays() output (columns not present keep defaults)."""
+        n = len(arrays["prosumer_id"])
+        state = cls(n)
+        for key, values in arrays.items():
+            if key.startswith("json:"):
+                column = state.columns[key[len("json:"):]]
+                for i, value in enumerate(values):
+                    decoded = json.loads(str(value))
+                    column[i] = tuple(decoded) if isinstance(decoded, list) else decoded
+            elif key in state.columns:
+                column = state.columns[key]
+                if column.dtype == object:
+                    column[:] = [str(value) for value in values]
+                else:
+                    column[:] = values
+        return state
+
+    # ------------------------------------------------------------------
+    # Element access
+    # ------------------------------------------------------------------
+
+    def writable_column(self, name: str) -> np.ndarray:
+        """Column array to write to in place (reads should use `columns`)."""
+        return self.columns[name]
+
+    def get_value(self, column: str, index: int) -> Any:
+        """Read one element as a Python scalar."""
+        return self.columns[column].item(index)
+
+    def set_value(self, column: str, index: int, value: Any) -> None:
+        """Write one element."""
+        self.writable_column(column)[index] = value
+        if column == "prosumer_id":
+            self._index_by_id = None
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, index: int) -> ProsumerView:
+        if index < 0:
+            index += self.n
+        if not 0 <= index < self.n:
+            raise IndexError(f"Prosumer index {index} out of range for fleet of {self.n}")
+        return ProsumerView(self, index)
+
+    def __iter__(self) -> Iterator[ProsumerView]:
+        for i in range(self.n):
+            yield ProsumerView(self, i)
+
+    def views(self) -> List[ProsumerView]:
+        """Return Prosumer-compatible views for the whole fleet."""
+        return [ProsumerView(self, i) for i in range(self.n)]
+
+    def snapshot(self) -> "FleetSnapshot":
+        """Return a copy-on-write snapshot of the fleet (see FleetSnapshot)."""
+        return FleetSnapshot(self)
+
+    def index_of(self, prosumer_id: str) -> int:
+        """Return the row index of a prosumer id."""
+        if self._index_by_id is None:
+            self._index_by_id = {pid: i for i, pid in enumerate(self.columns["prosumer_id"])}
+        return self._index_by_id[prosumer_id]
+
+    def nbytes(self) -> int:
+        """Approximate memory used by the numeric columns."""
+        return sum(col.nbytes for col in self.columns.values() if col.dtype != object)
+
+    # ------------------------------------------------------------------
+    # Vectorized BESS operations
+    # ------------------------------------------------------------------
+
+    def bess_available_charge_kw(self) -> np.ndarray:
+        """Fleet-wide BESS.get_available_charge_capacity_kw (0 where no BESS)."""
+        c = self.columns
+        available_kwh = (c["bess_max_soc_percent"] - c["bess_current_soc_percent"]) / 100.0 * c["bess_capacity_kwh"]
+        return np.where(c["has_bess"], np.minimum(c["bess_max_power_kw"], available_kwh * INTERVALS_PER_HOUR), 0.0)
+
+    def bess_available_discharge_kw(self) -> np.ndarray:
+        """Fleet-wide BESS.get_available_discharge_capacity_kw (0 where no BESS)."""
+        c = self.columns
+        available_kwh = (c["bess_current_soc_percent"] - c["bess_min_soc_percent"]) / 100.0 * c["bess_capacity_kwh"]
+        return np.where(c["has_bess"], np.minimum(c["bess_max_power_kw"], available_kwh * INTERVALS_PER_HOUR), 0.0)
+
+    def bess_charge(self, power_kw: ArrayLike, duration_hours: float = 0.25) -> np.ndarray:
+        """
+        Charge every BESS at the requested power (fleet-wide BESS.charge).
+
+        Args:
+            power_kw: Charging power per prosumer in kW (scalar or length-n array)
+            duration_hours: Charging duration in hours
+
+        Returns:
+            np.ndarray: Energy charged per prosumer in kWh
+        """
+        c = self.columns
+        power = np.broadcast_to(np.asarray(power_kw, dtype=np.float64), (self.n,))
+        energy = np.zeros(self.n)
+        idx = np.flatnonzero(c["has_bess"] & (power > 0))
+        if idx.size == 0:
+            return energy
+
+        charge_power = np.minimum(np.minimum(power[idx], c["bess_max_power_kw"][idx]),
+                                  self.bess_available_charge_kw()[idx])
+        energy[idx] = charge_power * duration_hours * c["bess_charge_efficiency"][idx]
+
+        soc_increase = (energy[idx] / c["bess_capacity_kwh"][idx]) * 100.0
+        soc = self.writable_column("bess_current_soc_percent")
+        soc[idx] = np.minimum(c["bess_max_soc_percent"][idx], soc[idx] + soc_increase)
+        return energy
+
+    def bess_discharge(self, power_kw: ArrayLike, duration_hours: float = 0.25) -> np.ndarray:
+        """
+        Discharge every BESS at the requested power (fleet-wide BESS.discharge).
+
+        Args:
+            power_kw: Discharging power per prosumer in kW (scalar or length-n array)
+            duration_hours: Discharging duration in hours
+
+        Returns:
+            np.ndarray: Output energy per prosumer in kWh
+        """
+        c = self.columns
+        power = np.broadcast_to(np.asarray(power_kw, dtype=np.float64), (self.n,))
+        output = np.zeros(self.n)
+        idx = np.flatnonzero(c["has_bess"] & (power > 0))
+        if idx.size == 0:
+            return output
+
+        discharge_power = np.minimum(np.minimum(power[idx], c["bess_max_power_kw"][idx]),
+                                     self.bess_available_discharge_kw()[idx])
+        energy_discharged = discharge_power * duration_hours / c["bess_discharge_efficiency"][idx]
+
+        soc_decrease = (energy_discharged / c["bess_capacity_kwh"][idx]) * 100.0
+        soc = self.writable_column("bess_current_soc_percent")
+        soc[idx] = np.maximum(c["bess_min_soc_percent"][idx], soc[idx] - soc_decrease)
+        output[idx] = discharge_power * duration_hours
+        return output
+
+    # ------------------------------------------------------------------
+    # Vectorized EV and Solar operations
+    # ------------------------------------------------------------------
+
+    def ev_charging_requirement_kwh(self) -> np.ndarray:
+        """Fleet-wide ElectricVehicle.get_charging_requirement_kwh (0 where no EV)."""
+        c = self.columns
+        deficit = c["ev_min_departure_soc_percent"] - c["ev_current_soc_percent"]
+        return np.where(c["has_ev"] & (deficit > 0), deficit / 100.0 * c["ev_battery_capacity_kwh"], 0.0)
+
+    def ev_available_charge_kw(self) -> np.ndarray:
+        """Fleet-wide ElectricVehicle.get_available_charge_power_kw (0 where no EV)."""
+        c = self.columns
+        can_charge = c["has_ev"] & c["ev_is_plugged_in"] & (c["ev_current_soc_percent"] < EV_MAX_SOC_PERCENT)
+        return np.where(can_charge, c["ev_max_charge_power_kw"], 0.0)
+
+    def ev_charge(self, power_kw: ArrayLike, duration_hours: float = 0.25) -> np.ndarray:
+        """
+        Charge every plugged-in EV at the requested power (fleet-wide ElectricVehicle.charge).
+
+        Returns:
+            np.ndarray: Energy charged per prosumer in kWh
+        """
+        c = self.columns
+        power = np.broadcast_to(np.asarray(power_kw, dtype=np.float64), (self.n,))
+        energy = np.zeros(self.n)
+        idx = np.flatnonzero(c["has_ev"] & c["ev_is_plugged_in"] & (power > 0))
+        if idx.size == 0:
+            return energy
+
+        actual_power = np.minimum(power[idx], c["ev_max_charge_power_kw"][idx])
+        energy[idx] = actual_power * duration_hours * c["ev_charge_efficiency"][idx]
+
+        soc_increase = (energy[idx] / c["ev_battery_capacity_kwh"][idx]) * 100.0
+        soc = self.writable_column("ev_current_soc_percent")
+        soc[idx] = np.minimum(EV_MAX_SOC_PERCENT, soc[idx] + soc_increase)
+        return energy
+
+    def ev_drive(self, power_kw: ArrayLike, duration_hours: float = 0.25) -> np.ndarray:
+        """
+        Drain every unplugged EV by its driving consumption.
+
+        Args:
+            power_kw: Average driving consumption per prosumer in kW (scalar or length-n array)
+            duration_hours: Driving duration in hours
+
+        Returns:
+            np.ndarray: Energy used per prosumer in kWh
+        """
+        c = self.columns
+        power = np.broadcast_to(np.asarray(power_kw, dtype=np.float64), (self.n,))
+        energy = np.zeros(self.n)
+        idx = np.flatnonzero(c["has_ev"] & ~c["ev_is_plugged_in"] & (power > 0))
+        if idx.size == 0:
+            return energy
+
+        available_kwh = c["ev_current_soc_percent"][idx] / 100.0 * c["ev_battery_capacity_kwh"][idx]
+        energy[idx] = np.minimum(power[idx] * duration_hours, available_kwh)
+        self.writable_column("ev_current_soc_percent")[idx] -= (energy[idx] / c["ev_battery_capacity_kwh"][idx]) * 100.0
+        return energy
+
+    def ev_departure_minutes(self) -> np.ndarray:
+        """Each EV's charge deadline ("HH:MM") as minutes after midnight (0 where no EV)."""
+        c = self.columns
+        minutes = np.zeros(self.n, dtype=np.int64)
+        idx = np.flatnonzero(c["has_ev"])
+        if idx.size == 0:
+            return minutes
+
+        # Parse each distinct deadline once
+        deadlines, inverse = np.unique(c["ev_charge_deadline"][idx].astype(str), return_inverse=True)
+        parsed = np.array([int(d.split(":")[0]) * 60 + int(d.split(":")[1]) for d in deadlines], dtype=np.int64)
+        minutes[idx] = parsed[inverse]
+        return minutes
+
+    def solar_generation_kw(self, solar_irradiance_per_kw: ArrayLike) -> np.ndarray:
+        """Fleet-wide SolarPV.get_generation_kw (0 where no solar)."""
+        c = self.columns
+        generation = c["solar_capacity_kw"] * solar_irradiance_per_kw * c["solar_efficiency"]
+        return np.where(c["has_solar"], generation, 0.0)
+
+    # ------------------------------------------------------------------
+    # Vectorized prosumer operations
+    # ------------------------------------------------------------------
+
+    def update_load(self, load_kw: ArrayLike) -> None:
+        """Set the current load of every prosumer."""
+        self.writable_column("current_load_kw")[:] = load_kw
+
+    def net_load_kw(self, solar_generation_kw: ArrayLike = 0.0) -> np.ndarray:
+        """Fleet-wide Prosumer.get_net_load_kw."""
+        return np.maximum(0.0, self.columns["current_load_kw"] - solar_generation_kw)
+
+    def step(
+        self,
+        load_kw: ArrayLike,
+        solar_irradiance_per_kw: ArrayLike,
+        dispatch_kw: ArrayLike = 0.0,
+        ev_plugged_in: Optional[np.ndarray] = None,
+        ev_driving_kw: ArrayLike = 0.0,
+        duration_hours: float = 1.0 / INTERVALS_PER_HOUR
+    ) -> Dict[str, np.ndarray]:
+        """
+        Advance the physical state of the whole fleet by one interval.
+
+        Each battery covers its household's net load (load minus solar) and
+        stores surplus solar, on top of any committed dispatch, within the
+        power, SOC and efficiency limits of bess_charge / bess_discharge.
+        Plugged-in EVs charge at full power until they reach their departure
+        SOC; unplugged EVs are drained by their driving consumption.
+
+        Args:
+            load_kw: Household load per prosumer in kW
+            solar_irradiance_per_kw: Generation per kW installed (scalar or per prosumer)
+            dispatch_kw: Committed battery discharge per prosumer in kW
+            ev_plugged_in: New EV plug state per prosumer (None keeps the current one)
+            ev_driving_kw: Average consumption of unplugged EVs in kW
+            duration_hours: Interval length in hours
+
+        Returns:
+            Dict of per-prosumer arrays: solar_kw, bess_charged_kwh,
+            bess_discharged_kwh, ev_charged_kwh, ev_driven_kwh and grid_kw
+            (net import; negative when exporting)
+        """
+        c = self.columns
+        self.update_load(load_kw)
+        solar_kw = self.solar_generation_kw(solar_irradiance_per_kw)
+        if ev_plugged_in is not None:
+            plugged = np.where(c["has_ev"], ev_plugged_in, c["ev_is_plugged_in"])
+            self.writable_column("ev_is_plugged_in")[:] = plugged
+
+        # Positive: the battery discharges, negative: it charges from surplus solar
+        battery_kw = dispatch_kw + (c["current_load_kw"] - solar_kw)
+        bess_charged = self.bess_charge(np.maximum(-battery_kw, 0.0), duration_hours)
+        bess_discharged = self.bess_discharge(np.maximum(battery_kw, 0.0), duration_hours)
+
+        ev_power = np.where(self.ev_charging_requirement_kwh() > 0, self.ev_available_charge_kw(), 0.0)
+        ev_charged = self.ev_charge(ev_power, duration_hours)
+        ev_driven = self.ev_drive(ev_driving_kw, duration_hours)
+
+        grid_kw = (c["current_load_kw"] - solar_kw
+                   + bess_charged / (c["bess_charge_efficiency"] * duration_hours)
+                   + ev_charged / (c["ev_charge_efficiency"] * duration_hours)
+                   - bess_discharged / duration_hours)
+        return {
+            "solar_kw": solar_kw,
+            "bess_charged_kwh": bess_charged,
+            "bess_discharged_kwh": bess_discharged,
+            "ev_charged_kwh": ev_charged,
+            "ev_driven_kwh": ev_driven,
+            "grid_kw": grid_kw
+        }
+
+    def available_flexibility_kw(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Fleet-wide Prosumer.get_available_flexibility_kw.
+
+        Returns:
+            Tuple of (charge_kw, discharge_kw) arrays
+        """
+        c = self.columns
+        capacity = c["bess_capacity_kwh"]
+
+        # Reserve capacity for backup power requirements (assume 2kW average load)
+        backup_energy_kwh = c["backup_power_hours"] * 2.0
+        current_energy_kwh = (c["bess_current_soc_percent"] / 100.0) * capacity
+        min_energy_for_backup = np.maximum((c["bess_min_soc_percent"] / 100.0) * capacity, backup_energy_kwh)
+
+        available_discharge_energy = current_energy_kwh - min_energy_for_backup
+        max_allowed_discharge_energy = (c["max_discharge_percent"] / 100.0) * capacity
+        actual_discharge_energy = np.maximum(0.0, np.minimum(available_discharge_energy, max_allowed_discharge_energy))
+
+        discharge = np.where(c["has_bess"],
+                             np.minimum(c["bess_max_power_kw"], actual_discharge_energy * INTERVALS_PER_HOUR), 0.0)
+        charge = self.bess_available_charge_kw()
+        return charge, discharge
+
+    def available_capacity_kw(self) -> np.ndarray:
+        """Fleet-wide Prosumer.get_available_capacity_kw (discharge flexibility)."""
+        return self.available_flexibility_kw()[1]
+
+    def participation_scores(self, price_per_mwh: float) -> np.ndarray:
+        """Fleet-wide participation_score from Prosumer.evaluate_market_opportunity."""
+        c = self.columns
+        price_per_kwh = price_per_mwh / 1000.0
+
+        score = c["participation_willingness"].copy()
+        score[price_per_kwh < c["min_compensation_per_kwh"]] *= 0.3
+        score[c["has_bess"] & (c["bess_current_soc_percent"] < 30.0)] *= 0.5
+        score[self.ev_charging_requirement_kwh() > 0] *= 0.7
+        return score
+
+
+class _SnapshotColumns(Mapping):
+    """Read-only column mapping of a FleetSnapshot; unchanged columns are views of the base."""
+
+    def __init__(self, snapshot: "FleetSnapshot"):
+        self._snapshot = snapshot
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self._snapshot._read_column(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._snapshot.base.columns)
+
+    def __len__(self) -> int:
+        return len(self._snapshot.base.columns)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._snapshot.base.columns
+
+
+class FleetSnapshot(FleetState):
+    """
+    Copy-on-write snapshot of a FleetState.
+
+    Taking a snapshot copies nothing. Writes through views (set_value, e.g.
+    view.bess.discharge()) go to a per-prosumer overlay, so changing k
+    prosumers costs O(k). Reading through `columns` returns read-only views
+    of the base, so a snapshot that is only read stays empty. The first
+    in-place write to a column by a vectorized operation (writable_column)
+    copies that one column and applies the overlay to it. The base is only
+    modified by commit(), so several snapshots of one fleet can be changed
+    independently.
+
+    The base must not be modified while its snapshots are in use.
+    """
+
+    def __init__(self, base: FleetState):
+        """
+        Create a snapshot.
+
+        Args:
+            base: Fleet to snapshot (a FleetState or another snapshot)
+        """
+        self.base = base
+        self.n = base.n
+        self.columns = _SnapshotColumns(self)
+        self._owned: Dict[str, np.ndarray] = {}
+        self._overlay: Dict[str, Dict[int, Any]] = {}
+        self._index_by_id = None
+
+    def _read_column(self, name: str) -> np.ndarray:
+        """Read-only view of a column; only a column with overlay writes is copied."""
+        column = self._owned.get(name)
+        if column is None:
+            if name in self._overlay:
+                column = self._own_column(name)
+            else:
+                column = self.base.columns[name]
+        view = column.view()
+        view.flags.writeable = False
+        return view
+
+    def writable_column(self, name: str) -> np.ndarray:
+        """This snapshot's private copy of a column, to write to in place."""
+        return self._own_column(name)
+
+    def _own_column(self, name: str) -> np.ndarray:
+        """This snapshot's private copy of a column, made on first write."""
+        column = self._owned.get(name)
+        if column is None:
+            column = self.base.columns[name].copy()
+            for index, value in self._overlay.pop(name, {}).items():
+                column[index] = value
+            self._owned[name] = column
+        return column
+
+    def get_value(self, column: str, index: int) -> Any:
+        """Read one element as a Python scalar."""
+        owned = self._owned.get(column)
+        if owned is not None:
+            return owned.item(index)
+        overlay = self._overlay.get(column)
+        if overlay is not None and index in overlay:
+            value = overlay[index]
+            return value.item() if isinstance(value, np.generic) else value
+        return self.base.get_value(column, index)
+
+    def set_value(self, column: str, index: int, value: Any) -> None:
+        """Write one element to this snapshot only."""
+        owned = self._owned.get(column)
+        if owned is not None:
+            owned[index] = value
+        else:
+            dtype = self.base.columns[column].dtype
+            self._overlay.setdefault(column, {})[index] = value if dtype == object else dtype.type(value)
+        if column == "prosumer_id":
+            self._index_by_id = None
+
+    def index_of(self, prosumer_id: str) -> int:
+        """Return the row index of a prosumer id."""
+        if "prosumer_id" in self._owned or "prosumer_id" in self._overlay:
+            return super().index_of(prosumer_id)
+        return self.base.index_of(prosumer_id)
+
+    def nbytes(self) -> int:
+        """Approximate memory used by the numeric columns this snapshot has copied."""
+        return sum(col.nbytes for col in self._owned.values() if col.dtype != object)
+
+    def changed_indices(self) -> np.ndarray:
+        """Rows whose values differ from the base (or were written, for overlay writes)."""
+        changed = np.zeros(self.n, dtype=bool)
+        for overlay in self._overlay.values():
+            changed[list(overlay)] = True
+        for name, column in self._owned.items():
+            changed |= column != self.base.columns[name]
+        return np.flatnonzero(changed)
+
+    def commit(self) -> np.ndarray:
+        """
+        Write this snapshot's changes to the base and start a new snapshot of it.
+
+        Returns:
+            np.ndarray: Rows that were written
+        """
+        changed = self.changed_indices()
+        for name, column in self._owned.items():
+            self.base.writable_column(name)[changed] = column[changed]
+        for name, overlay in self._overlay.items():
+            for index, value in overlay.items():
+                self.base.set_value(name, index, value)
+        if "prosumer_id" in self._owned:
+            self.base._index_by_id = None
+
+        self._owned.clear()
+        self._overlay.clear()
+        self._index_by_id = None
+        return changed
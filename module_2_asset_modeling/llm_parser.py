@@ -6,38 +6,62 @@ of prosumers and convert them to structured configuration dictionaries.
 """
 
 import os
+import sys
 import json
 import re
 from typing import Dict, Any, Optional
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+# Shared LLM gateway lives in Module 3
+module_3_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'module_3_agentic_framework')
+if module_3_path not in sys.path:
+    sys.path.append(module_3_path)
+
+from llm_gateway import LLMGateway, CallableBackend
+from llm_cache import LLMResponseCache
+from offline_llm import offline_gateway_from_env
+
 
 class LLMProsumerParser:
     """
     Uses Gemini API to parse natural language prosumer descriptions.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, gateway: Optional[LLMGateway] = None):
         """
         Initialize the LLM parser with Gemini API.
         
         Args:
             api_key: Gemini API key (if not provided, loads from .env)
+            gateway: LLM gateway to send prompts through; when given, no API key
+                is needed (defaults to the offline backend when
+                VPP_LLM_BACKEND=offline, otherwise Gemini)
         """
         # Load environment variables
         load_dotenv()
         
-        # Get API key
-        if api_key is None:
-            api_key = os.getenv('GEMINI_API_KEY')
-        
-        if not api_key:
-            raise ValueError("Gemini API key not found. Please set GEMINI_API_KEY in .env file")
+        if gateway is None:
+            gateway = offline_gateway_from_env()
         
-        # Configure Gemini
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+        if gateway is not None:
+            self.model = None
+            self.gateway = gateway
+        else:
+            # Get API key
+            if api_key is None:
+                api_key = os.getenv('GEMINI_API_KEY')
+            
+            if not api_key:
+                raise ValueError("Gemini API key not found. Please set GEMINI_API_KEY in .env file")
+            
+            # Configure Gemini; calls look up self.model each time so it can be swapped
+            genai.configure(api_key=api_key)
+            self.model = genai.GenerativeModel('gemini-1.5-flash')
+            self.gateway = LLMGateway(
+                CallableBackend(self._call_model, model_name='gemini-1.5-flash'),
+                cache=LLMResponseCache.from_env()
+            )
         
         # Define the system prompt for parsing prosumer descriptions
         self.system_prompt = """
@@ -151,6 +175,14 @@ Output:
 Parse the following description and return only the JSON object:
 """
 
+    def _call_model(self, prompt: str) -> str:
+        """Blocking Gemini call used by the default gateway backend."""
+        return self.model.generate_content(prompt).text
+    
+    def _build_prompt(self, description: str) -> str:
+        """User part of the parsing prompt (sent after self.system_prompt)."""
+        return f"\n\nDescription: {description}"
+    
     def text_to_prosumer_config(self, description: str) -> Dict[str, Any]:
         """
         Convert natural language prosumer description to structured config.
@@ -162,12 +194,25 @@ Parse the following description and return only the JSON object:
             Dict: Structured prosumer configuration
         """
         try:
-            # Construct the full prompt
-            full_prompt = self.system_prompt + f"\n\nDescription: {description}"
+            response_text = self.gateway.generate_sync(self._build_prompt(description), self.system_prompt)
+        except Exception as e:
+            print(f"Error in LLM parsing: {e}")
+            return self._get_default_config()
+        
+        return self._parse_response(response_text)
+    
+    def _parse_response(self, response_text: str) -> Dict[str, Any]:
+        """
+        Turn raw model output into a cleaned configuration.
+        
+        Args:
+            response_text: Model response for one description
             
-            # Generate response
-            response = self.model.generate_content(full_prompt)
-            response_text = response.text.strip()
+        Returns:
+            Dict: Cleaned configuration (defaults when the response is unusable)
+        """
+        try:
+            response_text = response_text.strip()
             
             # Extract JSON from response (handle case where model adds extra text)
             json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
@@ -306,17 +351,26 @@ Parse the following description and return only the JSON object:
         """
         Parse multiple prosumer descriptions in batch.
         
+        All prompts are sent through the gateway concurrently; a description
+        whose call fails gets the default configuration.
+        
         Args:
             descriptions: List of natural language descriptions
             
         Returns:
             List of parsed configurations
         """
+        print(f"Parsing {len(descriptions)} descriptions")
+        prompts = [self._build_prompt(description) for description in descriptions]
+        responses = self.gateway.generate_many_sync(prompts, self.system_prompt, return_exceptions=True)
+        
         configs = []
-        for i, description in enumerate(descriptions):
-            print(f"Parsing description {i+1}/{len(descriptions)}")
-            config = self.text_to_prosumer_config(description)
-            configs.append(config)
+        for i, response in enumerate(responses):
+            if isinstance(response, Exception):
+                print(f"Error in LLM parsing of description {i+1}: {response}")
+                configs.append(self._get_default_config())
+            else:
+                configs.append(self._parse_response(response))
         
         return configs
 
@@ -8,6 +8,7 @@ prosumer models, fleet generation, and LLM parsing functionality.
 import pytest
 import pandas as pd
 import numpy as np
+import io
 import os
 import sys
 from unittest.mock import patch, MagicMock
@@ -17,6 +18,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from prosumer_models import Prosumer, BESS, ElectricVehicle, SolarPV
 from fleet_generator import FleetGenerator
+from fleet_state import FleetState, ProsumerView
 from llm_parser import LLMProsumerParser
 
 
@@ -254,7 +256,21 @@ class TestFleetGenerator:
         assert len(self.generator.load_profiles) > 0
         assert self.generator.solar_data is not None
         assert len(self.generator.solar_data) > 0
-    
+
+    def test_load_store_backend(self):
+        """Test that the memory-mapped load store is used when available."""
+        if self.generator.load_store is None:
+            pytest.skip("Module 1 load store not found - skipping load store test")
+
+        store = self.generator.load_store
+        assert self.generator.load_profiles is store
+        assert isinstance(store.load_kw, np.memmap)
+
+        profile_df = self.generator.load_profiles[0]
+        assert list(profile_df.columns) == ['timestamp', 'load_kw']
+        assert len(profile_df) == store.num_timesteps
+        assert len(store.time_slice(0)) == len(store)
+
     def test_create_small_fleet(self):
         """Test creating a small fleet of prosumers."""
         fleet = self.generator.create_prosumer_fleet(n=5, random_seed=42)
@@ -281,6 +297,35 @@ class TestFleetGenerator:
         assert 0 < has_ev < len(fleet)
         assert 0 < has_solar < len(fleet)
     
+    def test_bulk_fleet_state(self):
+        """Test bulk columnar fleet generation beyond the number of load profiles."""
+        n = len(self.generator.load_profiles) * 5 + 3
+        state = self.generator.create_fleet_state(n=n, random_seed=7, load_scale_jitter=0.1)
+        
+        assert len(state) == n
+        assert state[n - 1].load_profile_id == f"profile_{(n - 1) % len(self.generator.load_profiles) + 1}"
+        assert np.all(state.columns["load_scale"] > 0)
+        assert state.columns["load_scale"].std() > 0
+        
+        # Assets only carry parameters when owned, drawn from the configured options
+        cols = state.columns
+        bess_sizes = {c["capacity_kwh"] for c in self.generator.bess_configs}
+        assert set(cols["bess_capacity_kwh"][cols["has_bess"]]) <= bess_sizes
+        assert np.all(cols["bess_capacity_kwh"][~cols["has_bess"]] == 0)
+        assert set(cols["ev_priority"]) <= {"low", "medium", "high"}
+        
+        # Same seed reproduces the fleet
+        again = self.generator.create_fleet_state(n=n, random_seed=7, load_scale_jitter=0.1)
+        for name, column in state.columns.items():
+            assert np.array_equal(column, again.columns[name]), name
+        
+        # Views materialize as valid Prosumer objects
+        assert isinstance(state[0].to_prosumer(), Prosumer)
+        
+        stats = self.generator.get_fleet_statistics(state)
+        assert stats["total_prosumers"] == n
+        assert stats["asset_counts"]["bess"] == int(cols["has_bess"].sum())
+    
     def test_fleet_statistics(self):
         """Test fleet statistics generation."""
         fleet = self.generator.create_prosumer_fleet(n=10, random_seed=42)
@@ -300,6 +345,168 @@ class TestFleetGenerator:
         assert "solar" in stats["asset_counts"]
 
 
+class TestFleetState:
+    """Test columnar FleetState against the per-object Prosumer models."""
+    
+    def setup_method(self):
+        """Build a mixed fleet covering every asset combination."""
+        rng = np.random.RandomState(7)
+        self.prosumers = []
+        for i in range(40):
+            bess = ev = solar = None
+            if i % 2 == 0:
+                bess = BESS(
+                    capacity_kwh=rng.choice([5.0, 10.0, 13.5]),
+                    max_power_kw=rng.choice([3.0, 5.0, 7.0]),
+                    current_soc_percent=rng.uniform(5, 98),
+                    min_soc_percent=rng.uniform(5, 15),
+                    max_soc_percent=rng.uniform(90, 98)
+                )
+            if i % 3 == 0:
+                ev = ElectricVehicle(
+                    battery_capacity_kwh=rng.choice([40.0, 75.0]),
+                    max_charge_power_kw=rng.choice([7.2, 11.5]),
+                    current_soc_percent=rng.uniform(50, 96),
+                    min_departure_soc_percent=rng.uniform(75, 90),
+                    is_plugged_in=bool(rng.rand() < 0.8)
+                )
+            if i % 5 != 0:
+                solar = SolarPV(capacity_kw=rng.choice([4.0, 8.0]), efficiency=rng.uniform(0.8, 0.9))
+            self.prosumers.append(Prosumer(
+                prosumer_id=f"prosumer_{i:03d}",
+                bess=bess,
+                ev=ev,
+                solar=solar,
+                load_profile_id=f"profile_{i + 1}",
+                backup_power_hours=rng.uniform(1, 8),
+                participation_willingness=rng.uniform(0.3, 0.95),
+                min_compensation_per_kwh=rng.uniform(0.08, 0.35),
+                max_discharge_percent=rng.uniform(30, 85)
+            ))
+        self.state = FleetState.from_prosumers(self.prosumers)
+    
+    def test_round_trip(self):
+        """Test that converting to columns and back preserves every field."""
+        assert len(self.state) == len(self.prosumers)
+        for original, restored in zip(self.prosumers, self.state.to_prosumers()):
+            assert restored == original
+    
+    def test_array_export_round_trip(self):
+        """Test to_arrays/from_arrays through an npz file without pickling."""
+        buffer = io.BytesIO()
+        np.savez(buffer, **self.state.to_arrays())
+        buffer.seek(0)
+        with np.load(buffer, allow_pickle=False) as data:
+            restored = FleetState.from_arrays({key: data[key] for key in data.files})
+        
+        assert restored.to_prosumers() == self.prosumers
+    
+    def test_vectorized_flexibility_matches_models(self):
+        """Test fleet-wide flexibility and participation against Prosumer methods."""
+        charge, discharge = self.state.available_flexibility_kw()
+        scores = self.state.participation_scores(price_per_mwh=150.0)
+        
+        for i, prosumer in enumerate(self.prosumers):
+            flexibility = prosumer.get_available_flexibility_kw()
+            evaluation = prosumer.evaluate_market_opportunity(price_per_mwh=150.0)
+            assert charge[i] == flexibility["charge"]
+            assert discharge[i] == flexibility["discharge"]
+            assert scores[i] == evaluation["participation_score"]
+    
+    def test_vectorized_charge_discharge_matches_models(self):
+        """Test fleet-wide charge/discharge updates SOC like the scalar models."""
+        power = np.linspace(-1.0, 12.0, len(self.prosumers))
+        
+        charged = self.state.bess_charge(power)
+        discharged = self.state.bess_discharge(power[::-1])
+        ev_charged = self.state.ev_charge(power)
+        
+        for i, prosumer in enumerate(self.prosumers):
+            expected = [0.0, 0.0, 0.0]
+            if prosumer.bess:
+                expected[0] = prosumer.bess.charge(power[i])
+                expected[1] = prosumer.bess.discharge(power[::-1][i])
+                assert self.state.columns["bess_current_soc_percent"][i] == prosumer.bess.current_soc_percent
+            if prosumer.ev:
+                expected[2] = prosumer.ev.charge(power[i])
+                assert self.state.columns["ev_current_soc_percent"][i] == prosumer.ev.current_soc_percent
+            assert [charged[i], discharged[i], ev_charged[i]] == expected
+    
+    def test_step_matches_models(self):
+        """Test one interval of load, solar and dispatch against the scalar asset models."""
+        load = np.linspace(0.5, 4.0, len(self.prosumers))
+        dispatch = np.where(np.arange(len(self.prosumers)) % 4 == 0, 3.0, 0.0)
+        plugged = np.arange(len(self.prosumers)) % 2 == 0
+        result = self.state.step(load, 0.6, dispatch_kw=dispatch, ev_plugged_in=plugged, ev_driving_kw=2.0)
+
+        for i, prosumer in enumerate(self.prosumers):
+            solar = prosumer.solar.get_generation_kw(0.6) if prosumer.solar else 0.0
+            assert result["solar_kw"][i] == solar
+            if prosumer.bess:
+                battery_kw = dispatch[i] + load[i] - solar
+                if battery_kw > 0:
+                    assert result["bess_discharged_kwh"][i] == pytest.approx(prosumer.bess.discharge(battery_kw))
+                else:
+                    assert result["bess_charged_kwh"][i] == pytest.approx(prosumer.bess.charge(-battery_kw))
+                assert self.state.columns["bess_current_soc_percent"][i] == pytest.approx(prosumer.bess.current_soc_percent)
+            if prosumer.ev:
+                prosumer.ev.is_plugged_in = bool(plugged[i])
+                if plugged[i] and prosumer.ev.get_charging_requirement_kwh() > 0:
+                    assert result["ev_charged_kwh"][i] == prosumer.ev.charge(prosumer.ev.max_charge_power_kw)
+                elif not plugged[i]:
+                    assert result["ev_driven_kwh"][i] == pytest.approx(0.5)
+                assert self.state.columns["ev_is_plugged_in"][i] == plugged[i]
+
+        # Grid exchange closes the household energy balance
+        c = self.state.columns
+        balance = (load - result["solar_kw"] - result["bess_discharged_kwh"] / 0.25
+                   + result["bess_charged_kwh"] / (0.25 * c["bess_charge_efficiency"])
+                   + result["ev_charged_kwh"] / (0.25 * c["ev_charge_efficiency"]))
+        np.testing.assert_allclose(result["grid_kw"], balance)
+
+    def test_prosumer_views(self):
+        """Test that views read and write through to the columnar state."""
+        view = self.state[0]
+        assert isinstance(view, ProsumerView)
+        assert view.prosumer_id == "prosumer_000"
+        assert view.get_available_flexibility_kw() == self.prosumers[0].get_available_flexibility_kw()
+        assert view.get_status_summary() == self.prosumers[0].get_status_summary()
+        assert self.state[1].bess is None
+        
+        # Mutating through a view updates the arrays
+        view.bess.charge(power_kw=2.0)
+        self.prosumers[0].bess.charge(power_kw=2.0)
+        assert self.state.columns["bess_current_soc_percent"][0] == self.prosumers[0].bess.current_soc_percent
+        assert self.state.index_of("prosumer_007") == 7
+
+    def test_snapshot_copy_on_write(self):
+        """Test that snapshots change independently and leave the base untouched until commit."""
+        base_soc = self.state.columns["bess_current_soc_percent"].copy()
+        first = self.state.snapshot()
+        second = self.state.snapshot()
+        assert first.nbytes() == 0
+
+        # Writes through views go to the snapshot only
+        first[0].bess.discharge(power_kw=3.0)
+        self.prosumers[0].bess.discharge(power_kw=3.0)
+        assert first[0].bess.current_soc_percent == self.prosumers[0].bess.current_soc_percent
+        assert second[0].bess.current_soc_percent == base_soc[0]
+        np.testing.assert_array_equal(self.state.columns["bess_current_soc_percent"], base_soc)
+
+        # Vectorized operations copy only the columns they touch
+        second.bess_charge(np.full(len(self.prosumers), 2.0))
+        assert second.columns["bess_current_soc_percent"][2] > base_soc[2]
+        assert "ev_current_soc_percent" not in second._owned
+        np.testing.assert_array_equal(first.columns["bess_current_soc_percent"][1:], base_soc[1:])
+        np.testing.assert_array_equal(first.changed_indices(), [0])
+
+        # Committing writes the changed rows back
+        np.testing.assert_array_equal(first.commit(), [0])
+        assert self.state.columns["bess_current_soc_percent"][0] == self.prosumers[0].bess.current_soc_percent
+        np.testing.assert_array_equal(self.state.columns["bess_current_soc_percent"][1:], base_soc[1:])
+        assert len(first.changed_indices()) == 0
+
+
 class TestLLMParser:
     """Test LLM Parser functionality."""
     
@@ -379,6 +586,30 @@ class TestLLMParser:
         except ValueError:
             pytest.skip("Gemini API key not available - skipping LLM parser tests")
     
+    def test_batch_parse_through_gateway(self):
+        """Test batch parsing sends prompts concurrently and falls back per failed call."""
+        from llm_gateway import LLMGateway, StubBackend
+        
+        def responder(prompt):
+            if "broken" in prompt:
+                raise RuntimeError("backend error")
+            return self.mock_response.text
+        
+        backend = StubBackend(latency_seconds=0.01, responder=responder)
+        parser = LLMProsumerParser(gateway=LLMGateway(backend, max_concurrency=4, max_retries=1,
+                                                      backoff_base_seconds=0.0))
+        descriptions = ["A tech-savvy user with a 15kWh battery and an EV"] * 3 + \
+                       [f"Household {i} with solar" for i in range(5)] + ["broken description"]
+        configs = parser.batch_parse(descriptions)
+        
+        assert len(configs) == len(descriptions)
+        assert all(config["bess_capacity_kwh"] == 15.0 and config["has_ev"] for config in configs[:-1])
+        assert configs[-1] == parser._get_default_config()
+        assert 1 < backend.max_in_flight <= 4
+        # Identical descriptions share one call; the failing one is retried once
+        assert parser.gateway.stats.coalesced == 2
+        assert backend.calls == 6 + 2
+    
     def test_default_config(self):
         """Test default configuration generation."""
         try:
@@ -9,8 +9,9 @@ negotiation graph workflow.
 import os
 import sys
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union
 from langgraph.graph import StateGraph, END
+from langgraph.constants import Send
 from langgraph.prebuilt import ToolExecutor
 from langchain_core.messages import HumanMessage, AIMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -31,6 +32,7 @@ from schemas import (
     AgentState, MarketOpportunity, ProsumerBid, AggregatorOffer, 
     ProsumerResponse, CoalitionMember, NegotiationSummary
 )
+from telemetry import DEBUG, EventStream, get_event_stream
 
 
 class VPPAgentFramework:
@@ -42,13 +44,26 @@ class VPPAgentFramework:
     AggregatorAgent and ProsumerAgents.
     """
     
-    def __init__(self, api_key: Optional[str] = None, data_path: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        data_path: Optional[str] = None,
+        shard_size: int = 25,
+        max_concurrency: Optional[int] = None,
+        events: Optional[EventStream] = None
+    ):
         """
         Initialize the VPP agent framework.
         
         Args:
             api_key: Gemini API key (loads from .env if not provided)
             data_path: Path to Module 1 data directory (uses default if not provided)
+            shard_size: Prosumers per parallel bid/response node (1 = one node per
+                prosumer, best when each prosumer decision is an LLM call)
+            max_concurrency: Maximum prosumer nodes running at once (None =
+                LangGraph's default thread pool)
+            events: Event stream for negotiation progress (default: the
+                process-wide stream from telemetry.get_event_stream)
         """
         # Load environment variables
         load_dotenv()
@@ -74,6 +89,13 @@ class VPPAgentFramework:
         # Initialize prosumer fleet (will be populated when needed)
         self.prosumer_fleet: Dict[str, Prosumer] = {}
         
+        # Prosumer-side fan-out
+        self.shard_size = max(1, shard_size)
+        self.max_concurrency = max_concurrency
+        
+        # Progress events (silent unless someone subscribes or echo is on)
+        self.events = events if events is not None else get_event_stream()
+        
         # Initialize fleet generator with data path
         if data_path:
             self.fleet_generator = FleetGenerator(data_path=data_path)
@@ -98,6 +120,11 @@ class VPPAgentFramework:
         2. Prosumers submit initial bids
         3. Multi-round negotiation process
         4. Coalition formation and bid optimization
+        
+        Prosumer work fans out: each round sends shards of prosumers (or of
+        offers) to parallel prosumer nodes with LangGraph's Send API, and a
+        collect node merges their results back into AgentState, so a round
+        takes as long as its slowest shard.
         """
         
         # Create the state graph
@@ -105,9 +132,11 @@ class VPPAgentFramework:
         
         # Add agent nodes
         workflow.add_node("announce_opportunity", self._announce_opportunity)
+        workflow.add_node("prosumer_bid_agents", self._prosumer_bid_shard)
         workflow.add_node("collect_initial_bids", self._collect_initial_bids)
         workflow.add_node("evaluate_bids", self._evaluate_bids)
         workflow.add_node("make_counter_offers", self._make_counter_offers)
+        workflow.add_node("prosumer_response_agents", self._prosumer_response_shard)
         workflow.add_node("collect_responses", self._collect_responses)
         workflow.add_node("form_coalition", self._form_coalition)
         workflow.add_node("finalize_negotiation", self._finalize_negotiation)
@@ -115,7 +144,11 @@ class VPPAgentFramework:
         # Define workflow edges
         workflow.set_entry_point("announce_opportunity")
         
-        workflow.add_edge("announce_opportunity", "collect_initial_bids")
+        # Fan out to the prosumer nodes, then merge
+        workflow.add_conditional_edges(
+            "announce_opportunity", self._fan_out_bids, ["prosumer_bid_agents", "collect_initial_bids"]
+        )
+        workflow.add_edge("prosumer_bid_agents", "collect_initial_bids")
         workflow.add_edge("collect_initial_bids", "evaluate_bids")
         
         # Add conditional edge for negotiation rounds
@@ -128,7 +161,10 @@ class VPPAgentFramework:
             }
         )
         
-        workflow.add_edge("make_counter_offers", "collect_responses")
+        workflow.add_conditional_edges(
+            "make_counter_offers", self._fan_out_responses, ["prosumer_response_agents", "collect_responses"]
+        )
+        workflow.add_edge("prosumer_response_agents", "collect_responses")
         workflow.add_edge("collect_responses", "evaluate_bids")
         workflow.add_edge("form_coalition", "finalize_negotiation")
         workflow.add_edge("finalize_negotiation", END)
@@ -151,7 +187,8 @@ class VPPAgentFramework:
             for i, prosumer in enumerate(prosumers)
         }
         
-        print(f"Initialized fleet of {len(self.prosumer_fleet)} prosumers")
+        self.events.info("fleet_initialized", "Initialized fleet of {fleet_size} prosumers",
+                         fleet_size=len(self.prosumer_fleet))
     
     def create_market_opportunity(
         self, 
@@ -188,8 +225,6 @@ class VPPAgentFramework:
         """
         Aggregator announces market opportunity to all prosumers.
         """
-        print(f"🏢 AggregatorAgent: Announcing market opportunity {state.current_opportunity.opportunity_id}")
-        
         # Initialize available prosumers
         state.available_prosumers = list(self.prosumer_fleet.keys())
         
@@ -210,33 +245,67 @@ class VPPAgentFramework:
         state.current_round = 1
         state.total_capacity_target_mw = state.current_opportunity.required_capacity_mw
         
-        print(f"   📢 Opportunity: {state.current_opportunity.market_type.upper()} market")
-        print(f"   📊 Required: {state.current_opportunity.required_capacity_mw:.1f} MW")
-        print(f"   💰 Price: ${state.current_opportunity.market_price_mwh:.2f}/MWh")
-        print(f"   ⏰ Duration: {state.current_opportunity.duration_hours:.1f} hours")
-        print(f"   👥 Prosumers contacted: {len(state.available_prosumers)}")
+        opportunity = state.current_opportunity
+        self.events.info(
+            "opportunity_announced",
+            "🏢 AggregatorAgent: Announcing market opportunity {opportunity_id}\n"
+            "   📢 Opportunity: {market_type} market\n"
+            "   📊 Required: {required_mw:.1f} MW\n"
+            "   💰 Price: ${price:.2f}/MWh\n"
+            "   ⏰ Duration: {duration_hours:.1f} hours\n"
+            "   👥 Prosumers contacted: {prosumers}",
+            opportunity_id=opportunity.opportunity_id, market_type=opportunity.market_type.upper(),
+            required_mw=opportunity.required_capacity_mw, price=opportunity.market_price_mwh,
+            duration_hours=opportunity.duration_hours, prosumers=len(state.available_prosumers)
+        )
         
         return state
     
+    def _shards(self, items: List[Any]) -> List[List[Any]]:
+        """Split items into shards of shard_size."""
+        return [items[i:i + self.shard_size] for i in range(0, len(items), self.shard_size)]
+    
+    def _fan_out_bids(self, state: AgentState) -> Union[List[Send], str]:
+        """
+        Send each shard of prosumers to a parallel bid node.
+        """
+        shards = self._shards(state.available_prosumers)
+        if not shards:
+            return "collect_initial_bids"
+        return [
+            Send("prosumer_bid_agents", {"prosumer_ids": shard, "opportunity": state.current_opportunity})
+            for shard in shards
+        ]
+    
+    def _prosumer_bid_shard(self, shard: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Prosumer node: bid decisions for one shard of prosumers.
+        """
+        return {"bid_results": {
+            prosumer_id: self._simulate_prosumer_bid(
+                prosumer_id, self.prosumer_fleet[prosumer_id], shard["opportunity"]
+            )
+            for prosumer_id in shard["prosumer_ids"]
+        }}
+    
     def _collect_initial_bids(self, state: AgentState) -> AgentState:
         """
-        Collect initial bids from all prosumers.
+        Collect initial bids from all prosumers (merges the prosumer nodes' bids).
         """
-        print(f"📥 Collecting initial bids from {len(state.available_prosumers)} prosumers...")
-        
         initial_bids = []
+        trace = self.events.enabled(DEBUG)
         
         for prosumer_id in state.available_prosumers:
-            prosumer = self.prosumer_fleet[prosumer_id]
-            
-            # Simulate prosumer bid decision
-            bid = self._simulate_prosumer_bid(prosumer_id, prosumer, state.current_opportunity)
+            bid = state.bid_results.get(prosumer_id)
             
-            if bid.is_available and bid.available_capacity_kw > 0:
+            if bid is not None and bid.is_available and bid.available_capacity_kw > 0:
                 initial_bids.append(bid)
-                print(f"   ✅ {prosumer_id}: {bid.available_capacity_kw:.1f} kW @ ${bid.minimum_price_per_mwh:.2f}/MWh")
-            else:
-                print(f"   ❌ {prosumer_id}: Not available")
+                if trace:
+                    self.events.debug("bid_received", "   ✅ {prosumer_id}: {capacity_kw:.1f} kW @ ${price:.2f}/MWh",
+                                      prosumer_id=prosumer_id, capacity_kw=bid.available_capacity_kw,
+                                      price=bid.minimum_price_per_mwh)
+            elif trace:
+                self.events.debug("bid_declined", "   ❌ {prosumer_id}: Not available", prosumer_id=prosumer_id)
         
         state.initial_bids = initial_bids
         
@@ -244,11 +313,17 @@ class VPPAgentFramework:
         total_offered_kw = sum(bid.available_capacity_kw for bid in initial_bids)
         total_offered_mw = total_offered_kw / 1000
         
-        print(f"📊 Initial bidding results:")
-        print(f"   Bids received: {len(initial_bids)}")
-        print(f"   Total capacity: {total_offered_mw:.2f} MW")
-        print(f"   Target capacity: {state.total_capacity_target_mw:.2f} MW")
-        print(f"   Coverage: {(total_offered_mw/state.total_capacity_target_mw)*100:.1f}%")
+        self.events.info(
+            "initial_bids_collected",
+            "📊 Initial bidding results from {prosumers} prosumers:\n"
+            "   Bids received: {bids}\n"
+            "   Total capacity: {offered_mw:.2f} MW\n"
+            "   Target capacity: {target_mw:.2f} MW\n"
+            "   Coverage: {coverage_percent:.1f}%",
+            prosumers=len(state.available_prosumers), bids=len(initial_bids), offered_mw=total_offered_mw,
+            target_mw=state.total_capacity_target_mw,
+            coverage_percent=(total_offered_mw / state.total_capacity_target_mw) * 100
+        )
         
         return state
     
@@ -324,8 +399,6 @@ class VPPAgentFramework:
         """
         Aggregator evaluates received bids and determines next action.
         """
-        print(f"🧮 AggregatorAgent: Evaluating bids in round {state.current_round}")
-        
         # Sort bids by price (most competitive first)
         sorted_bids = sorted(state.initial_bids, key=lambda x: x.minimum_price_per_mwh)
         
@@ -338,11 +411,18 @@ class VPPAgentFramework:
         
         state.current_capacity_secured_mw = total_capacity_kw / 1000
         
-        print(f"   📈 Capacity analysis:")
-        print(f"      Available: {state.current_capacity_secured_mw:.2f} MW")
-        print(f"      Target: {state.total_capacity_target_mw:.2f} MW")
-        print(f"      Average price: ${avg_price:.2f}/MWh")
-        print(f"      Market price: ${state.current_opportunity.market_price_mwh:.2f}/MWh")
+        self.events.info(
+            "bids_evaluated",
+            "🧮 AggregatorAgent: Evaluating bids in round {round}\n"
+            "   📈 Capacity analysis:\n"
+            "      Available: {available_mw:.2f} MW\n"
+            "      Target: {target_mw:.2f} MW\n"
+            "      Average price: ${average_price:.2f}/MWh\n"
+            "      Market price: ${market_price:.2f}/MWh",
+            round=state.current_round, available_mw=state.current_capacity_secured_mw,
+            target_mw=state.total_capacity_target_mw, average_price=avg_price,
+            market_price=state.current_opportunity.market_price_mwh
+        )
         
         return state
     
@@ -359,13 +439,16 @@ class VPPAgentFramework:
         
         # Simple decision logic (will be enhanced with LLM reasoning in Module 4)
         if capacity_ratio >= 0.9 and state.current_round >= 2:
-            print(f"✅ Sufficient capacity secured ({capacity_ratio:.1%}), forming coalition")
+            self.events.info("negotiation_decision", "✅ Sufficient capacity secured ({capacity_ratio:.1%}), forming coalition",
+                             decision="form_coalition", capacity_ratio=capacity_ratio)
             return "form_coalition"
         elif within_round_limit and capacity_ratio < 1.2:
-            print(f"🔄 Continue negotiation (Round {state.current_round + 1})")
+            self.events.info("negotiation_decision", "🔄 Continue negotiation (Round {next_round})",
+                             decision="make_offers", capacity_ratio=capacity_ratio, next_round=state.current_round + 1)
             return "make_offers"
         else:
-            print(f"⏰ Max rounds reached or excess capacity, forming coalition")
+            self.events.info("negotiation_decision", "⏰ Max rounds reached or excess capacity, forming coalition",
+                             decision="form_coalition", capacity_ratio=capacity_ratio)
             return "form_coalition"
     
     def _make_counter_offers(self, state: AgentState) -> AgentState:
@@ -373,7 +456,6 @@ class VPPAgentFramework:
         Aggregator makes counter-offers to selected prosumers.
         """
         state.current_round += 1
-        print(f"💬 AggregatorAgent: Making counter-offers in round {state.current_round}")
         
         # For this module, we'll simulate counter-offers
         # In Module 4, this will use actual LLM reasoning
@@ -396,63 +478,107 @@ class VPPAgentFramework:
                 competing_offers=len(competitive_bids)
             )
             counter_offers.append(offer)
-            print(f"   💰 Offer to {bid.prosumer_id}: ${offer.offered_price_per_mwh:.2f}/MWh")
+            self.events.debug("offer_made", "   💰 Offer to {prosumer_id}: ${price:.2f}/MWh",
+                              prosumer_id=bid.prosumer_id, price=offer.offered_price_per_mwh)
         
-        state.aggregator_offers.extend(counter_offers)
+        self.events.info("counter_offers_made", "💬 AggregatorAgent: Made {offers} counter-offers in round {round}",
+                         offers=len(counter_offers), round=state.current_round)
+        state.add_offers(counter_offers)
         return state
     
+    def _fan_out_responses(self, state: AgentState) -> Union[List[Send], str]:
+        """
+        Send each shard of this round's (offer, prosumer) pairs to a parallel response node.
+        """
+        pairs = [
+            (offer, prosumer_id)
+            for offer in state.offers_for_round(state.current_round)
+            for prosumer_id in offer.target_prosumer_ids
+        ]
+        shards = self._shards(pairs)
+        if not shards:
+            return "collect_responses"
+        return [
+            Send("prosumer_response_agents", {"pairs": shard, "opportunity": state.current_opportunity})
+            for shard in shards
+        ]
+    
+    def _prosumer_response_shard(self, shard: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Prosumer node: responses to counter-offers for one shard of prosumers.
+        """
+        return {"response_results": {
+            f"{offer.offer_id}:{prosumer_id}": self._simulate_prosumer_response(
+                prosumer_id, self.prosumer_fleet[prosumer_id], offer, shard["opportunity"]
+            )
+            for offer, prosumer_id in shard["pairs"]
+        }}
+    
+    def _simulate_prosumer_response(
+        self,
+        prosumer_id: str,
+        prosumer: Prosumer,
+        offer: AggregatorOffer,
+        opportunity: MarketOpportunity
+    ) -> ProsumerResponse:
+        """
+        Simulate a prosumer's response to a counter-offer.
+        """
+        # Simplified response logic (will be LLM-powered in Module 4)
+        accepts_offer = (offer.offered_price_per_mwh >= 
+                       opportunity.market_price_mwh * 0.85 and
+                       prosumer.participation_willingness > 0.4)
+        
+        return ProsumerResponse(
+            response_id=f"resp_{offer.offer_id}",
+            offer_id=offer.offer_id,
+            prosumer_id=prosumer_id,
+            is_accepted=accepts_offer,
+            response_timestamp=datetime.now()
+        )
+    
     def _collect_responses(self, state: AgentState) -> AgentState:
         """
-        Collect responses from prosumers to counter-offers.
+        Collect responses from prosumers to counter-offers (merges the prosumer nodes' responses).
         """
-        print(f"📩 Collecting responses to counter-offers...")
-        
         responses = []
-        
-        # Simulate prosumer responses to counter-offers
-        for offer in state.aggregator_offers:
-            if offer.round_number == state.current_round:
-                for prosumer_id in offer.target_prosumer_ids:
-                    prosumer = self.prosumer_fleet[prosumer_id]
-                    
-                    # Simplified response logic (will be LLM-powered in Module 4)
-                    accepts_offer = (offer.offered_price_per_mwh >= 
-                                   state.current_opportunity.market_price_mwh * 0.85 and
-                                   prosumer.participation_willingness > 0.4)
-                    
-                    response = ProsumerResponse(
-                        response_id=f"resp_{offer.offer_id}",
-                        offer_id=offer.offer_id,
-                        prosumer_id=prosumer_id,
-                        is_accepted=accepts_offer,
-                        response_timestamp=datetime.now()
-                    )
-                    
-                    responses.append(response)
-                    
-                    status = "✅ Accepted" if accepts_offer else "❌ Declined"
-                    print(f"   {status}: {prosumer_id}")
-        
-        state.prosumer_responses.extend(responses)
+        trace = self.events.enabled(DEBUG)
+        
+        # Responses to this round's counter-offers, in offer order
+        for offer in state.offers_for_round(state.current_round):
+            for prosumer_id in offer.target_prosumer_ids:
+                response = state.response_results.get(f"{offer.offer_id}:{prosumer_id}")
+                if response is None:
+                    continue
+                
+                responses.append(response)
+                
+                if trace:
+                    self.events.debug("response_received", "   {status}: {prosumer_id}",
+                                      status="✅ Accepted" if response.is_accepted else "❌ Declined",
+                                      prosumer_id=prosumer_id, accepted=response.is_accepted)
+        
+        self.events.info("responses_collected", "📩 Collected {responses} responses to counter-offers ({accepted} accepted)",
+                         responses=len(responses), accepted=sum(r.is_accepted for r in responses))
+        state.add_responses(responses)
         return state
     
     def _form_coalition(self, state: AgentState) -> AgentState:
         """
         Form final coalition from committed prosumers.
         """
-        print(f"🤝 Forming final coalition...")
-        
         coalition_members = []
         
         # Collect accepted responses
-        accepted_responses = [r for r in state.prosumer_responses if r.is_accepted]
+        accepted_responses = state.accepted_responses()
+        accepted_prosumer_ids = state.accepted_prosumer_ids()
         
         # Also include initial bids that meet criteria
         for bid in state.initial_bids:
             prosumer_id = bid.prosumer_id
             
             # Check if prosumer hasn't already responded to counter-offer
-            has_response = any(r.prosumer_id == prosumer_id for r in accepted_responses)
+            has_response = prosumer_id in accepted_prosumer_ids
             
             # Include if price is acceptable and no counter-offer was made
             if (not has_response and 
@@ -472,7 +598,9 @@ class VPPAgentFramework:
         # Add members from accepted counter-offers
         for response in accepted_responses:
             # Find the corresponding offer
-            offer = next(o for o in state.aggregator_offers if o.offer_id == response.offer_id)
+            offer = state.offer_by_id(response.offer_id)
+            if offer is None:
+                continue
             
             member = CoalitionMember(
                 prosumer_id=response.prosumer_id,
@@ -491,10 +619,16 @@ class VPPAgentFramework:
         total_committed_kw = sum(m.committed_capacity_kw for m in coalition_members)
         state.current_capacity_secured_mw = total_committed_kw / 1000
         
-        print(f"✅ Coalition formed:")
-        print(f"   Members: {len(coalition_members)}")
-        print(f"   Total capacity: {state.current_capacity_secured_mw:.2f} MW")
-        print(f"   Average price: ${sum(m.agreed_price_per_mwh for m in coalition_members) / len(coalition_members):.2f}/MWh")
+        self.events.info(
+            "coalition_formed",
+            "🤝 Coalition formed:\n"
+            "   Members: {members}\n"
+            "   Total capacity: {capacity_mw:.2f} MW\n"
+            "   Average price: ${average_price:.2f}/MWh",
+            members=len(coalition_members), capacity_mw=state.current_capacity_secured_mw,
+            average_price=(sum(m.agreed_price_per_mwh for m in coalition_members) / len(coalition_members)
+                           if coalition_members else 0.0)
+        )
         
         return state
     
@@ -515,8 +649,6 @@ class VPPAgentFramework:
         """
         Finalize negotiation and prepare summary.
         """
-        print(f"🏁 Finalizing negotiation...")
-        
         # Calculate negotiation metrics
         negotiation_duration = (datetime.now() - state.negotiation_start_time).total_seconds()
         
@@ -545,12 +677,19 @@ class VPPAgentFramework:
         state.negotiation_summary = summary
         state.success = state.current_capacity_secured_mw >= state.total_capacity_target_mw * 0.8
         
-        print(f"📋 Negotiation Summary:")
-        print(f"   Success: {'✅ Yes' if state.success else '❌ No'}")
-        print(f"   Duration: {negotiation_duration:.1f} seconds")
-        print(f"   Capacity secured: {state.current_capacity_secured_mw:.2f} MW ({summary.capacity_utilization_percent:.1f}%)")
-        print(f"   Coalition size: {summary.final_coalition_size} prosumers")
-        print(f"   Average price: ${summary.average_price_per_mwh:.2f}/MWh")
+        self.events.info(
+            "negotiation_finalized",
+            "📋 Negotiation Summary:\n"
+            "   Success: {success_mark}\n"
+            "   Duration: {duration_seconds:.1f} seconds\n"
+            "   Capacity secured: {capacity_mw:.2f} MW ({utilization_percent:.1f}%)\n"
+            "   Coalition size: {coalition_size} prosumers\n"
+            "   Average price: ${average_price:.2f}/MWh",
+            success=state.success, success_mark="✅ Yes" if state.success else "❌ No",
+            duration_seconds=negotiation_duration, capacity_mw=state.current_capacity_secured_mw,
+            utilization_percent=summary.capacity_utilization_percent,
+            coalition_size=summary.final_coalition_size, average_price=summary.average_price_per_mwh
+        )
         
         return state
     
@@ -587,8 +726,8 @@ class VPPAgentFramework:
                 max_rounds=3
             )
         except Exception as e:
-            print(f"⚠️  Direct AgentState initialization failed: {e}")
-            print("🔄 Attempting with dictionary conversion...")
+            self.events.warning("state_init_retry", "⚠️  Direct AgentState initialization failed: {error}; "
+                                "attempting with dictionary conversion", error=str(e))
             
             # Fallback: convert to dict and recreate
             try:
@@ -606,23 +745,23 @@ class VPPAgentFramework:
                     current_opportunity=fresh_opportunity,
                     max_rounds=3
                 )
-                print("✅ AgentState initialized with schema refresh")
                 
             except Exception as e2:
-                print(f"❌ Schema refresh also failed: {e2}")
+                self.events.warning("state_init_fallback", "❌ Schema refresh also failed: {error}; "
+                                    "using manual assignment fallback", error=str(e2))
                 # Last resort: initialize without opportunity and set it manually
                 initial_state = AgentState(max_rounds=3)
                 initial_state.current_opportunity = market_opportunity
-                print("⚠️  Using manual assignment fallback")
         
-        print(f"🚀 Starting VPP negotiation for opportunity {market_opportunity.opportunity_id}")
-        print("=" * 80)
+        self.events.info("negotiation_started", "🚀 Starting VPP negotiation for opportunity {opportunity_id}",
+                         opportunity_id=market_opportunity.opportunity_id, fleet_size=fleet_size)
         
         # Run the workflow
-        final_state = self.workflow.invoke(initial_state)
+        config = {"max_concurrency": self.max_concurrency} if self.max_concurrency else None
+        final_state = self.workflow.invoke(initial_state, config=config)
         
-        print("=" * 80)
-        print(f"🎯 Negotiation complete!")
+        self.events.info("negotiation_complete", "🎯 Negotiation complete!",
+                         opportunity_id=market_opportunity.opportunity_id)
         
         return final_state
 
@@ -634,8 +773,8 @@ def main():
     print("==============================")
     
     try:
-        # Initialize framework
-        framework = VPPAgentFramework()
+        # Initialize framework, printing progress as it negotiates
+        framework = VPPAgentFramework(events=EventStream(echo=True))
         
         # Create a test market opportunity
         opportunity = framework.create_market_opportunity(
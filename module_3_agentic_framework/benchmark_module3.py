@@ -0,0 +1,130 @@
+"""
+Benchmark script for Module 3: LLM Gateway Throughput
+Sends prompts through the gateway to a local stub backend (no network) and
+compares one-at-a-time calls with concurrent batches and with replaying
+responses from the persistent cache. Also times the AgentState lookups used in
+coalition formation (indexed vs scanning the lists).
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from llm_cache import LLMResponseCache
+from llm_gateway import LLMGateway, StubBackend
+from schemas import AgentState, AggregatorOffer, ProsumerBid, ProsumerResponse
+
+
+def run_batch(prompts, latency: float, concurrency: int, requests_per_second=None):
+    """Send all prompts in one batch; return seconds elapsed and the gateway."""
+    gateway = LLMGateway(StubBackend(latency_seconds=latency), max_concurrency=concurrency,
+                         requests_per_second=requests_per_second)
+    start = time.perf_counter()
+    gateway.generate_many_sync(prompts)
+    return time.perf_counter() - start, gateway
+
+
+def make_state(fleet_size: int, rounds: int = 3) -> AgentState:
+    """AgentState with one bid per prosumer and an offer and response per prosumer per round."""
+    state = AgentState()
+    state.initial_bids = [ProsumerBid(prosumer_id=f"p{i}", opportunity_id="opp", is_available=True,
+                                      minimum_price_per_mwh=50.0) for i in range(fleet_size)]
+    for round_number in range(2, rounds + 2):
+        offers = [AggregatorOffer(offer_id=f"offer_{round_number}_p{i}", opportunity_id="opp",
+                                  target_prosumer_ids=[f"p{i}"], offered_price_per_mwh=50.0,
+                                  requested_capacity_kw=5.0, round_number=round_number,
+                                  total_rounds_planned=rounds + 1, competing_offers=fleet_size)
+                  for i in range(fleet_size)]
+        state.add_offers(offers)
+        state.add_responses([ProsumerResponse(response_id=f"resp_{o.offer_id}", offer_id=o.offer_id,
+                                              prosumer_id=o.target_prosumer_ids[0], is_accepted=i % 2 == 0)
+                             for i, o in enumerate(offers)])
+    return state
+
+
+def coalition_lookups_scan(state: AgentState) -> int:
+    """Coalition-formation lookups by scanning the lists (previous implementation)."""
+    accepted = [r for r in state.prosumer_responses if r.is_accepted]
+    found = sum(any(r.prosumer_id == bid.prosumer_id for r in accepted) for bid in state.initial_bids)
+    for response in accepted:
+        next(o for o in state.aggregator_offers if o.offer_id == response.offer_id)
+    return found
+
+
+def coalition_lookups_indexed(state: AgentState) -> int:
+    """The same lookups through the AgentState indexes."""
+    accepted_ids = state.accepted_prosumer_ids()
+    found = sum(bid.prosumer_id in accepted_ids for bid in state.initial_bids)
+    for response in state.accepted_responses():
+        state.offer_by_id(response.offer_id)
+    return found
+
+
+def main():
+    """Run the gateway throughput benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark LLM gateway throughput against a stub backend")
+    parser.add_argument('--prompts', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.25, help="Stub response time per call (s)")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--rps', type=float, default=None, help="Optional rate limit (requests/s)")
+    parser.add_argument('--duplicates', type=float, default=0.0,
+                        help="Fraction of prompts repeating an earlier one (coalesced)")
+    parser.add_argument('--state-sizes', type=int, nargs='*', default=[200, 1000, 2000],
+                        help="Fleet sizes for the AgentState lookup benchmark")
+    args = parser.parse_args()
+
+    unique = max(1, int(round(args.prompts * (1.0 - args.duplicates))))
+    prompts = [f"prompt {i % unique}" for i in range(args.prompts)]
+
+    print("=" * 60)
+    print("MODULE 3 LLM GATEWAY BENCHMARK")
+    print("=" * 60)
+    print(f"{args.prompts} prompts ({unique} unique), stub latency {args.latency * 1000:.0f} ms"
+          + (f", rate limit {args.rps:g}/s" if args.rps else ""))
+
+    # Baseline: one blocking call after another, as the call sites did before
+    sequential_gateway = LLMGateway(StubBackend(latency_seconds=args.latency), max_concurrency=1)
+    start = time.perf_counter()
+    for prompt in prompts:
+        sequential_gateway.generate_sync(prompt)
+    sequential = time.perf_counter() - start
+    print(f"Sequential calls:     {sequential:7.2f}s, {args.prompts / sequential:8.1f} prompts/s")
+
+    for concurrency in args.concurrency:
+        elapsed, gateway = run_batch(prompts, args.latency, concurrency, args.rps)
+        stats = gateway.stats
+        print(f"Batch, concurrency {concurrency:3d}: {elapsed:7.2f}s, {args.prompts / elapsed:8.1f} prompts/s, "
+              f"{sequential / elapsed:6.1f}x, {stats.backend_calls} backend calls, {stats.coalesced} coalesced")
+
+    # Rerun against a filled cache in replay mode (no backend calls)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "llm_cache.sqlite"
+        fill = LLMGateway(StubBackend(latency_seconds=args.latency), max_concurrency=max(args.concurrency),
+                          cache=LLMResponseCache(path))
+        fill.generate_many_sync(prompts)
+        fill.cache.close()
+
+        replay = LLMGateway(StubBackend(latency_seconds=args.latency), cache=LLMResponseCache(path, mode="replay"))
+        start = time.perf_counter()
+        replay.generate_many_sync(prompts)
+        elapsed = time.perf_counter() - start
+        replay.cache.close()
+        print(f"Replay from cache:    {elapsed:7.2f}s, {args.prompts / elapsed:8.1f} prompts/s, "
+              f"{sequential / elapsed:6.1f}x, {replay.stats.backend_calls} backend calls, "
+              f"{replay.stats.cache_hits} cache hits")
+
+    for fleet_size in args.state_sizes:
+        state = make_state(fleet_size)
+        start = time.perf_counter()
+        expected = coalition_lookups_scan(state)
+        scan = time.perf_counter() - start
+        start = time.perf_counter()
+        assert coalition_lookups_indexed(state) == expected
+        indexed = time.perf_counter() - start
+        print(f"Coalition lookups, {fleet_size:>5} prosumers x 3 rounds: scan {scan * 1000:9.1f} ms, "
+              f"indexed {indexed * 1000:6.1f} ms ({scan / indexed:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,10 @@ sys.path.append('/Users/reza/Documents/Code/VPP_LLM_Agent/module_3_agentic_frame
 
 from agent_framework import VPPAgentFramework
 from schemas import MarketOpportunity, MarketOpportunityType
+from telemetry import EventStream, set_event_stream
+
+# Demos narrate the negotiation: print progress events as they happen
+set_event_stream(EventStream(echo=True))
 
 
 def demo_energy_market():
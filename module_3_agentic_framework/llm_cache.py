@@ -0,0 +1,244 @@
+"""
+Persistent LLM Response Cache for VPP LLM Agent - Module 3
+
+Disk-backed store of LLM responses, keyed by a SHA-256 hash of the model,
+temperature, system prompt and user prompt. LLMGateway checks it before every
+backend call, so repeated prompts (re-parsed prosumer descriptions, reruns of
+a simulation) come back from disk in microseconds instead of from Gemini.
+
+The store is a single SQLite file in WAL mode, so several processes (e.g.
+sweep workers) can share it. Entries can expire after a TTL, and the least
+recently used entries are evicted when the cache grows past max_entries.
+
+Modes:
+- "readwrite": serve hits, store new responses (default)
+- "replay": read-only; hits are served and a miss raises LLMCacheMiss instead
+  of calling the model, so CI and reruns never touch the network
+
+The cache can also be configured from the environment (see from_env):
+VPP_LLM_CACHE_PATH, VPP_LLM_CACHE_MODE, VPP_LLM_CACHE_TTL_SECONDS and
+VPP_LLM_CACHE_MAX_ENTRIES.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+CACHE_MODES = ("readwrite", "replay")
+
+# Bump when the key layout changes so old entries are not reused
+CACHE_KEY_VERSION = 1
+
+
+class LLMCacheMiss(LookupError):
+    """Raised in replay mode when a prompt has no cached response."""
+
+
+def make_cache_key(model: str, temperature: Optional[float], system_prompt: str, prompt: str) -> str:
+    """
+    Content-addressed key for one LLM request.
+
+    Args:
+        model: Model name
+        temperature: Sampling temperature (None when unknown)
+        system_prompt: System prompt (empty when there is none)
+        prompt: User prompt
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    payload = json.dumps(
+        [CACHE_KEY_VERSION, model, temperature, system_prompt, prompt],
+        ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """Counters for an LLMResponseCache."""
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    expired: int = 0
+    evictions: int = 0
+
+
+class LLMResponseCache:
+    """SQLite-backed LLM response cache with TTL and LRU eviction."""
+
+    def __init__(
+        self,
+        path="llm_cache.sqlite",
+        mode: str = "readwrite",
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None
+    ):
+        """
+        Open (or create) the cache.
+
+        Args:
+            path: SQLite file
+            mode: "readwrite" or "replay" (read-only, misses raise LLMCacheMiss)
+            ttl_seconds: Age after which entries are ignored and removed (None = never)
+            max_entries: Keep at most this many entries, evicting the least
+                recently used (None = unbounded)
+        """
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode: {mode} (expected one of {CACHE_MODES})")
+        self.path = Path(path)
+        self.mode = mode
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+        if self.read_only:
+            if not self.path.exists():
+                raise FileNotFoundError(f"Replay cache not found: {self.path}")
+            self._conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30.0)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " model TEXT NOT NULL,"
+                " response TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_access REAL NOT NULL,"
+                " hit_count INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+            self._conn.commit()
+
+    @classmethod
+    def from_env(cls) -> Optional["LLMResponseCache"]:
+        """Cache configured by VPP_LLM_CACHE_* environment variables, or None when unset."""
+        path = os.getenv("VPP_LLM_CACHE_PATH")
+        if not path:
+            return None
+        ttl = os.getenv("VPP_LLM_CACHE_TTL_SECONDS")
+        max_entries = os.getenv("VPP_LLM_CACHE_MAX_ENTRIES")
+        return cls(
+            path,
+            mode=os.getenv("VPP_LLM_CACHE_MODE", "readwrite"),
+            ttl_seconds=float(ttl) if ttl else None,
+            max_entries=int(max_entries) if max_entries else None
+        )
+
+    @property
+    def read_only(self) -> bool:
+        """True in replay mode."""
+        return self.mode == "replay"
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a response.
+
+        Args:
+            key: Key from make_cache_key
+
+        Returns:
+            Cached response text, or None on a miss or an expired entry
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is not None and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                self.stats.expired += 1
+                if not self.read_only:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                row = None
+
+            if row is None:
+                self.stats.misses += 1
+                return None
+
+            self.stats.hits += 1
+            if not self.read_only:
+                self._conn.execute(
+                    "UPDATE responses SET last_access = ?, hit_count = hit_count + 1 WHERE key = ?", (now, key)
+                )
+                self._conn.commit()
+            return row[0]
+
+    def put(self, key: str, response: str, model: str = "") -> None:
+        """
+        Store a response (ignored in replay mode).
+
+        Args:
+            key: Key from make_cache_key
+            response: Response text
+            model: Model name, kept for inspection
+        """
+        if self.read_only:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created_at, last_access, hit_count)"
+                " VALUES (?, ?, ?, ?, ?, 0)",
+                (key, model, response, now, now)
+            )
+            self.stats.writes += 1
+            if self.max_entries is not None:
+                self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self) -> None:
+        """Delete least recently used entries beyond max_entries (lock held)."""
+        excess = len(self) - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN"
+                " (SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                (excess,)
+            )
+            self.stats.evictions += excess
+
+    def purge_expired(self) -> int:
+        """Delete every expired entry; returns the number removed."""
+        if self.read_only or self.ttl_seconds is None:
+            return 0
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            ).rowcount
+            self._conn.commit()
+        self.stats.expired += removed
+        return removed
+
+    def clear(self) -> None:
+        """Delete every entry."""
+        if self.read_only:
+            raise PermissionError("Cannot clear a replay cache")
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats_dict(self) -> Dict[str, Any]:
+        """Counters and current size as a plain dict."""
+        with self._lock:
+            entries = len(self)
+        return {**asdict(self.stats), "entries": entries}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
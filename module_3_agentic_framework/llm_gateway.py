@@ -0,0 +1,418 @@
+"""
+LLM Gateway for VPP LLM Agent - Module 3
+
+One asyncio-based entry point for every Gemini call in the project (prosumer
+parsing, optimization guidance, CVXPY code generation and dashboard analysis).
+Each call goes through:
+
+- bounded concurrency: at most max_concurrency calls in flight
+- token-bucket rate limiting: requests_per_second on average, bursts up to `burst`
+- a timeout per attempt
+- retries with jittered exponential backoff
+- request coalescing: identical prompts in flight at the same time share one call
+- an optional persistent response cache (see llm_cache.py), checked first
+
+Backends adapt the client libraries to a single `async generate(prompt) -> str`.
+StubBackend answers locally after a fixed latency, so throughput can be
+measured offline (see benchmark_module3.py).
+
+Synchronous code uses generate_sync() and generate_many_sync(); the many-prompt
+form sends all prompts concurrently and returns responses in input order.
+"""
+
+import asyncio
+import hashlib
+import inspect
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type
+
+from llm_cache import LLMCacheMiss, LLMResponseCache, make_cache_key
+from telemetry import get_profiler
+
+
+class LLMBackend:
+    """
+    Base class for LLM backends: one prompt in, response text out.
+
+    model_name and temperature identify the backend's responses in the
+    response cache.
+    """
+
+    name = "base"
+    model_name = "unknown"
+    temperature: Optional[float] = None
+
+    async def generate(self, prompt: str) -> str:
+        """Return the model's response text for a prompt."""
+        raise NotImplementedError
+
+
+class CallableBackend(LLMBackend):
+    """Blocking function prompt -> text, run in a worker thread per call."""
+
+    name = "callable"
+
+    def __init__(self, fn: Callable[[str], str], model_name: str = "callable", temperature: Optional[float] = None):
+        self.fn = fn
+        self.model_name = model_name
+        self.temperature = temperature
+
+    async def generate(self, prompt: str) -> str:
+        return await asyncio.to_thread(self.fn, prompt)
+
+
+class GeminiBackend(LLMBackend):
+    """google.generativeai GenerativeModel (native async when available)."""
+
+    name = "gemini"
+
+    def __init__(self, model, temperature: Optional[float] = None):
+        self.model = model
+        self.model_name = str(getattr(model, "model_name", "gemini"))
+        self.temperature = temperature
+
+    async def generate(self, prompt: str) -> str:
+        generate_async = getattr(self.model, "generate_content_async", None)
+        if inspect.iscoroutinefunction(generate_async):
+            response = await generate_async(prompt)
+        else:
+            response = await asyncio.to_thread(self.model.generate_content, prompt)
+        return response.text
+
+
+class LangChainBackend(LLMBackend):
+    """LangChain chat model such as ChatGoogleGenerativeAI (uses ainvoke)."""
+
+    name = "langchain"
+
+    def __init__(self, llm):
+        self.llm = llm
+        self.model_name = str(getattr(llm, "model", "langchain"))
+        temperature = getattr(llm, "temperature", None)
+        self.temperature = float(temperature) if isinstance(temperature, (int, float)) else None
+
+    async def generate(self, prompt: str) -> str:
+        from langchain_core.messages import HumanMessage
+
+        response = await self.llm.ainvoke([HumanMessage(content=prompt)])
+        return response.content
+
+
+class StubBackendError(RuntimeError):
+    """Synthetic failure raised by StubBackend."""
+
+
+class StubBackend(LLMBackend):
+    """
+    Local stand-in that answers after a fixed latency, with no network.
+
+    Used for offline tests and gateway throughput benchmarks.
+    """
+
+    name = "stub"
+    model_name = "stub"
+
+    def __init__(
+        self,
+        latency_seconds: float = 0.05,
+        responder: Optional[Callable[[str], str]] = None,
+        failure_rate: float = 0.0,
+        seed: int = 0
+    ):
+        """
+        Initialize the stub.
+
+        Args:
+            latency_seconds: Simulated response time per call
+            responder: Function prompt -> response text (default: a short
+                digest of the prompt)
+            failure_rate: Fraction of calls that raise StubBackendError
+            seed: Seed for the failure draws
+        """
+        self.latency_seconds = latency_seconds
+        self.responder = responder or self._digest_response
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @staticmethod
+    def _digest_response(prompt: str) -> str:
+        return f"stub response {hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:12]}"
+
+    async def generate(self, prompt: str) -> str:
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            fail = self.failure_rate > 0 and self._rng.random() < self.failure_rate
+        try:
+            await asyncio.sleep(self.latency_seconds)
+            if fail:
+                raise StubBackendError("Synthetic stub failure")
+            return self.responder(prompt)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter shared by every event loop using the gateway.
+
+    Tokens refill continuously at `rate` per second up to `capacity`; each
+    request takes one token and waits when none is left.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        """Take a token if one is available; otherwise return the seconds until one is."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return 0.0
+            return (1.0 - self._tokens) / self.rate
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        while True:
+            wait = self._take()
+            if wait <= 0.0:
+                return
+            await asyncio.sleep(wait)
+
+
+@dataclass
+class GatewayStats:
+    """Call counters for an LLMGateway."""
+    requests: int = 0
+    backend_calls: int = 0
+    coalesced: int = 0
+    retries: int = 0
+    timeouts: int = 0
+    failures: int = 0
+    cache_hits: int = 0
+    total_backend_seconds: float = 0.0
+
+
+class LLMGateway:
+    """Concurrent, rate-limited, retrying front end for an LLM backend."""
+
+    def __init__(
+        self,
+        backend: LLMBackend,
+        max_concurrency: int = 8,
+        requests_per_second: Optional[float] = None,
+        burst: Optional[int] = None,
+        timeout_seconds: Optional[float] = 60.0,
+        max_retries: int = 3,
+        backoff_base_seconds: float = 0.5,
+        backoff_max_seconds: float = 8.0,
+        retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+        seed: Optional[int] = None,
+        cache: Optional[LLMResponseCache] = None
+    ):
+        """
+        Initialize the gateway.
+
+        Args:
+            backend: Backend that performs the calls
+            max_concurrency: Maximum calls in flight at once
+            requests_per_second: Average request rate limit (None = unlimited)
+            burst: Requests allowed back to back before the rate applies
+                (defaults to requests_per_second, at least 1)
+            timeout_seconds: Timeout per attempt (None = no timeout)
+            max_retries: Retries after the first attempt
+            backoff_base_seconds: Backoff before the first retry; doubles per retry
+            backoff_max_seconds: Cap on the backoff
+            retry_on: Exception types that are retried (timeouts always are)
+            seed: Seed for the backoff jitter (kept separate from the global
+                random generators so simulations stay reproducible)
+            cache: Persistent response cache checked before calling the backend
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.retry_on = retry_on
+        self.rate_limiter = TokenBucket(requests_per_second, burst) if requests_per_second else None
+        self.cache = cache
+        self.stats = GatewayStats()
+        self._jitter = random.Random(seed)
+        # Semaphore and in-flight table per event loop (asyncio primitives are loop-bound)
+        self._loop_state = weakref.WeakKeyDictionary()
+        self._state_lock = threading.Lock()
+
+    def _state(self) -> Tuple[asyncio.Semaphore, Dict[str, asyncio.Future]]:
+        """Concurrency semaphore and in-flight requests for the running loop."""
+        loop = asyncio.get_running_loop()
+        with self._state_lock:
+            state = self._loop_state.get(loop)
+            if state is None:
+                state = self._loop_state[loop] = (asyncio.Semaphore(self.max_concurrency), {})
+            return state
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number `attempt` (1-based)."""
+        ceiling = min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** (attempt - 1))
+        return self._jitter.uniform(0.0, ceiling)
+
+    async def generate(self, prompt: str, system_prompt: str = "") -> str:
+        """
+        Send one prompt.
+
+        Args:
+            prompt: User prompt text
+            system_prompt: System prompt, sent in front of the user prompt
+
+        Returns:
+            Response text
+
+        Raises:
+            LLMCacheMiss when a replay cache has no response for the prompt;
+            otherwise the last error once all retries are used up
+        """
+        self.stats.requests += 1
+        key = system_prompt + prompt
+        if self.cache is not None:
+            key = make_cache_key(self.backend.model_name, self.backend.temperature, system_prompt, prompt)
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.stats.cache_hits += 1
+                return cached
+            if self.cache.read_only:
+                raise LLMCacheMiss(f"No cached response for request {key[:12]} in replay mode")
+
+        _, in_flight = self._state()
+        pending = in_flight.get(key)
+        if pending is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        in_flight[key] = future
+        try:
+            result = await self._call_with_retries(system_prompt + prompt)
+            if self.cache is not None:
+                self.cache.put(key, result, self.backend.model_name)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            in_flight.pop(key, None)
+
+    async def _call_with_retries(self, prompt: str) -> str:
+        """Call the backend under the concurrency and rate limits, retrying failures."""
+        semaphore, _ = self._state()
+        attempt = 0
+        while True:
+            try:
+                async with semaphore:
+                    if self.rate_limiter is not None:
+                        await self.rate_limiter.acquire()
+                    self.stats.backend_calls += 1
+                    start = time.perf_counter()
+                    try:
+                        if self.timeout_seconds is None:
+                            return await self.backend.generate(prompt)
+                        return await asyncio.wait_for(self.backend.generate(prompt), self.timeout_seconds)
+                    finally:
+                        self.stats.total_backend_seconds += time.perf_counter() - start
+            except asyncio.TimeoutError:
+                self.stats.timeouts += 1
+                if attempt >= self.max_retries:
+                    self.stats.failures += 1
+                    raise
+            except self.retry_on:
+                if attempt >= self.max_retries:
+                    self.stats.failures += 1
+                    raise
+
+            attempt += 1
+            self.stats.retries += 1
+            await asyncio.sleep(self._backoff(attempt))
+
+    async def generate_many(
+        self,
+        prompts: Sequence[str],
+        system_prompt: str = "",
+        return_exceptions: bool = False
+    ) -> List[Any]:
+        """
+        Send many prompts concurrently.
+
+        Args:
+            prompts: User prompts to send
+            system_prompt: System prompt shared by every prompt
+            return_exceptions: Put failures in the result list instead of raising
+
+        Returns:
+            Responses in the order of `prompts`
+        """
+        return await asyncio.gather(
+            *(self.generate(p, system_prompt) for p in prompts), return_exceptions=return_exceptions
+        )
+
+    def generate_sync(self, prompt: str, system_prompt: str = "") -> str:
+        """Blocking form of generate()."""
+        with get_profiler().span("llm_call"):
+            return run_sync(self.generate(prompt, system_prompt))
+
+    def generate_many_sync(
+        self,
+        prompts: Sequence[str],
+        system_prompt: str = "",
+        return_exceptions: bool = False
+    ) -> List[Any]:
+        """Blocking form of generate_many()."""
+        with get_profiler().span("llm_call"):
+            return run_sync(self.generate_many(prompts, system_prompt, return_exceptions))
+
+    def stats_dict(self) -> Dict[str, Any]:
+        """Counters as a plain dict."""
+        return asdict(self.stats)
+
+
+def run_sync(coroutine):
+    """
+    Run a coroutine to completion from synchronous code.
+
+    Uses asyncio.run when no event loop is running in this thread, and a
+    helper thread otherwise (e.g. inside Jupyter or an async framework).
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
@@ -0,0 +1,217 @@
+"""
+Offline LLM Backend for VPP LLM Agent - Module 3
+
+Deterministic local stand-in for Gemini, so the negotiation, optimization and
+simulation paths can be profiled and load-tested without network access or an
+API key. OfflineBackend recognises the project's prompts and answers each in
+the shape its caller parses:
+
+- prosumer descriptions (LLMProsumerParser): a JSON configuration built from
+  keywords and numbers in the description
+- optimization guidance (OptimizationTool): structured recommendations
+- CVXPY code generation: an executable CVXPY script for the listed coalition
+- anything else (e.g. dashboard analysis): a short numbered analysis
+
+The same prompt always gets the same response and the same synthetic latency
+(a fixed base plus a per-prompt jitter derived from the prompt hash).
+
+Set VPP_LLM_BACKEND=offline to make every default-constructed component use
+it (see offline_gateway_from_env); VPP_LLM_OFFLINE_LATENCY_SECONDS and
+VPP_LLM_OFFLINE_JITTER_SECONDS set the latency.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from llm_cache import LLMResponseCache
+from llm_gateway import LLMBackend, LLMGateway
+
+
+class OfflineBackend(LLMBackend):
+    """Deterministic, schema-aware LLM stand-in with synthetic latency."""
+
+    name = "offline"
+    model_name = "offline"
+
+    def __init__(self, latency_seconds: float = 0.0, latency_jitter_seconds: float = 0.0):
+        """
+        Initialize the offline backend.
+
+        Args:
+            latency_seconds: Base response time per call
+            latency_jitter_seconds: Extra per-prompt latency, between 0 and this
+                value, fixed for a given prompt
+        """
+        self.latency_seconds = latency_seconds
+        self.latency_jitter_seconds = latency_jitter_seconds
+        self.calls = 0
+
+    @staticmethod
+    def _unit(prompt: str, salt: str = "") -> float:
+        """Deterministic number in [0, 1) from the prompt."""
+        digest = hashlib.sha256((salt + prompt).encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+    def latency_for(self, prompt: str) -> float:
+        """Synthetic latency for a prompt (seconds)."""
+        return self.latency_seconds + self.latency_jitter_seconds * self._unit(prompt, "latency")
+
+    async def generate(self, prompt: str) -> str:
+        self.calls += 1
+        delay = self.latency_for(prompt)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self.respond(prompt)
+
+    def respond(self, prompt: str) -> str:
+        """Response text for a prompt (no latency)."""
+        if "Description:" in prompt and "bess_capacity_kwh" in prompt:
+            return json.dumps(self._prosumer_config(prompt.rsplit("Description:", 1)[1].strip()), indent=2)
+        if "CVXPY optimization script" in prompt:
+            return self._cvxpy_script(prompt)
+        if "optimization guidance" in prompt or "optimization recommendations" in prompt:
+            return self._optimization_guidance(prompt)
+        return self._analysis(prompt)
+
+    # Prosumer descriptions ------------------------------------------------
+
+    def _prosumer_config(self, description: str) -> Dict[str, Any]:
+        """Configuration JSON matching LLMProsumerParser's output format."""
+        text = description.lower()
+        u = self._unit(description)
+
+        battery_kwh = _first_number(text, [r"(\d+(?:\.\d+)?)\s*kwh"])
+        if battery_kwh is None and "powerwall" in text:
+            battery_kwh = 13.5
+        has_battery = battery_kwh is not None or "battery" in text
+
+        has_ev = bool(re.search(r"\bevs?\b|electric vehicle|tesla model|bolt|leaf|ioniq", text))
+        deadline = None
+        deadline_match = re.search(r"by (\d{1,2})(?::(\d{2}))?\s*(am|pm)", text)
+        if has_ev and deadline_match:
+            hour = int(deadline_match.group(1)) % 12 + (12 if deadline_match.group(3) == "pm" else 0)
+            deadline = f"{hour:02d}:{deadline_match.group(2) or '00'}"
+
+        solar_kw = _first_number(text, [r"(\d+(?:\.\d+)?)\s*kw\s+solar", r"solar[^.,]*?(\d+(?:\.\d+)?)\s*kw\b"])
+        has_solar = solar_kw is not None or "solar" in text
+
+        if re.search(r"maximum|flexible|early adopter|tech-savvy", text):
+            willingness = 0.85
+        elif re.search(r"conservative|backup|reliable|cautious", text):
+            willingness = 0.4
+        else:
+            willingness = round(0.55 + 0.2 * u, 2)
+
+        return {
+            "bess_capacity_kwh": (battery_kwh or 10.0) if has_battery else None,
+            "bess_max_power_kw": round((battery_kwh or 10.0) * 0.5, 2) if has_battery else None,
+            "bess_initial_soc_percent": 50.0,
+            "has_ev": has_ev,
+            "ev_battery_capacity_kwh": 60.0 if has_ev else None,
+            "ev_max_charge_power_kw": 11.0 if has_ev else None,
+            "ev_charge_deadline": deadline,
+            "ev_target_soc_percent": 80.0,
+            "has_solar": has_solar,
+            "solar_capacity_kw": (solar_kw or 6.0) if has_solar else None,
+            "solar_efficiency": 0.85,
+            "participation_willingness": willingness,
+            "min_compensation_per_kwh": round(0.1 + 0.1 * (1.0 - willingness), 3),
+            "backup_power_hours": 8.0 if "backup" in text else 4.0,
+            "max_discharge_percent": round(30.0 + 50.0 * willingness, 1),
+            "ev_priority": "high" if deadline else "medium"
+        }
+
+    # Optimization prompts -------------------------------------------------
+
+    @staticmethod
+    def _market_terms(prompt: str) -> Tuple[float, float]:
+        """Market price ($/MWh) and required capacity (MW) from an optimization prompt."""
+        price = _first_number(prompt, [r"Market Price: \$(-?\d+(?:\.\d+)?)"])
+        capacity = _first_number(prompt, [r"Required Capacity: (\d+(?:\.\d+)?) MW"])
+        return price or 0.0, capacity or 0.0
+
+    def _optimization_guidance(self, prompt: str) -> str:
+        """Structured recommendations in the format OptimizationTool asks for."""
+        price, capacity = self._market_terms(prompt)
+        return (
+            "Optimization recommendations (offline model):\n"
+            "1. Dispatch strategy: proportional to committed capacity, lowest agreed price first.\n"
+            f"2. Recommended bid price: ${price * 0.95:.2f}/MWh (5% below market).\n"
+            "3. Risk factors: market volatility, prosumer reliability, battery state of charge.\n"
+            f"4. Expected profit margin: at least 5% over prosumer payments for {capacity:.2f} MW; "
+            "prioritize members with high satisfaction scores."
+        )
+
+    def _cvxpy_script(self, prompt: str) -> str:
+        """Executable CVXPY script for the coalition listed in the prompt."""
+        price, capacity = self._market_terms(prompt)
+        members: List[Tuple[float, float]] = [
+            (float(kw), float(p)) for kw, p in
+            re.findall(r"Prosumer \d+: (\d+(?:\.\d+)?) kW @ \$(-?\d+(?:\.\d+)?)/MWh", prompt)
+        ]
+        capacities = [kw for kw, _ in members]
+        prices = [p for _, p in members]
+        return (
+            "import cvxpy as cp\n"
+            "import numpy as np\n"
+            "\n"
+            f"capacities = np.array({capacities!r})\n"
+            f"agreed_prices = np.array({prices!r})\n"
+            f"market_price = {price!r}\n"
+            f"required_kw = {capacity * 1000.0!r}\n"
+            "\n"
+            "dispatch = cp.Variable(len(capacities), nonneg=True)\n"
+            "bid_price = 0.98 * market_price\n"
+            "objective = cp.Maximize((bid_price - agreed_prices) @ dispatch / 1000.0)\n"
+            "constraints = [dispatch <= capacities, cp.sum(dispatch) <= 1.1 * required_kw]\n"
+            "problem = cp.Problem(objective, constraints)\n"
+            "problem.solve()\n"
+            "\n"
+            "result = {'bid_price': bid_price, 'dispatch': dispatch.value.tolist(), 'profit': problem.value}\n"
+        )
+
+    # Everything else ------------------------------------------------------
+
+    def _analysis(self, prompt: str) -> str:
+        """Short numbered analysis for free-form prompts."""
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        return (
+            f"Offline analysis {digest}:\n"
+            "1. Key performance insights: compare profit, satisfaction and success rate across approaches.\n"
+            "2. Market opportunity analysis: the highest-value hours follow LMP peaks.\n"
+            "3. Recommendations: enlarge coalitions in peak hours and keep reserve margins for EV deadlines.\n"
+            "4. Strategic implications: prosumer satisfaction drives long-term participation."
+        )
+
+
+def _first_number(text: str, patterns: List[str]) -> Optional[float]:
+    """First number captured by any of the patterns, in pattern order."""
+    for pattern in patterns:
+        match = re.search(pattern, text)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def offline_gateway_from_env(**gateway_kwargs) -> Optional[LLMGateway]:
+    """
+    Gateway over OfflineBackend when VPP_LLM_BACKEND=offline, otherwise None.
+
+    Args:
+        gateway_kwargs: Extra LLMGateway arguments
+
+    Returns:
+        LLMGateway, or None when the environment selects the real model
+    """
+    if os.getenv("VPP_LLM_BACKEND", "gemini").lower() != "offline":
+        return None
+    backend = OfflineBackend(
+        latency_seconds=float(os.getenv("VPP_LLM_OFFLINE_LATENCY_SECONDS", "0")),
+        latency_jitter_seconds=float(os.getenv("VPP_LLM_OFFLINE_JITTER_SECONDS", "0"))
+    )
+    gateway_kwargs.setdefault("cache", LLMResponseCache.from_env())
+    return LLMGateway(backend, **gateway_kwargs)
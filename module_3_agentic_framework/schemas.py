@@ -5,8 +5,8 @@ This module defines Pydantic models for all inter-agent communication
 messages to ensure strict schema validation between AggregatorAgent and ProsumerAgents.
 """
 
-from pydantic import BaseModel, Field
-from typing import Dict, List, Optional, Any
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Annotated, Callable, Dict, List, Optional, Any, Set
 from datetime import datetime
 from enum import Enum
 
@@ -181,6 +181,46 @@ class NegotiationSummary(BaseModel):
     coalition_stability_score: float = Field(..., description="Predicted coalition stability")
 
 
+def merge_by_key(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    LangGraph reducer combining per-prosumer results from parallel nodes.
+    
+    Idempotent, so nodes that return the whole state (and with it the
+    already merged dict) do not duplicate entries.
+    """
+    return {**left, **right}
+
+
+class _ListIndex:
+    """
+    Dict index over an append-only list field, keyed by key(item).
+    
+    The index remembers which list object it covers and how many items it
+    has seen, so items appended since the last lookup are indexed on the
+    next one, and a replaced or shrunk list is re-indexed from scratch.
+    Items whose key is None are skipped.
+    """
+    
+    def __init__(self, key: Callable[[Any], Any]):
+        self.key = key
+        self.source: Optional[List[Any]] = None
+        self.count = 0
+        self.entries: Dict[Any, List[Any]] = {}
+    
+    def sync(self, items: List[Any]) -> Dict[Any, List[Any]]:
+        """Bring the index up to date with items and return it."""
+        if items is not self.source or len(items) < self.count:
+            self.source = items
+            self.count = 0
+            self.entries = {}
+        for item in items[self.count:]:
+            key = self.key(item)
+            if key is not None:
+                self.entries.setdefault(key, []).append(item)
+        self.count = len(items)
+        return self.entries
+
+
 class AgentState(BaseModel):
     """
     Central state object for LangGraph containing all negotiation state.
@@ -201,6 +241,14 @@ class AgentState(BaseModel):
     aggregator_offers: List[AggregatorOffer] = Field(default_factory=list, description="All aggregator counter-offers")
     prosumer_responses: List[ProsumerResponse] = Field(default_factory=list, description="All prosumer responses")
     
+    # Results written by the parallel prosumer nodes, merged by key
+    bid_results: Annotated[Dict[str, ProsumerBid], merge_by_key] = Field(
+        default_factory=dict, description="Initial bid by prosumer ID (including unavailable prosumers)"
+    )
+    response_results: Annotated[Dict[str, ProsumerResponse], merge_by_key] = Field(
+        default_factory=dict, description="Response by 'offer_id:prosumer_id'"
+    )
+    
     # Coalition building
     committed_coalition: List[CoalitionMember] = Field(default_factory=list, description="Final committed prosumers")
     rejected_prosumers: List[str] = Field(default_factory=list, description="Prosumers that declined participation")
@@ -224,3 +272,56 @@ class AgentState(BaseModel):
     
     class Config:
         arbitrary_types_allowed = True
+    
+    # Lookup indexes over initial_bids, aggregator_offers and prosumer_responses.
+    # Not fields: they are rebuilt on demand and never serialized.
+    _indexes = PrivateAttr(default_factory=dict)
+    
+    def _lookup(self, name: str, items: List[Any], key: Callable[[Any], Any]) -> Dict[Any, List[Any]]:
+        """Index called name over items, synced with the list."""
+        index = self._indexes.get(name)
+        if index is None:
+            index = self._indexes[name] = _ListIndex(key)
+        return index.sync(items)
+    
+    def add_bids(self, bids: List[ProsumerBid]) -> None:
+        """Append initial bids."""
+        self.initial_bids.extend(bids)
+    
+    def add_offers(self, offers: List[AggregatorOffer]) -> None:
+        """Append aggregator offers."""
+        self.aggregator_offers.extend(offers)
+    
+    def add_responses(self, responses: List[ProsumerResponse]) -> None:
+        """Append prosumer responses."""
+        self.prosumer_responses.extend(responses)
+    
+    def bid_for(self, prosumer_id: str) -> Optional[ProsumerBid]:
+        """First initial bid from a prosumer, or None."""
+        bids = self._lookup("bids_by_prosumer", self.initial_bids, lambda b: b.prosumer_id).get(prosumer_id)
+        return bids[0] if bids else None
+    
+    def offer_by_id(self, offer_id: str) -> Optional[AggregatorOffer]:
+        """First aggregator offer with this offer_id, or None."""
+        offers = self._lookup("offers_by_id", self.aggregator_offers, lambda o: o.offer_id).get(offer_id)
+        return offers[0] if offers else None
+    
+    def offers_for_round(self, round_number: int) -> List[AggregatorOffer]:
+        """Aggregator offers made in a round, in order."""
+        return self._lookup("offers_by_round", self.aggregator_offers, lambda o: o.round_number).get(round_number, [])
+    
+    def responses_from(self, prosumer_id: str) -> List[ProsumerResponse]:
+        """Responses from a prosumer, in order."""
+        return self._lookup("responses_by_prosumer", self.prosumer_responses, lambda r: r.prosumer_id).get(prosumer_id, [])
+    
+    def accepted_responses(self) -> List[ProsumerResponse]:
+        """Accepted responses, in order."""
+        return self._lookup(
+            "accepted_responses", self.prosumer_responses, lambda r: True if r.is_accepted else None
+        ).get(True, [])
+    
+    def accepted_prosumer_ids(self) -> Set[str]:
+        """Prosumers with at least one accepted response."""
+        return set(self._lookup(
+            "accepted_by_prosumer", self.prosumer_responses, lambda r: r.prosumer_id if r.is_accepted else None
+        ))
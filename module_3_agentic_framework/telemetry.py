@@ -0,0 +1,365 @@
+"""
+Event Stream for VPP LLM Agent - Module 3
+
+Structured replacement for the progress prints in the negotiation and
+optimization hot paths. Components emit named events with a level and fields;
+an EventStream drops anything below its level, samples high-volume events,
+keeps the most recent ones in a ring buffer and forwards them to subscribers
+(the console, a logger, the dashboard).
+
+Messages are format strings rendered from the event fields only when an event
+is actually displayed, so a dropped or buffered event costs no formatting.
+
+The default stream is silent: it keeps INFO and above in memory and writes
+nothing. VPP_EVENT_LEVEL (DEBUG, INFO, WARNING, ERROR) sets its level and
+VPP_EVENT_ECHO=1 prints its events to stdout, as the framework used to.
+
+The same module holds the Profiler: nested wall-clock spans around the hot
+phases (bid collection, ranking, counter-offers, LLM calls, solver
+canonicalization and solve, state updates). It is disabled by default, and a
+disabled span is one shared no-op context manager. When enabled (VPP_PROFILE=1
+or Profiler.enable()), spans are aggregated per name for timing breakdowns and
+per call stack for folded-stack output that flamegraph.pl and speedscope read.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
+
+
+@dataclass
+class Event:
+    """A single telemetry event."""
+    name: str
+    level: int
+    message: str = ""
+    source: str = ""
+    fields: Dict[str, Any] = field(default_factory=dict)
+    timestamp: float = field(default_factory=time.time)
+
+    @property
+    def level_name(self) -> str:
+        """Level as a name (DEBUG, INFO, ...)."""
+        return logging.getLevelName(self.level)
+
+    @property
+    def text(self) -> str:
+        """Message rendered with the event fields."""
+        if not self.fields:
+            return self.message or self.name
+        try:
+            return self.message.format(**self.fields) if self.message else f"{self.name} {self.fields}"
+        except (KeyError, IndexError, ValueError):
+            return f"{self.message} {self.fields}"
+
+
+Subscriber = Callable[[Event], None]
+
+
+class EventStream:
+    """Leveled, sampled event stream with a ring buffer and subscribers."""
+
+    def __init__(
+        self,
+        level: int = INFO,
+        buffer_size: int = 1000,
+        sample_rates: Optional[Dict[str, float]] = None,
+        echo: bool = False
+    ):
+        """
+        Initialize the event stream.
+
+        Args:
+            level: Minimum level kept (events below it are dropped)
+            buffer_size: Number of recent events kept in memory (0 = none)
+            sample_rates: Fraction of events kept per event name, e.g.
+                {"bid_received": 0.1} keeps every tenth bid event
+            echo: Print events to stdout
+        """
+        self.level = level
+        self.buffer: deque = deque(maxlen=buffer_size)
+        self.sample_rates: Dict[str, float] = dict(sample_rates or {})
+        self.counts: Dict[str, int] = {}
+        self._subscribers: List[tuple] = []
+        self._lock = threading.Lock()
+        if echo:
+            self.subscribe(console_subscriber())
+
+    def enabled(self, level: int) -> bool:
+        """Whether events at this level are kept (check before building costly fields)."""
+        return level >= self.level
+
+    def emit(self, name: str, message: str = "", level: int = INFO, source: str = "", **fields) -> Optional[Event]:
+        """
+        Emit an event.
+
+        Args:
+            name: Event name (used for sampling and filtering)
+            message: Format string rendered with the fields
+            level: Event level
+            source: Emitting component
+            fields: Event data
+
+        Returns:
+            The event, or None if it was dropped by level or sampling
+        """
+        if level < self.level:
+            return None
+
+        with self._lock:
+            seen = self.counts.get(name, 0) + 1
+            self.counts[name] = seen
+            subscribers = list(self._subscribers)
+        rate = self.sample_rates.get(name)
+        # Deterministic sampling: keep an event whenever seen * rate crosses an integer
+        if rate is not None and int(seen * rate) == int((seen - 1) * rate):
+            return None
+
+        event = Event(name=name, level=level, message=message, source=source, fields=fields)
+        self.buffer.append(event)
+        for callback, min_level in subscribers:
+            if level >= min_level:
+                callback(event)
+        return event
+
+    def debug(self, name: str, message: str = "", **fields) -> Optional[Event]:
+        return self.emit(name, message, DEBUG, **fields)
+
+    def info(self, name: str, message: str = "", **fields) -> Optional[Event]:
+        return self.emit(name, message, INFO, **fields)
+
+    def warning(self, name: str, message: str = "", **fields) -> Optional[Event]:
+        return self.emit(name, message, WARNING, **fields)
+
+    def error(self, name: str, message: str = "", **fields) -> Optional[Event]:
+        return self.emit(name, message, ERROR, **fields)
+
+    def subscribe(self, callback: Subscriber, level: int = DEBUG) -> Callable[[], None]:
+        """
+        Call a function with every kept event at or above a level.
+
+        Args:
+            callback: Function taking an Event
+            level: Minimum level forwarded to this subscriber
+
+        Returns:
+            Function that removes the subscription
+        """
+        entry = (callback, level)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe():
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+
+        return unsubscribe
+
+    def recent(self, n: Optional[int] = None, level: int = DEBUG, name: Optional[str] = None) -> List[Event]:
+        """
+        Most recent buffered events, oldest first.
+
+        Args:
+            n: Maximum number of events (None = all buffered)
+            level: Minimum level
+            name: Only events with this name
+
+        Returns:
+            List of events
+        """
+        events = [e for e in list(self.buffer) if e.level >= level and (name is None or e.name == name)]
+        return events if n is None else events[-n:]
+
+    def clear(self):
+        """Empty the buffer and reset the per-name counts."""
+        self.buffer.clear()
+        with self._lock:
+            self.counts.clear()
+
+
+def console_subscriber(stream: Optional[TextIO] = None) -> Subscriber:
+    """Subscriber printing each event's text, like the old progress prints."""
+    def write(event: Event):
+        print(event.text, file=stream or sys.stdout)
+    return write
+
+
+def logging_subscriber(logger: logging.Logger) -> Subscriber:
+    """Subscriber forwarding events to a standard library logger."""
+    def forward(event: Event):
+        logger.log(event.level, "[%s] %s", event.name, event.text)
+    return forward
+
+
+_default_stream: Optional[EventStream] = None
+
+
+def get_event_stream() -> EventStream:
+    """Process-wide default stream, configured from VPP_EVENT_LEVEL and VPP_EVENT_ECHO."""
+    global _default_stream
+    if _default_stream is None:
+        level = logging.getLevelName(os.getenv("VPP_EVENT_LEVEL", "INFO").upper())
+        _default_stream = EventStream(
+            level=level if isinstance(level, int) else INFO,
+            echo=os.getenv("VPP_EVENT_ECHO", "0").lower() in ("1", "true", "yes")
+        )
+    return _default_stream
+
+
+def set_event_stream(stream: EventStream) -> EventStream:
+    """Replace the default stream (e.g. a verbose one for demos); returns it."""
+    global _default_stream
+    _default_stream = stream
+    return stream
+
+
+class _NullSpan:
+    """Span used while profiling is disabled; does nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """One timed span of an enabled Profiler."""
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._stack().append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stack = self.profiler._stack()
+        path = tuple(stack)
+        stack.pop()
+        self.profiler._record(path, elapsed)
+        return False
+
+
+class Profiler:
+    """Nested wall-clock spans, aggregated by name and by call stack."""
+
+    def __init__(self, enabled: bool = False):
+        """
+        Initialize the profiler.
+
+        Args:
+            enabled: Record spans (a disabled profiler's spans cost one method call)
+        """
+        self.enabled = enabled
+        self.totals: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self._stacks: Dict[Tuple[str, ...], float] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def enable(self) -> "Profiler":
+        self.enabled = True
+        return self
+
+    def disable(self) -> "Profiler":
+        self.enabled = False
+        return self
+
+    def span(self, name: str):
+        """
+        Context manager timing a block as `name`, nested under the enclosing spans.
+
+        Spans are tracked per thread; a span opened in a worker thread is a root.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def add(self, name: str, seconds: float) -> None:
+        """Record a duration measured elsewhere (e.g. solver-reported time) under the current span."""
+        if self.enabled:
+            self._record(tuple(self._stack()) + (name,), seconds)
+
+    def _stack(self) -> List[str]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, path: Tuple[str, ...], seconds: float) -> None:
+        name = path[-1]
+        with self._lock:
+            self.totals[name] = self.totals.get(name, 0.0) + seconds
+            self.counts[name] = self.counts.get(name, 0) + 1
+            self._stacks[path] = self._stacks.get(path, 0.0) + seconds
+
+    def breakdown(self) -> Dict[str, float]:
+        """Total seconds per span name (nested spans are also counted in their parents)."""
+        with self._lock:
+            return dict(self.totals)
+
+    def folded(self) -> List[str]:
+        """
+        Self time per call stack in folded-stack format.
+
+        Returns:
+            Lines like "simulation_timestep;agentic;collect_bids 1234", with the
+            time in microseconds spent in that stack and not in a nested span
+        """
+        with self._lock:
+            stacks = dict(self._stacks)
+        self_time = dict(stacks)
+        for path, seconds in stacks.items():
+            if len(path) > 1 and path[:-1] in self_time:
+                self_time[path[:-1]] -= seconds
+        return [f"{';'.join(path)} {max(0, round(seconds * 1e6))}" for path, seconds in sorted(self_time.items())]
+
+    def write_folded(self, path) -> None:
+        """Write folded stacks to a file (input for flamegraph.pl or speedscope)."""
+        with open(path, "w") as f:
+            f.write("\n".join(self.folded()) + "\n")
+
+    def reset(self) -> None:
+        """Drop everything recorded so far."""
+        with self._lock:
+            self.totals.clear()
+            self.counts.clear()
+            self._stacks.clear()
+
+
+_default_profiler: Optional[Profiler] = None
+
+
+def get_profiler() -> Profiler:
+    """Process-wide profiler, enabled when VPP_PROFILE is set."""
+    global _default_profiler
+    if _default_profiler is None:
+        _default_profiler = Profiler(enabled=os.getenv("VPP_PROFILE", "0").lower() in ("1", "true", "yes"))
+    return _default_profiler
+
+
+def set_profiler(profiler: Profiler) -> Profiler:
+    """Replace the default profiler; returns it."""
+    global _default_profiler
+    _default_profiler = profiler
+    return profiler
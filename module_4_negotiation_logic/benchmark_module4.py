@@ -0,0 +1,238 @@
+"""
+Benchmark script for Module 4: Coalition Dispatch Optimization
+Compares cold (rebuilt every cycle) and cached warm CVXPY solves, and the greedy fast path,
+times round-1 bid collection per prosumer against the batch path, and compares
+full sorts with top-k / capacity-cutoff selection for bid ranking and coalition
+formation.
+"""
+
+import argparse
+import os
+import time
+import warnings
+from typing import List, Tuple
+
+import numpy as np
+
+from dispatch_solvers import CachedDispatchProblem, GREEDY_SOLVER
+from ranking import top_k_indices, select_until_capacity
+
+warnings.filterwarnings('ignore', category=FutureWarning)
+
+
+def make_opportunities(count: int, seed: int = 0) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray, float, float]]:
+    """Random coalitions and market terms resembling negotiation outcomes."""
+    rng = np.random.default_rng(seed)
+    opportunities = []
+    for _ in range(count):
+        n = int(rng.integers(5, 40))
+        capacities = rng.uniform(1.0, 10.0, n)
+        market_price = float(rng.uniform(40.0, 150.0))
+        agreed_prices = market_price * rng.uniform(0.6, 0.95, n)
+        satisfaction_weights = rng.uniform(0.5, 1.0, n)
+        required_kw = float(capacities.sum() * rng.uniform(0.3, 0.8))
+        opportunities.append((capacities, agreed_prices, satisfaction_weights, market_price, required_kw))
+    return opportunities
+
+
+def run_solves(solver: CachedDispatchProblem, opportunities, use_cache: bool) -> Tuple[float, int]:
+    """Solve every opportunity; return total seconds and number of optimal solves."""
+    optimal = 0
+    start = time.perf_counter()
+    for capacities, prices, weights, market_price, required_kw in opportunities:
+        result = solver.solve(capacities, prices, weights, market_price, required_kw, use_cache=use_cache)
+        optimal += result["status"] == "optimal"
+    return time.perf_counter() - start, optimal
+
+
+def benchmark_bid_collection(fleet_size: int) -> Tuple[float, float, float, int]:
+    """Time round-1 bidding per prosumer and in batch, on a list and on a FleetState."""
+    os.environ.setdefault('VPP_LLM_BACKEND', 'offline')  # no API key needed
+    from main_negotiation import CoreNegotiationEngine
+    from prosumer_models import Prosumer, BESS
+    from fleet_state import FleetState
+    from schemas import MarketOpportunity
+    from datetime import datetime, timedelta
+
+    rng = np.random.default_rng(1)
+    prosumers = [
+        Prosumer(prosumer_id=f"p{i:06d}", load_profile_id="lp", backup_power_hours=float(rng.uniform(2, 8)),
+                 participation_willingness=float(rng.uniform(0.1, 1.0)),
+                 bess=BESS(capacity_kwh=13.5, max_power_kw=5.0, current_soc_percent=float(rng.uniform(10, 95))))
+        for i in range(fleet_size)
+    ]
+    fleet = FleetState.from_prosumers(prosumers)
+    opportunity = MarketOpportunity(
+        opportunity_id="bench", market_type="energy", timestamp=datetime(2023, 8, 15, 12),
+        duration_hours=1.0, required_capacity_mw=1.0, market_price_mwh=80.0,
+        deadline=datetime(2023, 8, 15, 12) - timedelta(minutes=15)
+    )
+    engine = CoreNegotiationEngine()
+
+    def round_one(collect):
+        """Collect and rank bids, then read the top 25 (the counter-offer targets)."""
+        start = time.perf_counter()
+        ranked = engine._evaluate_and_rank_bids(collect(), opportunity)
+        top = ranked[:25]
+        return time.perf_counter() - start, len(ranked), top
+
+    loop_seconds, n_bids, loop_top = round_one(lambda: [
+        bid for bid in (engine._generate_prosumer_bid(p, opportunity) for p in prosumers)
+        if bid.is_available and bid.available_capacity_kw > 0
+    ])
+    list_seconds, _, list_top = round_one(lambda: engine._collect_initial_bids(opportunity, prosumers))
+    fleet_seconds, _, fleet_top = round_one(lambda: engine._collect_initial_bids(opportunity, fleet))
+    assert [b.prosumer_id for b in loop_top] == [b.prosumer_id for b in list_top] == [b.prosumer_id for b in fleet_top]
+    return loop_seconds, list_seconds, fleet_seconds, n_bids
+
+
+def benchmark_bid_cache(fleet_size: int, steps: int = 24, moved_fraction: float = 0.2,
+                        soc_step_percent: float = 1.0) -> dict:
+    """Time bid-term collection over consecutive timesteps with and without a BidCache, and from a FleetState."""
+    os.environ.setdefault('VPP_LLM_BACKEND', 'offline')  # no API key needed
+    from main_negotiation import CoreNegotiationEngine
+    from bid_cache import BidCache
+    from prosumer_models import Prosumer, BESS
+    from fleet_state import FleetState
+    from schemas import MarketOpportunity
+    from datetime import datetime, timedelta
+
+    rng = np.random.default_rng(5)
+    prosumers = [
+        Prosumer(prosumer_id=f"p{i:06d}", load_profile_id="lp", backup_power_hours=float(rng.uniform(2, 8)),
+                 participation_willingness=float(rng.uniform(0.1, 1.0)),
+                 bess=BESS(capacity_kwh=13.5, max_power_kw=5.0, current_soc_percent=float(rng.uniform(10, 95))))
+        for i in range(fleet_size)
+    ]
+    prices = rng.uniform(30, 120, steps)
+    moves = [(rng.random(fleet_size) < moved_fraction, rng.uniform(-5, 5, fleet_size)) for _ in range(steps)]
+    fleet = FleetState.from_prosumers(prosumers)
+    plain, cached = CoreNegotiationEngine(), CoreNegotiationEngine(bid_cache=BidCache(soc_step_percent))
+
+    def run(engine, fleet_state: bool = False) -> float:
+        socs = [p.bess.current_soc_percent for p in prosumers]
+        fleet_socs = fleet.columns["bess_current_soc_percent"].copy()
+        elapsed = 0.0
+        for step, (moved, delta) in enumerate(moves):
+            opportunity = MarketOpportunity(
+                opportunity_id=f"bench_{step}", market_type="energy", timestamp=datetime(2023, 8, 15, 12),
+                duration_hours=1.0, required_capacity_mw=1.0, market_price_mwh=float(prices[step]),
+                deadline=datetime(2023, 8, 15, 12) - timedelta(minutes=15)
+            )
+            start = time.perf_counter()
+            engine._batch_bid_terms(opportunity, fleet if fleet_state else prosumers)
+            elapsed += time.perf_counter() - start
+            # The prosumers whose state moved this hour
+            if fleet_state:
+                soc = fleet.columns["bess_current_soc_percent"]
+                soc[moved] = np.clip(soc[moved] + delta[moved], 10, 95)
+            else:
+                for i in np.flatnonzero(moved):
+                    bess = prosumers[i].bess
+                    bess.current_soc_percent = float(np.clip(bess.current_soc_percent + delta[i], 10, 95))
+        for prosumer, soc in zip(prosumers, socs):
+            prosumer.bess.current_soc_percent = soc
+        fleet.columns["bess_current_soc_percent"][:] = fleet_socs
+        return elapsed / steps
+
+    return {
+        'plain_ms': run(plain) * 1000,
+        'cached_ms': run(cached) * 1000,
+        'hit_rate': cached.bid_cache.stats.hit_rate,
+        'fleet_ms': run(plain, fleet_state=True) * 1000  # Column operations; the cache is not consulted
+    }
+
+
+def benchmark_ranking(n_bids: int, top_k: int = 25, repeats: int = 5) -> dict:
+    """Time full-sort and partial selection of bid rankings and coalition prefixes."""
+    rng = np.random.default_rng(2)
+    prices = np.round(rng.uniform(80, 160, n_bids), 2)
+    capacities = rng.uniform(1.0, 5.0, n_bids)
+    scores = 1.0 / np.maximum(prices, 1.0) + capacities / 1000.0 + 1.0 + np.minimum(capacities / 10.0, 2.0)
+    capacity_limit = 1.5 * 50.0 * top_k  # Prefix of roughly 25-40 members
+
+    def timed(fn):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            result = fn()
+        return (time.perf_counter() - start) / repeats, result
+
+    def sorted_prefix():
+        """Reference: sort every candidate, then add members until the limit."""
+        selected, total = [], 0.0
+        for i in sorted(range(n_bids), key=lambda i: scores[i], reverse=True):
+            if total < capacity_limit:
+                selected.append(i)
+                total += capacities[i]
+        return selected
+
+    sort_seconds, full = timed(lambda: np.argsort(-scores, kind="stable"))
+    topk_seconds, top = timed(lambda: top_k_indices(scores, top_k))
+    loop_seconds, reference = timed(sorted_prefix)
+    cutoff_seconds, selected = timed(lambda: select_until_capacity(scores, capacities, capacity_limit))
+    assert np.array_equal(full[:top_k], top) and reference == selected
+    return {
+        'sort_ms': sort_seconds * 1000, 'topk_ms': topk_seconds * 1000,
+        'sort_loop_ms': loop_seconds * 1000, 'cutoff_ms': cutoff_seconds * 1000, 'members': len(selected)
+    }
+
+
+def main():
+    """Run the cold vs warm solve benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark cached dispatch optimization")
+    parser.add_argument('--opportunities', type=int, default=1000)
+    parser.add_argument('--bid-fleet-sizes', type=int, nargs='*', default=[1000, 10000],
+                        help="Fleet sizes for the round-1 bid collection benchmark")
+    parser.add_argument('--bid-cache-sizes', type=int, nargs='*', default=[1000, 10000],
+                        help="Fleet sizes for the cross-timestep bid cache benchmark")
+    parser.add_argument('--moved-fraction', type=float, default=0.2,
+                        help="Fraction of prosumers whose SOC moves each timestep")
+    parser.add_argument('--rank-sizes', type=int, nargs='*', default=[1000, 10000, 100000],
+                        help="Bid counts for the ranking and coalition selection benchmark")
+    args = parser.parse_args()
+
+    opportunities = make_opportunities(args.opportunities)
+
+    print("=" * 60)
+    print("MODULE 4 DISPATCH OPTIMIZATION BENCHMARK")
+    print("=" * 60)
+
+    cold_seconds, cold_optimal = run_solves(CachedDispatchProblem(), opportunities, use_cache=False)
+    warm_solver = CachedDispatchProblem()
+    warm_seconds, warm_optimal = run_solves(warm_solver, opportunities, use_cache=True)
+
+    greedy_solver = CachedDispatchProblem(solver=GREEDY_SOLVER)
+    greedy_seconds, greedy_optimal = run_solves(greedy_solver, opportunities, use_cache=True)
+
+    n = len(opportunities)
+    print(f"Cold (rebuild per cycle): {cold_seconds:7.2f}s total, {cold_seconds / n * 1000:6.2f} ms/cycle, "
+          f"{cold_optimal}/{n} optimal")
+    print(f"Warm (cached problem):    {warm_seconds:7.2f}s total, {warm_seconds / n * 1000:6.2f} ms/cycle, "
+          f"{warm_optimal}/{n} optimal")
+    print(f"Greedy (CVXPY fallback):  {greedy_seconds:7.2f}s total, {greedy_seconds / n * 1000:6.2f} ms/cycle, "
+          f"{greedy_optimal}/{n} optimal")
+    print(f"Speedup: warm {cold_seconds / warm_seconds:.1f}x, greedy {cold_seconds / greedy_seconds:.1f}x")
+    print(f"Warm cache: {warm_solver.cache_info()}")
+    print(f"Greedy cache: {greedy_solver.cache_info()}")
+
+    for fleet_size in args.bid_fleet_sizes:
+        loop_seconds, list_seconds, fleet_seconds, n_bids = benchmark_bid_collection(fleet_size)
+        print(f"Bids {fleet_size:>6} prosumers ({n_bids} available): per-prosumer {loop_seconds * 1000:8.1f} ms, "
+              f"batch (list) {list_seconds * 1000:7.1f} ms, batch (FleetState) {fleet_seconds * 1000:7.1f} ms")
+
+    for fleet_size in args.bid_cache_sizes:
+        result = benchmark_bid_cache(fleet_size, moved_fraction=args.moved_fraction)
+        print(f"Bid terms {fleet_size:>6} prosumers/timestep ({args.moved_fraction:.0%} moved): "
+              f"uncached {result['plain_ms']:7.1f} ms, cached {result['cached_ms']:7.1f} ms "
+              f"({result['plain_ms'] / result['cached_ms']:.1f}x, hit rate {result['hit_rate']:.0%})")
+        print(f"  same fleet as a FleetState (no cache): {result['fleet_ms']:7.2f} ms")
+
+    for n_bids in args.rank_sizes:
+        result = benchmark_ranking(n_bids)
+        print(f"Rank {n_bids:>7} bids: full sort {result['sort_ms']:7.2f} ms, top-25 {result['topk_ms']:6.2f} ms; "
+              f"coalition sort+loop {result['sort_loop_ms']:8.2f} ms, cutoff {result['cutoff_ms']:6.2f} ms "
+              f"({result['members']} members)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Batched Prosumer Bids for VPP LLM Agent - Module 4
+
+Round-1 bids for a whole fleet, held as arrays (fleet row, available
+capacity, minimum price). CoreNegotiationEngine computes those arrays in one
+pass over the fleet columns; the pydantic ProsumerBid for a row is only built
+when the bid is actually read, and then kept.
+
+Ranking reorders the arrays without touching the objects, so a negotiation
+over a large fleet only builds bids for the few prosumers that receive
+counter-offers.
+"""
+
+from collections.abc import Sequence
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+
+class BidBatch(Sequence):
+    """Sequence of ProsumerBid backed by arrays, built lazily on access."""
+
+    def __init__(
+        self,
+        rows: np.ndarray,
+        available_capacity_kw: np.ndarray,
+        minimum_price_per_mwh: np.ndarray,
+        build_bid: Callable[[int, float, float], object],
+        cache: Optional[Dict[int, object]] = None
+    ):
+        """
+        Initialize the batch.
+
+        Args:
+            rows: Fleet row of each bid
+            available_capacity_kw: Available capacity of each bid (kW)
+            minimum_price_per_mwh: Minimum price of each bid ($/MWh, rounded)
+            build_bid: Builds the ProsumerBid for (row, capacity, price)
+            cache: Bids already built, by fleet row (shared by reordered batches)
+        """
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.available_capacity_kw = np.asarray(available_capacity_kw, dtype=np.float64)
+        self.minimum_price_per_mwh = np.asarray(minimum_price_per_mwh, dtype=np.float64)
+        self._build_bid = build_bid
+        self._cache: Dict[int, object] = {} if cache is None else cache
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Bid index {index} out of range for {len(self)} bids")
+
+        row = int(self.rows[index])
+        bid = self._cache.get(row)
+        if bid is None:
+            bid = self._build_bid(
+                row, float(self.available_capacity_kw[index]), float(self.minimum_price_per_mwh[index])
+            )
+            self._cache[row] = bid
+        return bid
+
+    def reorder(self, order: np.ndarray) -> "BidBatch":
+        """Batch with the bids in the given order (shares built bids)."""
+        return BidBatch(
+            self.rows[order], self.available_capacity_kw[order], self.minimum_price_per_mwh[order],
+            self._build_bid, self._cache
+        )
+
+    @property
+    def built(self) -> int:
+        """Number of ProsumerBid objects built so far."""
+        return len(self._cache)
+
+    def to_list(self) -> List[object]:
+        """Build every bid and return them as a list."""
+        return list(self)
@@ -0,0 +1,135 @@
+"""
+Bid Cache for VPP LLM Agent - Module 4
+
+Keeps each prosumer's bid inputs (available capacity and the state that
+drives its minimum price) between negotiations, so that a simulation only
+re-evaluates the prosumers whose relevant state moved since the last timestep.
+
+The cache holds the inputs as arrays in fleet order. On each negotiation it
+reads only the state key of every prosumer - battery SOC quantized to
+soc_step_percent and EV plug state, for the opportunity's market type -
+compares it with the cached key in one vectorized pass, and re-evaluates the
+rows that differ. The market price is not part of the key: the engine applies
+the current price to the cached inputs on every negotiation, so prices stay
+exact and only capacity and SOC are held within a bucket.
+
+Preferences (participation willingness, backup hours) are cached as well;
+call invalidate() for a prosumer whose preferences change.
+
+The cache only pays off when evaluating a bid is expensive, as it is for
+Prosumer objects, which are read one by one. A FleetState's bid inputs are a
+handful of column operations, cheaper than computing the state keys, so the
+engine evaluates FleetState fleets directly and never consults the cache
+(see benchmark_module4.py --bid-cache-sizes).
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Tuple
+
+import numpy as np
+
+# Per-prosumer bid inputs: (available_capacity_kw, has_bess, soc_percent,
+# participation_willingness, backup_power_hours)
+BidInputs = Tuple[float, bool, float, float, float]
+
+
+@dataclass
+class BidCacheStats:
+    """Hit and miss counts for a BidCache."""
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered from the cache."""
+        return self.hits / self.lookups if self.lookups else 0.0
+
+
+class BidCache:
+    """Fleet bid inputs, re-evaluated per prosumer when its quantized state moves."""
+
+    def __init__(self, soc_step_percent: float = 1.0):
+        """
+        Initialize the cache.
+
+        Args:
+            soc_step_percent: Width of the SOC buckets (percentage points);
+                0 re-evaluates a prosumer on any SOC change
+        """
+        self.soc_step_percent = soc_step_percent
+        self.stats = BidCacheStats()
+        self.last_reevaluated = 0  # Prosumers re-evaluated in the latest lookup
+
+        self._ids: Optional[List[str]] = None
+        self._market_type: Optional[str] = None
+        self._soc_key = np.empty(0)
+        self._plug_key = np.empty(0, dtype=np.int8)
+        self._inputs: List[np.ndarray] = []
+
+    def _state_keys(self, prosumers: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+        """Quantized SOC (-1 without a battery) and plug state (-1 without an EV) per prosumer."""
+        soc = np.array([p.bess.current_soc_percent if p.bess is not None else -1.0 for p in prosumers],
+                       dtype=np.float64)
+        if self.soc_step_percent > 0:
+            soc = np.where(soc < 0, -1.0, np.floor(soc / self.soc_step_percent))
+        evs = [getattr(p, "ev", None) for p in prosumers]
+        plugged = np.array([-1 if ev is None else int(ev.is_plugged_in) for ev in evs], dtype=np.int8)
+        return soc, plugged
+
+    def bid_inputs(
+        self,
+        prosumers: List[Any],
+        market_type: str,
+        evaluate: Callable[[Any, str], BidInputs]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Bid inputs for a fleet, re-evaluating only prosumers whose state key changed.
+
+        Args:
+            prosumers: Prosumer objects (or views)
+            market_type: Market type of the opportunity
+            evaluate: Computes BidInputs for (prosumer, market_type)
+
+        Returns:
+            Tuple of (available_capacity_kw, has_bess, soc_percent,
+            participation_willingness, backup_power_hours) arrays in fleet order
+        """
+        ids = [p.prosumer_id for p in prosumers]
+        soc_key, plug_key = self._state_keys(prosumers)
+
+        if ids != self._ids or market_type != self._market_type:
+            # New fleet or market type: evaluate everyone
+            self._ids, self._market_type = ids, market_type
+            rows = [evaluate(p, market_type) for p in prosumers]
+            self._inputs = [
+                np.array([row[k] for row in rows], dtype=bool if k == 1 else np.float64) for k in range(5)
+            ]
+            moved = np.arange(len(prosumers))
+        else:
+            # NaN keys (invalidated rows) never compare equal
+            moved = np.flatnonzero((soc_key != self._soc_key) | (plug_key != self._plug_key))
+            if len(moved):
+                rows = [evaluate(prosumers[i], market_type) for i in moved]
+                for k, column in enumerate(self._inputs):
+                    column[moved] = [row[k] for row in rows]
+        self._soc_key, self._plug_key = soc_key, plug_key
+
+        self.last_reevaluated = len(moved)
+        self.stats.misses += len(moved)
+        self.stats.hits += len(prosumers) - len(moved)
+        return tuple(column.copy() for column in self._inputs)
+
+    def invalidate(self, prosumer_id: Optional[str] = None):
+        """Re-evaluate one prosumer (e.g. after a preference change), or everyone, on the next lookup."""
+        if prosumer_id is None or self._ids is None:
+            self._ids = None
+        elif prosumer_id in self._ids:
+            self._soc_key = self._soc_key.copy()
+            self._soc_key[self._ids.index(prosumer_id)] = np.nan
+
+    def __len__(self) -> int:
+        return len(self._ids) if self._ids is not None else 0
@@ -0,0 +1,334 @@
+"""
+Dispatch Solvers for VPP LLM Agent - Module 4
+
+This module holds the numerical side of coalition bid optimization. The
+CVXPY dispatch problem is built once per coalition-size bucket with
+cp.Parameter inputs and cached, so each negotiation cycle only updates
+parameter values and re-solves instead of re-canonicalizing a new problem.
+
+Dispatch problems with only per-prosumer bounds and limits on total dispatch
+are fractional knapsacks; solve_dispatch_greedy solves them exactly with a
+sort, and is selected with solver="greedy".
+
+CVXPY is imported when the first problem is built, so importing this module
+(and the negotiation engine above it) stays cheap; the status and solver
+names below equal the cvxpy constants.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import cvxpy as cp
+
+
+# Bid price as a fraction of market price (at most 2% below market)
+BID_PRICE_FRACTION = 0.98
+
+# Minimum markup of the bid over the dispatch-weighted prosumer price
+MIN_PROFIT_MARKUP = 1.05
+
+# Accepted range of total dispatch around the required capacity
+MIN_CAPACITY_FRACTION = 0.9
+MAX_CAPACITY_FRACTION = 1.1
+
+# Weight of the satisfaction bonus in the objective
+SATISFACTION_BONUS = 0.1
+
+# Solver name selecting the exact greedy fast path
+GREEDY_SOLVER = "greedy"
+
+# cvxpy.ECOS, cvxpy.OPTIMAL and cvxpy.INFEASIBLE, without importing cvxpy
+ECOS = "ECOS"
+OPTIMAL = "optimal"
+INFEASIBLE = "infeasible"
+
+# Feasibility tolerance for the greedy solver (kW)
+GREEDY_TOLERANCE = 1e-9
+
+
+def solve_dispatch_greedy(
+    profit_per_kw: np.ndarray,
+    capacities: np.ndarray,
+    min_total_kw: float = 0.0,
+    max_total_kw: float = np.inf
+) -> Tuple[str, np.ndarray]:
+    """
+    Exactly solve max profit . d  s.t.  0 <= d <= capacities, min_total <= sum(d) <= max_total.
+
+    Prosumers are filled in order of decreasing profit: every profitable one
+    up to max_total, then unprofitable ones only as far as min_total needs.
+    Prosumers tied at the marginal profit share the remaining amount in
+    proportion to capacity, so the split is deterministic.
+
+    Args:
+        profit_per_kw: Objective coefficient per prosumer
+        capacities: Upper dispatch bound per prosumer (kW, negative treated as 0)
+        min_total_kw: Minimum total dispatch (kW)
+        max_total_kw: Maximum total dispatch (kW)
+
+    Returns:
+        Tuple of (status, dispatch) where status is OPTIMAL or INFEASIBLE
+    """
+    profit = np.asarray(profit_per_kw, dtype=np.float64)
+    caps = np.maximum(np.asarray(capacities, dtype=np.float64), 0.0)
+    dispatch = np.zeros(len(caps))
+
+    if min_total_kw > max_total_kw + GREEDY_TOLERANCE or caps.sum() < min_total_kw - GREEDY_TOLERANCE:
+        return INFEASIBLE, dispatch
+
+    # Profitable prosumers fill up to the maximum; others only up to the minimum
+    target = min(max_total_kw, max(min_total_kw, float(caps[profit > 0].sum())))
+    if target <= 0:
+        return OPTIMAL, dispatch
+
+    order = np.argsort(-profit, kind='stable')
+    cumulative = np.cumsum(caps[order])
+    cut = int(np.searchsorted(cumulative, target, side='left'))
+    if cut >= len(order):
+        dispatch[:] = caps
+        return OPTIMAL, dispatch
+
+    # Everything strictly better than the marginal profit is fully dispatched
+    marginal_profit = profit[order[cut]]
+    better = profit > marginal_profit
+    tied = profit == marginal_profit
+    dispatch[better] = caps[better]
+
+    remaining = target - dispatch.sum()
+    tied_capacity = caps[tied].sum()
+    if remaining > 0 and tied_capacity > 0:
+        dispatch[tied] = caps[tied] * min(1.0, remaining / tied_capacity)
+
+    return OPTIMAL, dispatch
+
+
+@dataclass
+class _DispatchProblem:
+    """One cached, parametrized dispatch problem."""
+    problem: "cp.Problem"
+    dispatch: "cp.Variable"
+    capacities: "cp.Parameter"
+    agreed_prices: "cp.Parameter"
+    satisfaction_weights: "cp.Parameter"
+    bid_price: "cp.Parameter"
+    required_capacity_kw: "cp.Parameter"
+
+
+class CachedDispatchProblem:
+    """
+    Coalition dispatch LP with one cached CVXPY problem per size bucket.
+
+    The original formulation optimized the bid price jointly with dispatch,
+    which made revenue bilinear (bid_price * sum(dispatch)) and the price
+    floor a ratio of affine expressions. For any fixed dispatch the objective
+    increases with the bid price, so the optimum always sits at the upper
+    bound 0.98 * market price. Fixing the bid there turns the problem into an
+    LP, and the floor bid_price * sum(d) >= 1.05 * agreed_prices . d becomes
+    DPP-compliant (parameter times variable on both sides).
+
+    Coalitions are padded with zero-capacity members up to the next bucket
+    size (powers of two), which leaves the optimum unchanged.
+    """
+
+    def __init__(self, solver: str = ECOS, min_bucket: int = 8):
+        """
+        Initialize the problem cache.
+
+        Args:
+            solver: CVXPY solver name, or "greedy" for the exact sort-based
+                fast path (falls back to ECOS when the price floor binds)
+            min_bucket: Smallest coalition-size bucket
+        """
+        self.solver = solver
+        self.fallback_solver = ECOS
+        self.min_bucket = min_bucket
+        self.greedy_solves = 0
+        self.greedy_fallbacks = 0
+        self._problems: Dict[int, _DispatchProblem] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def bucket_size(self, n_prosumers: int) -> int:
+        """Return the cached problem size used for a coalition of n prosumers."""
+        size = self.min_bucket
+        while size < n_prosumers:
+            size *= 2
+        return size
+
+    def _build(self, size: int) -> _DispatchProblem:
+        """Build the parametrized dispatch problem for `size` prosumers."""
+        import cvxpy as cp
+
+        dispatch = cp.Variable(size, nonneg=True)  # Dispatch for each prosumer (kW)
+
+        capacities = cp.Parameter(size, nonneg=True)
+        agreed_prices = cp.Parameter(size)
+        satisfaction_weights = cp.Parameter(size)
+        bid_price = cp.Parameter()
+        required_capacity_kw = cp.Parameter(nonneg=True)
+
+        total_dispatch = cp.sum(dispatch)
+
+        # Objective: Maximize profit while maintaining satisfaction
+        revenue = bid_price * total_dispatch / 1000.0  # Convert kW to MW
+        costs = cp.sum(cp.multiply(agreed_prices, dispatch)) / 1000.0  # Prosumer payments
+        satisfaction_bonus = cp.sum(cp.multiply(satisfaction_weights, dispatch)) * SATISFACTION_BONUS
+        objective = cp.Maximize(revenue - costs + satisfaction_bonus)
+
+        constraints = [
+            # Capacity constraints for each prosumer
+            dispatch <= capacities,
+            # Total capacity within 90-110% of requirement
+            total_dispatch >= MIN_CAPACITY_FRACTION * required_capacity_kw,
+            total_dispatch <= MAX_CAPACITY_FRACTION * required_capacity_kw,
+            # Bid must keep at least 5% profit over the weighted prosumer price
+            bid_price * total_dispatch >= MIN_PROFIT_MARKUP * cp.sum(cp.multiply(agreed_prices, dispatch))
+        ]
+
+        return _DispatchProblem(
+            problem=cp.Problem(objective, constraints),
+            dispatch=dispatch,
+            capacities=capacities,
+            agreed_prices=agreed_prices,
+            satisfaction_weights=satisfaction_weights,
+            bid_price=bid_price,
+            required_capacity_kw=required_capacity_kw
+        )
+
+    def _get(self, size: int, use_cache: bool) -> _DispatchProblem:
+        """Fetch the cached problem for a bucket, building it on first use."""
+        if not use_cache:
+            self.cache_misses += 1
+            return self._build(size)
+
+        cached = self._problems.get(size)
+        if cached is None:
+            self.cache_misses += 1
+            cached = self._problems[size] = self._build(size)
+        else:
+            self.cache_hits += 1
+        return cached
+
+    def solve(
+        self,
+        capacities: np.ndarray,
+        agreed_prices: np.ndarray,
+        satisfaction_weights: np.ndarray,
+        market_price_mwh: float,
+        required_capacity_kw: float,
+        use_cache: bool = True,
+        warm_start: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Solve the coalition dispatch problem.
+
+        Args:
+            capacities: Committed capacity per prosumer (kW)
+            agreed_prices: Agreed price per prosumer ($/MWh)
+            satisfaction_weights: Satisfaction weight per prosumer
+            market_price_mwh: Market price ($/MWh)
+            required_capacity_kw: Required total capacity (kW)
+            use_cache: Reuse the cached problem for this size bucket
+            warm_start: Pass warm_start to the solver
+
+        Returns:
+            Dict with status, optimal_value, dispatch_values, bid_price_value,
+            solver_time and compile_time (CVXPY canonicalization; 0 for greedy)
+        """
+        n_prosumers = len(capacities)
+        if self.solver == GREEDY_SOLVER:
+            result = self._solve_greedy(capacities, agreed_prices, satisfaction_weights,
+                                        market_price_mwh, required_capacity_kw)
+            if result is not None:
+                return result
+        
+        size = self.bucket_size(n_prosumers)
+        cached = self._get(size, use_cache)
+
+        cached.capacities.value = self._pad(capacities, size)
+        cached.agreed_prices.value = self._pad(agreed_prices, size)
+        cached.satisfaction_weights.value = self._pad(satisfaction_weights, size)
+        cached.bid_price.value = BID_PRICE_FRACTION * market_price_mwh
+        cached.required_capacity_kw.value = max(0.0, float(required_capacity_kw))
+
+        solver = self.fallback_solver if self.solver == GREEDY_SOLVER else self.solver
+        cached.problem.solve(solver=solver, warm_start=warm_start)
+
+        dispatch_values = cached.dispatch.value
+        solver_stats = cached.problem.solver_stats
+        return {
+            "status": cached.problem.status,
+            "optimal_value": cached.problem.value,
+            "dispatch_values": dispatch_values[:n_prosumers] if dispatch_values is not None else np.zeros(n_prosumers),
+            "bid_price_value": float(cached.bid_price.value) if dispatch_values is not None else 0.0,
+            "solver_time": getattr(solver_stats, 'solve_time', 0.0) or 0.0,
+            "compile_time": cached.problem.compilation_time or 0.0
+        }
+
+    def _solve_greedy(
+        self,
+        capacities: np.ndarray,
+        agreed_prices: np.ndarray,
+        satisfaction_weights: np.ndarray,
+        market_price_mwh: float,
+        required_capacity_kw: float
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Solve without the price floor, then check it.
+
+        Returns None when the floor is violated (it binds and the CVXPY
+        problem is needed); otherwise the greedy solution is optimal for the
+        full problem.
+        """
+        start = time.perf_counter()
+        capacities = np.asarray(capacities, dtype=np.float64)
+        agreed_prices = np.asarray(agreed_prices, dtype=np.float64)
+        bid_price = BID_PRICE_FRACTION * market_price_mwh
+        required_capacity_kw = max(0.0, float(required_capacity_kw))
+
+        profit_per_kw = ((bid_price - agreed_prices) / 1000.0
+                         + SATISFACTION_BONUS * np.asarray(satisfaction_weights, dtype=np.float64))
+        status, dispatch = solve_dispatch_greedy(
+            profit_per_kw, capacities,
+            MIN_CAPACITY_FRACTION * required_capacity_kw,
+            MAX_CAPACITY_FRACTION * required_capacity_kw
+        )
+
+        if status == OPTIMAL:
+            floor_slack = bid_price * dispatch.sum() - MIN_PROFIT_MARKUP * float(agreed_prices @ dispatch)
+            if floor_slack < -GREEDY_TOLERANCE * max(1.0, abs(bid_price) * dispatch.sum()):
+                self.greedy_fallbacks += 1
+                return None
+
+        self.greedy_solves += 1
+        feasible = status == OPTIMAL
+        return {
+            "status": status,
+            "optimal_value": float(profit_per_kw @ dispatch) if feasible else None,
+            "dispatch_values": dispatch,
+            "bid_price_value": bid_price if feasible else 0.0,
+            "solver_time": time.perf_counter() - start,
+            "compile_time": 0.0
+        }
+
+    @staticmethod
+    def _pad(values: np.ndarray, size: int) -> np.ndarray:
+        """Zero-pad a per-prosumer vector to the bucket size."""
+        padded = np.zeros(size)
+        values = np.asarray(values, dtype=np.float64)
+        padded[:len(values)] = values
+        return padded
+
+    def cache_info(self) -> Dict[str, Optional[int]]:
+        """Return cache hit/miss counters and cached bucket sizes."""
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "buckets": sorted(self._problems),
+            "greedy_solves": self.greedy_solves,
+            "greedy_fallbacks": self.greedy_fallbacks
+        }
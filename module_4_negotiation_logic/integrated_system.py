@@ -27,6 +27,8 @@ import pandas as pd
 # Import the core components
 from main_negotiation import CoreNegotiationEngine, NegotiationResult
 from optimization_tool import OptimizationTool, OptimizationResult
+from llm_gateway import LLMGateway
+from offline_llm import offline_gateway_from_env
 
 # Import schemas and models (with fallback definitions)
 try:
@@ -71,24 +73,37 @@ class IntegratedNegotiationSystem:
     negotiations and hybrid LLM-to-solver optimization.
     """
     
-    def __init__(self):
-        """Initialize the integrated negotiation system."""
+    def __init__(self, gateway: Optional[LLMGateway] = None):
+        """
+        Initialize the integrated negotiation system.
+        
+        Args:
+            gateway: LLM gateway shared by the engine and the optimization tool
+                (defaults to the offline backend when VPP_LLM_BACKEND=offline,
+                otherwise Gemini)
+        """
         load_dotenv()
         
+        if gateway is None:
+            gateway = offline_gateway_from_env()
+        
         # Initialize core components
-        self.negotiation_engine = CoreNegotiationEngine()
-        self.optimization_tool = OptimizationTool()
+        self.negotiation_engine = CoreNegotiationEngine(gateway=gateway)
+        self.optimization_tool = OptimizationTool(gateway=gateway)
         
         # Initialize LLM for coordination
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment variables")
-        
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-1.5-flash",
-            google_api_key=api_key,
-            temperature=0.2
-        )
+        if gateway is not None:
+            self.llm = None
+        else:
+            api_key = os.getenv('GEMINI_API_KEY')
+            if not api_key:
+                raise ValueError("GEMINI_API_KEY not found in environment variables")
+            
+            self.llm = ChatGoogleGenerativeAI(
+                model="gemini-1.5-flash",
+                google_api_key=api_key,
+                temperature=0.2
+            )
         
         # System parameters
         self.simulation_start_time = datetime(2023, 8, 15, 0, 0, 0)
@@ -99,7 +114,9 @@ class IntegratedNegotiationSystem:
         market_opportunity: MarketOpportunity,
         prosumer_fleet: List,  # List[Prosumer] with fallback
         market_data: pd.DataFrame,
-        simulation_context: Dict[str, Any] = None
+        simulation_context: Dict[str, Any] = None,
+        negotiation_result: Optional[NegotiationResult] = None,
+        optimization_guidance: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Run a complete negotiation and optimization cycle.
@@ -109,6 +126,8 @@ class IntegratedNegotiationSystem:
             prosumer_fleet: Available prosumer fleet
             market_data: Current market data context
             simulation_context: Additional simulation information
+            negotiation_result: Result of an already-run negotiation (skips Phase 1)
+            optimization_guidance: Prefetched LLM guidance for the optimization
             
         Returns:
             Dict containing complete results including negotiation and optimization
@@ -119,9 +138,10 @@ class IntegratedNegotiationSystem:
         
         # Phase 1: Multi-round negotiation
         cycle_log.append("Phase 1: Running multi-round negotiation")
-        negotiation_result = self.negotiation_engine.run_negotiation(
-            market_opportunity, prosumer_fleet, market_data
-        )
+        if negotiation_result is None:
+            negotiation_result = self.negotiation_engine.run_negotiation(
+                market_opportunity, prosumer_fleet, market_data
+            )
         
         cycle_log.extend(negotiation_result.negotiation_log)
         
@@ -134,7 +154,8 @@ class IntegratedNegotiationSystem:
         optimization_result = self.optimization_tool.formulate_and_submit_bid(
             market_opportunity,
             negotiation_result.coalition_members,
-            simulation_context
+            simulation_context,
+            guidance=optimization_guidance
         )
         
         cycle_log.extend(optimization_result.optimization_log)
@@ -386,12 +407,39 @@ class IntegratedNegotiationSystem:
         opportunities = self._identify_market_opportunities(current_time, market_data_row)
         step_results["opportunities_identified"] = [opp.opportunity_id for opp in opportunities]
         
+        market_frame = pd.DataFrame([market_data_row])
+        context = {"simulation_time": current_time, "step_state": simulation_state}
+        
         # Run negotiations for each opportunity
+        negotiations = []
         for opportunity in opportunities:
             try:
+                negotiations.append(self.negotiation_engine.run_negotiation(opportunity, prosumer_fleet, market_frame))
+            except Exception as e:
+                negotiations.append(e)
+        
+        # Fetch optimization guidance for all coalitions at once; a failed call
+        # leaves the optimization tool to ask again on its own
+        formed = [
+            (opportunity, negotiation) for opportunity, negotiation in zip(opportunities, negotiations)
+            if not isinstance(negotiation, Exception) and negotiation.success
+        ]
+        guidance = self.optimization_tool.generate_guidance_batch(
+            [(opportunity, negotiation.coalition_members, context) for opportunity, negotiation in formed]
+        )
+        guidance_by_id = {
+            opportunity.opportunity_id: result
+            for (opportunity, _), result in zip(formed, guidance) if not isinstance(result, Exception)
+        }
+        
+        for opportunity, negotiation in zip(opportunities, negotiations):
+            try:
+                if isinstance(negotiation, Exception):
+                    raise negotiation
                 negotiation_result = self.run_complete_negotiation_cycle(
-                    opportunity, prosumer_fleet, pd.DataFrame([market_data_row]),
-                    {"simulation_time": current_time, "step_state": simulation_state}
+                    opportunity, prosumer_fleet, market_frame, context,
+                    negotiation_result=negotiation,
+                    optimization_guidance=guidance_by_id.get(opportunity.opportunity_id)
                 )
                 
                 step_results["negotiations_completed"].append(negotiation_result)
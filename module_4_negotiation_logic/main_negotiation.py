@@ -7,10 +7,11 @@ logic for the VPP agent system, integrating with the LangGraph framework from Mo
 
 import os
 import sys
+import heapq
 import json
 import uuid
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Union
 from dataclasses import dataclass
 
 # Add paths for imports using dynamic path resolution
@@ -23,20 +24,25 @@ for path in [module_2_path, module_3_path]:
     if path not in sys.path:
         sys.path.insert(0, path)
 
-from langgraph.graph import StateGraph, END
-from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
 from dotenv import load_dotenv
+import numpy as np
 import pandas as pd
 
 # Import from previous modules
 from prosumer_models import Prosumer, BESS
 from fleet_generator import FleetGenerator
+from fleet_state import FleetState
+from bid_batch import BidBatch
+from bid_cache import BidCache, BidInputs
+from ranking import top_k_indices, select_until_capacity
 from schemas import (
     AgentState, MarketOpportunity, ProsumerBid, AggregatorOffer,
     ProsumerResponse, CoalitionMember, NegotiationSummary
 )
-from agent_framework import VPPAgentFramework
+from llm_gateway import LLMGateway, LangChainBackend
+from llm_cache import LLMResponseCache
+from offline_llm import offline_gateway_from_env
+from telemetry import get_event_stream, get_profiler
 
 
 @dataclass
@@ -57,25 +63,47 @@ class CoreNegotiationEngine:
     and hybrid optimization for VPP bid formulation.
     """
     
-    def __init__(self):
-        """Initialize the negotiation engine."""
-        load_dotenv()
+    def __init__(self, gateway: Optional[LLMGateway] = None, bid_cache: Optional[BidCache] = None):
+        """
+        Initialize the negotiation engine.
         
-        # Initialize LLM
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment variables")
+        Args:
+            gateway: LLM gateway for the engine's prompts; when given, no API key
+                is needed (defaults to the offline backend when
+                VPP_LLM_BACKEND=offline, otherwise Gemini)
+            bid_cache: Keeps prosumer bid inputs between negotiations so that only
+                prosumers whose state moved are re-evaluated (lists of Prosumer
+                objects; FleetState bids are already computed column-wise)
+        """
+        load_dotenv()
         
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-1.5-flash",
-            google_api_key=api_key,
-            temperature=0.3
-        )
+        if gateway is None:
+            gateway = offline_gateway_from_env()
+        
+        if gateway is not None:
+            self.llm = None
+            self.gateway = gateway
+        else:
+            # Initialize LLM
+            api_key = os.getenv('GEMINI_API_KEY')
+            if not api_key:
+                raise ValueError("GEMINI_API_KEY not found in environment variables")
+            
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            
+            self.llm = ChatGoogleGenerativeAI(
+                model="gemini-1.5-flash",
+                google_api_key=api_key,
+                temperature=0.3
+            )
+            self.gateway = LLMGateway(LangChainBackend(self.llm), cache=LLMResponseCache.from_env())
         
         # Negotiation parameters
         self.max_negotiation_rounds = 3
         self.min_coalition_size = 2  # Reduced for small residential VPP
         self.target_profit_margin = 0.15  # 15% profit margin
+        self.max_counter_offers = 25  # Top-ranked bids that receive counter-offers
+        self.bid_cache = bid_cache
         
         # Load system prompts
         self.aggregator_prompt = self._load_prompt('aggregator_prompt.txt')
@@ -88,13 +116,14 @@ class CoreNegotiationEngine:
             with open(prompt_path, 'r') as f:
                 return f.read().strip()
         except FileNotFoundError:
-            print(f"Warning: Prompt file {filename} not found, using default")
+            get_event_stream().warning("prompt_missing", "Prompt file {filename} not found, using default",
+                                       source="negotiation_engine", filename=filename)
             return f"You are a {filename.replace('_prompt.txt', '').replace('_', ' ')} agent."
     
     def run_negotiation(
         self,
         market_opportunity: MarketOpportunity,
-        prosumer_fleet: List[Any],  # List of Prosumer objects
+        prosumer_fleet: Union[List[Any], FleetState],  # Prosumer objects or a FleetState
         market_data: Optional[pd.DataFrame] = None
     ) -> NegotiationResult:
         """
@@ -102,7 +131,8 @@ class CoreNegotiationEngine:
         
         Args:
             market_opportunity: The market opportunity to negotiate for
-            prosumer_fleet: List of available prosumers
+            prosumer_fleet: Available prosumers (Prosumer objects or views, or a
+                FleetState)
             market_data: Current market data for context
             
         Returns:
@@ -110,12 +140,14 @@ class CoreNegotiationEngine:
         """
         import time
         start_time = time.time()
+        profiler = get_profiler()
         
         negotiation_log = []
         negotiation_log.append(f"Starting negotiation for opportunity {market_opportunity.opportunity_id}")
         
         # Round 1: Initial bid collection
-        initial_bids = self._collect_initial_bids(market_opportunity, prosumer_fleet)
+        with profiler.span("collect_bids"):
+            initial_bids = self._collect_initial_bids(market_opportunity, prosumer_fleet)
         negotiation_log.append(f"Collected {len(initial_bids)} initial bids from {len(prosumer_fleet)} prosumers")
         
         if not initial_bids:
@@ -129,17 +161,22 @@ class CoreNegotiationEngine:
                 negotiation_log=negotiation_log
             )
         
-        # Evaluate and rank initial bids
-        ranked_bids = self._evaluate_and_rank_bids(initial_bids, market_opportunity)
+        # Evaluate and rank initial bids (only the counter-offer candidates are ordered)
+        with profiler.span("rank_bids"):
+            ranked_bids = self._evaluate_and_rank_bids(initial_bids, market_opportunity, top_k=self.max_counter_offers)
         negotiation_log.append(f"Ranked bids, top price: ${ranked_bids[0].minimum_price_per_mwh:.2f}/MWh")
         
         # Round 2: Strategic counter-offers
-        counter_offers = self._generate_counter_offers(ranked_bids, market_opportunity)
-        responses = self._collect_counter_responses(counter_offers, prosumer_fleet)
+        with profiler.span("counter_offers"):
+            counter_offers = self._generate_counter_offers(
+                ranked_bids, market_opportunity, competing_offers=len(initial_bids)
+            )
+            responses = self._collect_counter_responses(counter_offers, prosumer_fleet)
         negotiation_log.append(f"Round 2: Received {len(responses)} responses to counter-offers")
         
         # Round 3: Final coalition formation
-        final_coalition = self._form_final_coalition(responses, market_opportunity)
+        with profiler.span("form_coalition"):
+            final_coalition = self._form_final_coalition(responses, market_opportunity)
         negotiation_log.append(f"Final coalition: {len(final_coalition)} members, {sum(m.committed_capacity_kw for m in final_coalition):.1f} kW")
         
         # Calculate results
@@ -181,18 +218,116 @@ class CoreNegotiationEngine:
     def _collect_initial_bids(
         self,
         opportunity: MarketOpportunity,
-        prosumers: List[Prosumer]
-    ) -> List[ProsumerBid]:
-        """Collect initial bids from all prosumers."""
-        bids = []
-        
-        for prosumer in prosumers:
-            # Generate realistic bid based on prosumer assets and preferences
-            bid = self._generate_prosumer_bid(prosumer, opportunity)
-            if bid.is_available and bid.available_capacity_kw > 0:
-                bids.append(bid)
-        
-        return bids
+        prosumers: Union[List[Prosumer], FleetState]
+    ) -> BidBatch:
+        """
+        Collect initial bids from all prosumers.
+        
+        Availability, capacity and minimum price are computed for the whole
+        fleet at once (same rules as _generate_prosumer_bid); the ProsumerBid
+        for an available prosumer is only built when it is read.
+        
+        Args:
+            opportunity: Market opportunity being negotiated
+            prosumers: Prosumer objects (or views), or a FleetState
+            
+        Returns:
+            BidBatch of bids from available prosumers, in fleet order
+        """
+        capacity, min_price, available = self._batch_bid_terms(opportunity, prosumers)
+        rows = np.flatnonzero(available)
+        
+        def build_bid(row: int, available_capacity: float, price: float) -> ProsumerBid:
+            return self._build_prosumer_bid(prosumers[row], opportunity, available_capacity, price, True)
+        
+        return BidBatch(
+            rows,
+            capacity[rows],
+            [round(float(price), 2) for price in min_price[rows]],  # Python rounding, as in the per-prosumer path
+            build_bid
+        )
+    
+    def _batch_bid_terms(
+        self,
+        opportunity: MarketOpportunity,
+        prosumers: Union[List[Prosumer], FleetState]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Fleet-wide available capacity, minimum price and availability.
+        
+        Args:
+            opportunity: Market opportunity being negotiated
+            prosumers: Prosumer objects (or views), or a FleetState
+            
+        Returns:
+            Tuple of (available_capacity_kw, minimum_price_per_mwh, is_available)
+            arrays; prices are not yet rounded
+        """
+        market_type_str = getattr(opportunity.market_type, 'value', opportunity.market_type)
+        
+        if isinstance(prosumers, FleetState):
+            c = prosumers.columns
+            has_bess = c["has_bess"]
+            soc = c["bess_current_soc_percent"]
+            willingness = c["participation_willingness"]
+            backup_hours = c["backup_power_hours"]
+            capacity = prosumers.bess_available_discharge_kw()
+            if market_type_str != "energy":  # ancillary services
+                capacity = np.minimum(capacity, prosumers.bess_available_charge_kw())
+        elif self.bid_cache is not None:
+            capacity, has_bess, soc, willingness, backup_hours = self.bid_cache.bid_inputs(
+                prosumers, market_type_str, self._prosumer_bid_inputs
+            )
+        else:
+            bess = [prosumer.bess for prosumer in prosumers]
+            has_bess = np.array([b is not None for b in bess], dtype=bool)
+            soc = np.array([b.current_soc_percent if b else 0.0 for b in bess], dtype=np.float64)
+            willingness = np.array([p.participation_willingness for p in prosumers], dtype=np.float64)
+            backup_hours = np.array([p.backup_power_hours for p in prosumers], dtype=np.float64)
+            if market_type_str == "energy":
+                capacity = np.array([b.get_available_discharge_capacity_kw() if b else 0.0 for b in bess],
+                                    dtype=np.float64)
+            else:  # ancillary services
+                capacity = np.array([
+                    min(b.get_available_discharge_capacity_kw(), b.get_available_charge_capacity_kw()) if b else 0.0
+                    for b in bess
+                ], dtype=np.float64)
+        
+        # Same availability rules as _generate_prosumer_bid
+        available = (capacity > 1.0) & ~(has_bess & (soc <= 20.0)) & (willingness >= 0.3)
+        capacity = np.where(available, capacity, 0.0)
+        
+        # Same pricing as _calculate_prosumer_price
+        base_price = opportunity.market_price_mwh
+        convenience_premium = base_price * 0.2
+        soc_stress = np.maximum(0, (50.0 - soc) / 50.0)
+        constraint_premium = np.where(has_bess, base_price * soc_stress * 0.3, 0.0)
+        preference_premium = np.where(backup_hours * 7.5 > 40.0, base_price * 0.15, 0.0)
+        market_premium = base_price * 0.1 if market_type_str in ["spin", "nonspin"] else 0.0
+        
+        min_price = base_price + convenience_premium + constraint_premium + preference_premium + market_premium
+        min_price = np.maximum(min_price, opportunity.market_price_mwh * 1.1)
+        min_price = np.minimum(min_price, opportunity.market_price_mwh * 2.0)
+        
+        return capacity, min_price, available & (capacity > 0)
+    
+    @staticmethod
+    def _prosumer_bid_inputs(prosumer: Prosumer, market_type_str: str) -> BidInputs:
+        """One prosumer's capacity and pricing state, as gathered by _batch_bid_terms."""
+        bess = prosumer.bess
+        if bess is None:
+            capacity = 0.0
+        elif market_type_str == "energy":
+            capacity = bess.get_available_discharge_capacity_kw()
+        else:  # ancillary services
+            capacity = min(bess.get_available_discharge_capacity_kw(), bess.get_available_charge_capacity_kw())
+        return (
+            capacity,
+            bess is not None,
+            bess.current_soc_percent if bess else 0.0,
+            prosumer.participation_willingness,
+            prosumer.backup_power_hours
+        )
     
     def _generate_prosumer_bid(self, prosumer: Prosumer, opportunity: MarketOpportunity) -> ProsumerBid:
         """Generate a realistic bid for a prosumer using LLM reasoning."""
@@ -228,6 +363,17 @@ class CoreNegotiationEngine:
         # Calculate pricing using LLM
         min_price = self._calculate_prosumer_price(prosumer, opportunity, available_capacity)
         
+        return self._build_prosumer_bid(prosumer, opportunity, available_capacity, min_price, is_available)
+    
+    def _build_prosumer_bid(
+        self,
+        prosumer: Prosumer,
+        opportunity: MarketOpportunity,
+        available_capacity: float,
+        min_price: float,
+        is_available: bool
+    ) -> ProsumerBid:
+        """Build the ProsumerBid for already computed capacity and price."""
         return ProsumerBid(
             prosumer_id=prosumer.prosumer_id,
             opportunity_id=opportunity.opportunity_id,
@@ -294,10 +440,21 @@ class CoreNegotiationEngine:
     
     def _evaluate_and_rank_bids(
         self,
-        bids: List[ProsumerBid],
-        opportunity: MarketOpportunity
-    ) -> List[ProsumerBid]:
-        """Evaluate and rank bids by cost-effectiveness."""
+        bids: Union[List[ProsumerBid], BidBatch],
+        opportunity: MarketOpportunity,
+        top_k: Optional[int] = None
+    ) -> Union[List[ProsumerBid], BidBatch]:
+        """
+        Evaluate and rank bids by cost-effectiveness.
+        
+        Args:
+            bids: Bids to rank (a list or a BidBatch)
+            opportunity: Market opportunity being negotiated
+            top_k: Only return the best top_k bids (None = all)
+            
+        Returns:
+            Bids in descending score order, ties in their original order
+        """
         
         def bid_score(bid: ProsumerBid) -> float:
             # Score combines price competitiveness and capacity value
@@ -310,14 +467,27 @@ class CoreNegotiationEngine:
             
             return price_score + capacity_score + reliability_score + capacity_bonus
         
+        if isinstance(bids, BidBatch):
+            # Same score on the bid arrays; partial selection when only the top is needed
+            price_score = 1.0 / np.maximum(bids.minimum_price_per_mwh, 1.0)
+            capacity_score = bids.available_capacity_kw / 1000.0
+            capacity_bonus = np.minimum(bids.available_capacity_kw / 10.0, 2.0)
+            scores = price_score + capacity_score + 1.0 + capacity_bonus
+            return bids.reorder(top_k_indices(scores, len(bids) if top_k is None else top_k))
+        
+        if top_k is not None:
+            return heapq.nlargest(top_k, bids, key=bid_score)
         return sorted(bids, key=bid_score, reverse=True)
     
     def _generate_counter_offers(
         self,
         ranked_bids: List[ProsumerBid],
-        opportunity: MarketOpportunity
+        opportunity: MarketOpportunity,
+        competing_offers: Optional[int] = None
     ) -> List[AggregatorOffer]:
         """Generate strategic counter-offers to top-ranked prosumers."""
+        if competing_offers is None:
+            competing_offers = len(ranked_bids)
         
         counter_offers = []
         target_capacity_kw = opportunity.required_capacity_mw * 1000.0
@@ -327,7 +497,7 @@ class CoreNegotiationEngine:
         target_price = opportunity.market_price_mwh * (1.0 + self.target_profit_margin)
         
         # Be more inclusive - counter-offer to more prosumers to build larger coalitions
-        max_offers = min(len(ranked_bids), 25)  # Up to 25 offers instead of 10
+        max_offers = min(len(ranked_bids), self.max_counter_offers)  # Up to 25 offers instead of 10
         
         for i, bid in enumerate(ranked_bids[:max_offers]):  # More inclusive approach
             if committed_capacity >= target_capacity_kw * 1.5:  # Allow 150% of target for redundancy
@@ -356,7 +526,7 @@ class CoreNegotiationEngine:
                 requested_capacity_kw=round(requested_capacity, 2),
                 round_number=2,
                 total_rounds_planned=3,
-                competing_offers=len(ranked_bids),
+                competing_offers=competing_offers,
                 bonus_payment=round(bonus, 2),
                 urgency_level="normal" if i < 5 else "low"
             )
@@ -369,12 +539,22 @@ class CoreNegotiationEngine:
     def _collect_counter_responses(
         self,
         offers: List[AggregatorOffer],
-        prosumers: List[Prosumer]
+        prosumers: Union[List[Prosumer], FleetState]
     ) -> List[ProsumerResponse]:
         """Collect responses to counter-offers from prosumers."""
         
         responses = []
-        prosumer_dict = {p.prosumer_id: p for p in prosumers}
+        if isinstance(prosumers, FleetState):
+            # Views only for the offer targets, found through the fleet's id index
+            prosumer_dict = {}
+            for offer in offers:
+                for prosumer_id in offer.target_prosumer_ids:
+                    try:
+                        prosumer_dict[prosumer_id] = prosumers[prosumers.index_of(prosumer_id)]
+                    except KeyError:
+                        continue
+        else:
+            prosumer_dict = {p.prosumer_id: p for p in prosumers}
         
         for offer in offers:
             for prosumer_id in offer.target_prosumer_ids:
@@ -455,50 +635,44 @@ class CoreNegotiationEngine:
         coalition = []
         accepted_responses = [r for r in responses if r.is_accepted]
         
-        # Sort by cost-effectiveness
-        def response_score(response: ProsumerResponse) -> float:
-            price_score = 1.0 / max(response.updated_price_per_mwh or 50.0, 1.0)
-            capacity_score = response.updated_capacity_kw / 1000.0
-            confidence_score = response.confidence_level
-            return price_score + capacity_score + confidence_score
+        # Score by cost-effectiveness
+        prices = np.array([r.updated_price_per_mwh or 50.0 for r in accepted_responses], dtype=np.float64)
+        capacities = np.array([r.updated_capacity_kw for r in accepted_responses], dtype=np.float64)
+        confidence = np.array([r.confidence_level for r in accepted_responses], dtype=np.float64)
+        scores = 1.0 / np.maximum(prices, 1.0) + capacities / 1000.0 + confidence
         
-        sorted_responses = sorted(accepted_responses, key=response_score, reverse=True)
-        
-        total_capacity = 0.0
         target_capacity = opportunity.required_capacity_mw * 1000.0
         
         # Include more prosumers for redundancy and better satisfaction
         # Allow up to 150% of target capacity or maximum available prosumers
         capacity_limit = target_capacity * 1.5
         
-        for response in sorted_responses:
-            # Include prosumer if we haven't exceeded capacity limit or if we need more capacity
-            if total_capacity < target_capacity or (total_capacity < capacity_limit and len(coalition) < len(sorted_responses)):
-                
-                # Create coalition member with compatibility for both schema versions
-                try:
-                    member = CoalitionMember(
-                        prosumer_id=response.prosumer_id,
-                        committed_capacity_kw=response.updated_capacity_kw,
-                        agreed_price_per_mwh=response.updated_price_per_mwh or 75.0,
-                        dispatch_schedule={response.prosumer_id: response.updated_capacity_kw},
-                        asset_type="BESS",  # Simplified for demo
-                        technical_constraints={"max_power_kw": 5.0, "efficiency": 0.95}
-                    )
-                except TypeError:
-                    # Fallback for different schema versions
-                    from dataclasses import dataclass
-                    member = type('CoalitionMember', (), {
-                        'prosumer_id': response.prosumer_id,
-                        'committed_capacity_kw': response.updated_capacity_kw,
-                        'agreed_price_per_mwh': response.updated_price_per_mwh or 75.0,
-                        'satisfaction_score': 6.0,  # Realistic satisfaction baseline
-                        'technical_constraints': {},
-                        'dispatch_flexibility': 0.8
-                    })()
-                
-                coalition.append(member)
-                total_capacity += response.updated_capacity_kw
+        # Best responses first until the committed capacity reaches the limit
+        for index in select_until_capacity(scores, capacities, capacity_limit):
+            response = accepted_responses[index]
+            # Create coalition member with compatibility for both schema versions
+            try:
+                member = CoalitionMember(
+                    prosumer_id=response.prosumer_id,
+                    committed_capacity_kw=response.updated_capacity_kw,
+                    agreed_price_per_mwh=response.updated_price_per_mwh or 75.0,
+                    dispatch_schedule={response.prosumer_id: response.updated_capacity_kw},
+                    asset_type="BESS",  # Simplified for demo
+                    technical_constraints={"max_power_kw": 5.0, "efficiency": 0.95}
+                )
+            except TypeError:
+                # Fallback for different schema versions
+                from dataclasses import dataclass
+                member = type('CoalitionMember', (), {
+                    'prosumer_id': response.prosumer_id,
+                    'committed_capacity_kw': response.updated_capacity_kw,
+                    'agreed_price_per_mwh': response.updated_price_per_mwh or 75.0,
+                    'satisfaction_score': 6.0,  # Realistic satisfaction baseline
+                    'technical_constraints': {},
+                    'dispatch_flexibility': 0.8
+                })()
+            
+            coalition.append(member)
         
         return coalition
     
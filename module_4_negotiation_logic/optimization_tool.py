@@ -9,7 +9,6 @@ finds the optimal dispatch solution.
 import os
 import sys
 import json
-import cvxpy as cp
 import numpy as np
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
@@ -18,11 +17,14 @@ from dataclasses import dataclass
 # Add paths for imports
 sys.path.append('../module_3_agentic_framework')
 
-from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
 from dotenv import load_dotenv
 
 from schemas import MarketOpportunity, CoalitionMember
+from dispatch_solvers import CachedDispatchProblem, ECOS, OPTIMAL
+from llm_gateway import LLMGateway, LangChainBackend
+from llm_cache import LLMResponseCache
+from offline_llm import offline_gateway_from_env
+from telemetry import get_profiler
 
 
 @dataclass
@@ -45,30 +47,52 @@ class OptimizationTool:
     and then passes it to CVXPY for numerical solution.
     """
     
-    def __init__(self):
-        """Initialize the optimization tool."""
-        load_dotenv()
+    def __init__(self, solver: str = ECOS, gateway: Optional[LLMGateway] = None):
+        """
+        Initialize the optimization tool.
         
-        # Initialize LLM
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY not found in environment variables")
+        Args:
+            solver: CVXPY solver name, or "greedy" for the exact sort-based fast path
+            gateway: LLM gateway for guidance and code generation prompts; when
+                given, no API key is needed (defaults to the offline backend when
+                VPP_LLM_BACKEND=offline, otherwise Gemini)
+        """
+        load_dotenv()
         
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-1.5-flash",
-            google_api_key=api_key,
-            temperature=0.1  # Low temperature for consistent optimization
-        )
+        if gateway is None:
+            gateway = offline_gateway_from_env()
+        
+        if gateway is not None:
+            self.llm = None
+            self.gateway = gateway
+        else:
+            # Initialize LLM
+            api_key = os.getenv('GEMINI_API_KEY')
+            if not api_key:
+                raise ValueError("GEMINI_API_KEY not found in environment variables")
+            
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            
+            self.llm = ChatGoogleGenerativeAI(
+                model="gemini-1.5-flash",
+                google_api_key=api_key,
+                temperature=0.1  # Low temperature for consistent optimization
+            )
+            self.gateway = LLMGateway(LangChainBackend(self.llm), cache=LLMResponseCache.from_env())
         
         # Optimization parameters
         self.min_profit_margin = 0.05  # 5% minimum profit margin
         self.reliability_buffer = 0.05  # 5% capacity buffer for reliability
         
+        # Parametrized dispatch problems, cached per coalition-size bucket
+        self.dispatch_problem = CachedDispatchProblem(solver=solver)
+        
     def formulate_and_submit_bid(
         self,
         opportunity: MarketOpportunity,
         coalition: List[CoalitionMember],
-        market_context: Dict[str, Any] = None
+        market_context: Dict[str, Any] = None,
+        guidance: Optional[Dict[str, Any]] = None
     ) -> OptimizationResult:
         """
         Main optimization function that formulates and solves the bid optimization problem.
@@ -77,10 +101,13 @@ class OptimizationTool:
             opportunity: Market opportunity details
             coalition: List of committed coalition members
             market_context: Additional market information
+            guidance: LLM guidance already fetched with generate_guidance_batch
+                (skips the LLM call)
             
         Returns:
             OptimizationResult: Complete optimization outcome
         """
+        profiler = get_profiler()
         optimization_log = []
         optimization_log.append(f"Starting optimization for opportunity {opportunity.opportunity_id}")
         optimization_log.append(f"Coalition size: {len(coalition)} members")
@@ -98,15 +125,23 @@ class OptimizationTool:
         
         try:
             # Step 1: Generate optimization problem using LLM
-            optimization_problem = self._generate_optimization_problem(
-                opportunity, coalition, market_context
-            )
-            optimization_log.append("Generated optimization problem structure")
+            if guidance is not None:
+                optimization_problem = guidance
+                optimization_log.append("Using prefetched optimization problem structure")
+            else:
+                with profiler.span("llm_guidance"):
+                    optimization_problem = self._generate_optimization_problem(
+                        opportunity, coalition, market_context
+                    )
+                optimization_log.append("Generated optimization problem structure")
             
             # Step 2: Solve using CVXPY
-            solution = self._solve_optimization_problem(
-                opportunity, coalition, optimization_problem
-            )
+            with profiler.span("dispatch_solve"):
+                solution = self._solve_optimization_problem(
+                    opportunity, coalition, optimization_problem
+                )
+                profiler.add("canonicalize", solution.get("compile_time", 0.0))
+                profiler.add("solver", solution["solver_time"])
             optimization_log.append(f"Solved optimization: {solution['status']}")
             
             # Step 3: Format results
@@ -140,6 +175,36 @@ class OptimizationTool:
         This function asks the LLM to analyze the problem and provide
         optimization guidance rather than generating executable code.
         """
+        prompt = self._build_guidance_prompt(opportunity, coalition, market_context)
+        return self._parse_guidance(opportunity, self.gateway.generate_sync(prompt))
+    
+    def generate_guidance_batch(
+        self,
+        requests: List[Tuple[MarketOpportunity, List[CoalitionMember], Optional[Dict[str, Any]]]]
+    ) -> List[Any]:
+        """
+        Fetch LLM guidance for several opportunities at once.
+        
+        Args:
+            requests: (opportunity, coalition, market_context) per opportunity
+            
+        Returns:
+            Guidance dict per request, in order, or the exception for a failed call
+        """
+        prompts = [self._build_guidance_prompt(*request) for request in requests]
+        responses = self.gateway.generate_many_sync(prompts, return_exceptions=True)
+        return [
+            response if isinstance(response, Exception) else self._parse_guidance(request[0], response)
+            for request, response in zip(requests, responses)
+        ]
+    
+    def _build_guidance_prompt(
+        self,
+        opportunity: MarketOpportunity,
+        coalition: List[CoalitionMember],
+        market_context: Dict[str, Any] = None
+    ) -> str:
+        """Build the optimization guidance prompt."""
         
         # Prepare context for LLM
         coalition_summary = []
@@ -148,8 +213,8 @@ class OptimizationTool:
                 "prosumer_id": member.prosumer_id,
                 "capacity_kw": member.committed_capacity_kw,
                 "price_mwh": member.agreed_price_per_mwh,
-                "satisfaction": member.satisfaction_score,
-                "flexibility": member.dispatch_flexibility
+                "satisfaction": getattr(member, 'satisfaction_score', 6.0),
+                "flexibility": getattr(member, 'dispatch_flexibility', 0.8)
             })
         
         context = {
@@ -185,17 +250,16 @@ Provide optimization recommendations including:
 
 Format your response as structured recommendations, not code.
 """
-        
-        # Get LLM response
-        response = self.llm.invoke([HumanMessage(content=prompt)])
-        
-        # Parse LLM recommendations into structured format
+        return prompt
+    
+    def _parse_guidance(self, opportunity: MarketOpportunity, response_text: str) -> Dict[str, Any]:
+        """Parse LLM recommendations into structured format."""
         recommendations = {
             "dispatch_strategy": "proportional",  # Default strategy
             "bid_price_guidance": opportunity.market_price_mwh * 0.95,
             "risk_factors": ["market_volatility", "prosumer_reliability"],
             "constraints": ["capacity_limits", "satisfaction_scores"],
-            "llm_analysis": response.content
+            "llm_analysis": response_text
         }
         
         return recommendations
@@ -210,57 +274,24 @@ Format your response as structured recommendations, not code.
         Solve the optimization problem using CVXPY.
         
         This implements a concrete optimization formulation based on
-        the LLM guidance and coalition constraints.
+        the LLM guidance and coalition constraints. The problem is cached
+        per coalition-size bucket and re-solved with new parameter values;
+        the bid price is fixed at 2% below market, which is where the joint
+        price/dispatch optimum always lies (see CachedDispatchProblem).
         """
         
-        n_prosumers = len(coalition)
-        
-        # Decision variables
-        dispatch = cp.Variable(n_prosumers, nonneg=True)  # Dispatch for each prosumer (kW)
-        bid_price = cp.Variable()  # VPP bid price ($/MWh)
-        
         # Parameters
         capacities = np.array([member.committed_capacity_kw for member in coalition])
         agreed_prices = np.array([member.agreed_price_per_mwh for member in coalition])
-        satisfaction_weights = np.array([member.satisfaction_score / 10.0 for member in coalition])
+        satisfaction_weights = np.array([getattr(member, 'satisfaction_score', 6.0) / 10.0 for member in coalition])
         
         # Market parameters
         market_price = opportunity.market_price_mwh
         required_capacity_kw = opportunity.required_capacity_mw * 1000.0
         
-        # Objective: Maximize profit while maintaining satisfaction
-        revenue = bid_price * cp.sum(dispatch) / 1000.0  # Convert kW to MW
-        costs = cp.sum(cp.multiply(agreed_prices, dispatch)) / 1000.0  # Prosumer payments
-        satisfaction_bonus = cp.sum(cp.multiply(satisfaction_weights, dispatch)) * 0.1  # Small bonus
-        
-        objective = cp.Maximize(revenue - costs + satisfaction_bonus)
-        
-        # Constraints
-        constraints = []
-        
-        # Capacity constraints for each prosumer
-        constraints.append(dispatch <= capacities)
-        
-        # Total capacity constraint (meet at least 90% of requirement)
-        constraints.append(cp.sum(dispatch) >= required_capacity_kw * 0.9)
-        constraints.append(cp.sum(dispatch) <= required_capacity_kw * 1.1)
-        
-        # Bid price constraints (must be competitive)
-        constraints.append(bid_price <= market_price * 0.98)  # At most 2% below market
-        constraints.append(bid_price >= cp.sum(cp.multiply(agreed_prices, dispatch)) / cp.sum(dispatch) * 1.05)  # At least 5% profit
-        
-        # Solve the problem
-        problem = cp.Problem(objective, constraints)
-        problem.solve(solver=cp.ECOS)
-        
-        # Return solution
-        return {
-            "status": problem.status,
-            "optimal_value": problem.value,
-            "dispatch_values": dispatch.value if dispatch.value is not None else np.zeros(n_prosumers),
-            "bid_price_value": bid_price.value if bid_price.value is not None else 0.0,
-            "solver_time": problem.solver_stats.solve_time if hasattr(problem.solver_stats, 'solve_time') else 0.0
-        }
+        return self.dispatch_problem.solve(
+            capacities, agreed_prices, satisfaction_weights, market_price, required_capacity_kw
+        )
     
     def _format_optimization_result(
         self,
@@ -271,7 +302,7 @@ Format your response as structured recommendations, not code.
     ) -> OptimizationResult:
         """Format the optimization solution into a structured result."""
         
-        success = solution["status"] == cp.OPTIMAL
+        success = solution["status"] == OPTIMAL
         
         if not success:
             return OptimizationResult(
@@ -366,8 +397,7 @@ The script should be executable and return a dictionary with:
 Return only the Python code, no explanations.
 """
         
-        response = self.llm.invoke([HumanMessage(content=prompt)])
-        return response.content
+        return self.gateway.generate_sync(prompt)
 
 
 def test_optimization_tool():
@@ -0,0 +1,86 @@
+"""
+Score Ranking Helpers for VPP LLM Agent - Module 4
+
+Selection over score arrays for negotiation rounds that only use the best few
+candidates: the top k bids that receive counter-offers, and the best
+responses up to a capacity limit for the final coalition. Both use
+np.partition to order only the candidates that can be selected, and give
+exactly the result of a full stable sort by descending score followed by
+taking a prefix.
+"""
+
+from typing import List
+
+import numpy as np
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first.
+
+    Ties keep index order, so the result equals
+    np.argsort(-scores, kind="stable")[:k].
+
+    Args:
+        scores: Score per candidate
+        k: Number of candidates to keep
+
+    Returns:
+        Up to k indices into scores
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    n = len(scores)
+    if k >= n:
+        return np.argsort(-scores, kind="stable")
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    # Everything strictly better than the k-th best, then ties in index order
+    kth = -np.partition(-scores, k - 1)[k - 1]
+    better = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[:k - len(better)]
+    candidates = np.concatenate([better, ties])
+    candidates.sort()
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def select_until_capacity(
+    scores: np.ndarray,
+    capacities: np.ndarray,
+    capacity_limit: float,
+    initial_window: int = 32
+) -> List[int]:
+    """
+    Best candidates, in score order, while the capacity taken so far is below the limit.
+
+    Equivalent to sorting by descending score (ties in index order) and adding
+    candidates until the running total of capacities reaches capacity_limit.
+    Only a top-k window is ordered; the window grows fourfold until the
+    cumulative capacity inside it crosses the limit.
+
+    Args:
+        scores: Score per candidate
+        capacities: Capacity per candidate (kW)
+        capacity_limit: Stop once the selected capacity reaches this (kW)
+        initial_window: Size of the first top-k window
+
+    Returns:
+        Selected indices, best first
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    capacities = np.asarray(capacities, dtype=np.float64)
+    n = len(scores)
+    if n == 0:
+        return []
+
+    window = min(n, max(1, initial_window))
+    while True:
+        order = top_k_indices(scores, window)
+        # Capacity already taken before each candidate (sequential sums, as in a loop)
+        taken_before = np.concatenate(([0.0], np.cumsum(capacities[order])[:-1]))
+        reached = np.flatnonzero(taken_before >= capacity_limit)
+        if len(reached):
+            return order[:reached[0]].tolist()
+        if window == n:
+            return order.tolist()
+        window = min(n, window * 4)
@@ -30,6 +30,11 @@ except ImportError as e:
     print(f"Warning: Main imports not available: {e}")
     MAIN_IMPORTS_AVAILABLE = False
 
+import numpy as np
+import cvxpy as cp
+
+from dispatch_solvers import CachedDispatchProblem, GREEDY_SOLVER, solve_dispatch_greedy
+
 # Test data structures
 class TestProsumer:
     """Mock prosumer class for testing."""
@@ -215,6 +220,187 @@ class TestModule4Negotiation(unittest.TestCase):
             )
 
 
+class TestModule4FleetBids(unittest.TestCase):
+    """Test batch, cached and FleetState bid collection (offline gateway, no API key needed)."""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Set up test environment."""
+        if not MAIN_IMPORTS_AVAILABLE:
+            cls.skipTest(cls, "Main module imports not available")
+    
+    def setUp(self):
+        """Set up test data and an offline engine."""
+        self.engine = self._engine()
+        self.test_opportunity = TestMarketOpportunity()
+        self.test_prosumers = [
+            TestProsumer(f"test_prosumer_{i:03d}", 13.5, 60 + i*5)
+            for i in range(8)
+        ]
+        self.test_market_data = pd.DataFrame({
+            'timestamp': [datetime(2023, 8, 15, 12, 0, 0)],
+            'lmp': [80.0],
+            'spin_price': [12.0],
+            'nonspin_price': [6.0]
+        })
+    
+    @staticmethod
+    def _engine(**kwargs) -> "CoreNegotiationEngine":
+        """Negotiation engine on the offline LLM backend."""
+        from llm_gateway import LLMGateway
+        from offline_llm import OfflineBackend
+        
+        return CoreNegotiationEngine(gateway=LLMGateway(OfflineBackend()), **kwargs)
+    
+    def test_batch_bids_match_per_prosumer_path(self):
+        """Test batch bid collection matches filtering _generate_prosumer_bid results."""
+        from prosumer_models import Prosumer, BESS
+        from fleet_state import FleetState
+        
+        fleet = self.test_prosumers + [TestProsumer("low_soc", 13.5, 18.0), TestProsumer("no_bess", 13.5, 60.0)]
+        fleet[-1].bess = None
+        fleet[0].participation_willingness = 0.2
+        fleet[1].backup_power_hours = 8.0
+        pydantic_fleet = [
+            Prosumer(prosumer_id=f"p{i}", load_profile_id="lp", backup_power_hours=2.0 + i,
+                     bess=BESS(capacity_kwh=10.0 + i, max_power_kw=5.0, current_soc_percent=15.0 + 7 * i))
+            for i in range(10)
+        ]
+        
+        for market_type in ("energy", "spin"):
+            self.test_opportunity.market_type = market_type
+            for prosumers in (fleet, pydantic_fleet, FleetState.from_prosumers(pydantic_fleet)):
+                expected = [bid for bid in (self.engine._generate_prosumer_bid(p, self.test_opportunity)
+                                            for p in prosumers)
+                            if bid.is_available and bid.available_capacity_kw > 0]
+                bids = self.engine._collect_initial_bids(self.test_opportunity, prosumers)
+                self.assertGreater(len(expected), 0)
+                
+                # Ranking the batch builds no bids and matches ranking the objects
+                ranked = self.engine._evaluate_and_rank_bids(bids, self.test_opportunity)
+                self.assertEqual(bids.built, 0)
+                expected_ranked = self.engine._evaluate_and_rank_bids(expected, self.test_opportunity)
+                self.assertEqual([b.model_dump() for b in ranked], [b.model_dump() for b in expected_ranked])
+                self.assertEqual([b.model_dump() for b in bids], [b.model_dump() for b in expected])
+    
+    def test_bid_cache_reevaluates_only_moved_prosumers(self):
+        """Test cached bids match fresh ones and only prosumers whose state moved are re-evaluated."""
+        from bid_cache import BidCache
+        
+        cache = BidCache(soc_step_percent=0)
+        cached_engine = self._engine(bid_cache=cache)
+        
+        def bid_dumps(engine):
+            return [b.model_dump() for b in engine._collect_initial_bids(self.test_opportunity, self.test_prosumers)]
+        
+        self.assertEqual(bid_dumps(cached_engine), bid_dumps(self.engine))
+        self.assertEqual((cache.stats.misses, cache.stats.hits), (8, 0))
+        
+        # New price, same state: every prosumer is a hit and prices follow the market
+        self.test_opportunity.market_price_mwh = 95.0
+        self.assertEqual(bid_dumps(cached_engine), bid_dumps(self.engine))
+        self.assertEqual(cache.last_reevaluated, 0)
+        
+        self.test_prosumers[2].bess.current_soc_percent = 90.0
+        self.test_prosumers[5].participation_willingness = 0.1  # Preference changes are invalidated explicitly
+        cache.invalidate("test_prosumer_005")
+        self.assertEqual(bid_dumps(cached_engine), bid_dumps(self.engine))
+        self.assertEqual(cache.last_reevaluated, 2)
+        self.assertAlmostEqual(cache.stats.hit_rate, 14 / 24)
+        
+        # Within an SOC bucket, the cached bid is kept
+        bucketed = BidCache(soc_step_percent=5.0)
+        bucketed_engine = self._engine(bid_cache=bucketed)
+        def terms(engine):
+            bids = engine._collect_initial_bids(self.test_opportunity, self.test_prosumers)
+            return list(zip(bids.available_capacity_kw, bids.minimum_price_per_mwh))
+        
+        first = terms(bucketed_engine)
+        self.test_prosumers[0].bess.current_soc_percent += 0.5  # 60.0 -> 60.5, same 5% bucket
+        self.assertEqual(terms(bucketed_engine), first)
+        self.assertEqual(bucketed.last_reevaluated, 0)
+
+    def test_bid_cache_not_used_for_fleet_state(self):
+        """Test a FleetState is evaluated directly: same bids as without a cache, no cache lookups."""
+        from bid_cache import BidCache
+        from prosumer_models import Prosumer, BESS
+        from fleet_state import FleetState
+
+        prosumers = [
+            Prosumer(prosumer_id=f"p{i}", load_profile_id="lp", backup_power_hours=2.0 + i,
+                     bess=BESS(capacity_kwh=10.0 + i, max_power_kw=5.0, current_soc_percent=40.0 + 6 * i))
+            for i in range(8)
+        ]
+        fleet = FleetState.from_prosumers(prosumers)
+        cache = BidCache(soc_step_percent=5.0)
+        cached_engine = self._engine(bid_cache=cache)
+
+        for _ in range(2):
+            cached = cached_engine._collect_initial_bids(self.test_opportunity, fleet)
+            plain = self.engine._collect_initial_bids(self.test_opportunity, fleet)
+            self.assertEqual([b.model_dump() for b in cached], [b.model_dump() for b in plain])
+            fleet[2].bess.current_soc_percent += 0.5  # Within a bucket, still exact
+        self.assertEqual((cache.stats.lookups, len(cache)), (0, 0))
+
+    def test_fleet_state_negotiation_matches_list(self):
+        """Test a negotiation over a FleetState forms the same coalition as over Prosumer objects."""
+        from prosumer_models import Prosumer, BESS
+        from fleet_state import FleetState
+        
+        rng = np.random.default_rng(4)
+        prosumers = [
+            Prosumer(prosumer_id=f"p{i:03d}", load_profile_id="lp",
+                     participation_willingness=float(rng.uniform(0.2, 1.0)),
+                     bess=BESS(capacity_kwh=13.5, max_power_kw=5.0, current_soc_percent=float(rng.uniform(15, 95))))
+            for i in range(300)
+        ]
+        self.test_opportunity.required_capacity_mw = 0.05
+        
+        snapshot = FleetState.from_prosumers(prosumers).snapshot()
+        results = [self.engine.run_negotiation(self.test_opportunity, fleet, self.test_market_data)
+                   for fleet in (prosumers, snapshot)]
+        members = [[(m.prosumer_id, m.committed_capacity_kw, m.agreed_price_per_mwh) for m in r.coalition_members]
+                   for r in results]
+        self.assertGreater(len(members[0]), 0)
+        self.assertEqual(members[0], members[1])
+        self.assertEqual(results[0].final_bid_price, results[1].final_bid_price)
+        
+        # Negotiation only reads the fleet, so the snapshot copies no columns
+        self.assertEqual(snapshot.nbytes(), 0)
+
+
+class TestModule4Ranking(unittest.TestCase):
+    """Test top-k and capacity-cutoff selection."""
+    
+    def test_top_k_matches_stable_sort(self):
+        """Test top-k selection equals the prefix of a full stable sort, ties included."""
+        from ranking import top_k_indices
+        
+        rng = np.random.default_rng(2)
+        for scores in (rng.uniform(0, 1, 500), rng.integers(0, 5, 500).astype(float), np.ones(30)):
+            full = np.argsort(-scores, kind="stable")
+            for k in (0, 1, 7, 25, len(scores), len(scores) + 3):
+                np.testing.assert_array_equal(top_k_indices(scores, k), full[:k])
+    
+    def test_capacity_cutoff_matches_sorted_loop(self):
+        """Test heap selection equals sorting and adding members until the limit."""
+        from ranking import select_until_capacity
+        
+        rng = np.random.default_rng(3)
+        for _ in range(20):
+            n = int(rng.integers(0, 60))
+            scores = rng.integers(0, 8, n).astype(float)
+            capacities = rng.uniform(-2.0, 10.0, n)  # Counter-offers can request negative capacity
+            limit = float(rng.uniform(0, 200))
+            
+            expected, total = [], 0.0
+            for i in np.argsort(-scores, kind="stable"):
+                if total < limit:
+                    expected.append(int(i))
+                    total += capacities[i]
+            self.assertEqual(select_until_capacity(scores, capacities, limit), expected)
+
+
 class TestModule4Optimization(unittest.TestCase):
     """Test optimization functionality."""
     
@@ -270,6 +456,164 @@ class TestModule4Optimization(unittest.TestCase):
         self.assertIn('objective', code.lower())
 
 
+class TestModule4DispatchSolvers(unittest.TestCase):
+    """Test the cached, parametrized dispatch problem."""
+    
+    def setUp(self):
+        """Set up a small coalition."""
+        self.capacities = np.array([4.0, 6.0, 2.5, 8.0, 5.0])
+        self.agreed_prices = np.array([60.0, 72.0, 55.0, 80.0, 66.0])
+        self.weights = np.array([0.8, 0.7, 0.9, 0.6, 0.85])
+        self.market_price = 85.0
+        self.required_kw = 15.0
+    
+    def _reference_solve(self):
+        """Unpadded LP with the bid fixed at 98% of market."""
+        dispatch = cp.Variable(len(self.capacities), nonneg=True)
+        bid = 0.98 * self.market_price
+        objective = cp.Maximize(
+            bid * cp.sum(dispatch) / 1000.0
+            - self.agreed_prices @ dispatch / 1000.0
+            + 0.1 * (self.weights @ dispatch)
+        )
+        constraints = [
+            dispatch <= self.capacities,
+            cp.sum(dispatch) >= 0.9 * self.required_kw,
+            cp.sum(dispatch) <= 1.1 * self.required_kw,
+            bid * cp.sum(dispatch) >= 1.05 * (self.agreed_prices @ dispatch)
+        ]
+        problem = cp.Problem(objective, constraints)
+        problem.solve(solver=cp.ECOS)
+        return problem.value, dispatch.value
+    
+    def test_cached_problem_matches_reference(self):
+        """Test the padded, cached problem reproduces the direct LP."""
+        solver = CachedDispatchProblem()
+        ref_value, ref_dispatch = self._reference_solve()
+        
+        result = solver.solve(self.capacities, self.agreed_prices, self.weights,
+                              self.market_price, self.required_kw)
+        
+        self.assertEqual(result['status'], cp.OPTIMAL)
+        self.assertEqual(len(result['dispatch_values']), len(self.capacities))
+        self.assertAlmostEqual(result['optimal_value'], ref_value, places=5)
+        np.testing.assert_allclose(result['dispatch_values'], ref_dispatch, atol=1e-5)
+        self.assertAlmostEqual(result['bid_price_value'], 0.98 * self.market_price)
+        
+        # Price floor: bid covers the dispatch-weighted prosumer price plus 5%
+        dispatch = result['dispatch_values']
+        self.assertGreaterEqual(result['bid_price_value'] * dispatch.sum() + 1e-6,
+                                1.05 * float(self.agreed_prices @ dispatch))
+    
+    def test_problem_cache_reuse(self):
+        """Test coalitions in the same bucket reuse one problem."""
+        solver = CachedDispatchProblem()
+        first = solver.solve(self.capacities, self.agreed_prices, self.weights,
+                             self.market_price, self.required_kw)
+        second = solver.solve(self.capacities[:3], self.agreed_prices[:3], self.weights[:3],
+                              self.market_price, 8.0)
+        third = solver.solve(self.capacities, self.agreed_prices, self.weights,
+                             self.market_price, self.required_kw)
+        
+        self.assertEqual(solver.cache_info(), {'hits': 2, 'misses': 1, 'buckets': [8],
+                                               'greedy_solves': 0, 'greedy_fallbacks': 0})
+        self.assertEqual(second['status'], cp.OPTIMAL)
+        np.testing.assert_allclose(first['dispatch_values'], third['dispatch_values'], atol=1e-6)
+        self.assertEqual(solver.bucket_size(9), 16)
+    
+    def test_greedy_matches_ecos(self):
+        """Test the greedy fast path reaches the ECOS optimum on random coalitions."""
+        rng = np.random.default_rng(7)
+        greedy = CachedDispatchProblem(solver=GREEDY_SOLVER)
+        ecos = CachedDispatchProblem()
+        
+        for _ in range(25):
+            n = int(rng.integers(3, 30))
+            capacities = rng.uniform(1.0, 10.0, n)
+            market_price = float(rng.uniform(40.0, 150.0))
+            prices = market_price * rng.uniform(0.6, 0.95, n)
+            weights = rng.uniform(0.5, 1.0, n)
+            required_kw = float(capacities.sum() * rng.uniform(0.3, 1.2))
+            
+            fast = greedy.solve(capacities, prices, weights, market_price, required_kw)
+            reference = ecos.solve(capacities, prices, weights, market_price, required_kw)
+            
+            self.assertEqual(fast['status'], reference['status'])
+            if reference['status'] == cp.OPTIMAL:
+                self.assertAlmostEqual(fast['optimal_value'], reference['optimal_value'], places=5)
+                self.assertAlmostEqual(fast['dispatch_values'].sum(),
+                                       reference['dispatch_values'].sum(), places=4)
+                self.assertTrue(np.all(fast['dispatch_values'] <= capacities + 1e-9))
+        
+        self.assertGreater(greedy.cache_info()['greedy_solves'], 0)
+    
+    def test_greedy_falls_back_when_floor_binds(self):
+        """Test the greedy path hands over to CVXPY when the price floor is active."""
+        # Expensive prosumers with a large satisfaction weight would break the 5% floor
+        prices = np.array([60.0, 95.0, 95.0])
+        weights = np.array([0.0, 1.0, 1.0])
+        capacities = np.array([5.0, 5.0, 5.0])
+        solver = CachedDispatchProblem(solver=GREEDY_SOLVER)
+        
+        result = solver.solve(capacities, prices, weights, self.market_price, 12.0)
+        reference = CachedDispatchProblem().solve(capacities, prices, weights, self.market_price, 12.0)
+        
+        self.assertEqual(solver.cache_info()['greedy_fallbacks'], 1)
+        self.assertEqual(result['status'], reference['status'])
+        if reference['optimal_value'] is not None:
+            self.assertAlmostEqual(result['optimal_value'], reference['optimal_value'], places=5)
+    
+    def test_greedy_dispatch_order(self):
+        """Test solve_dispatch_greedy fills by profit and respects total limits."""
+        profit = np.array([0.3, -0.1, 0.5, 0.2])
+        capacities = np.array([2.0, 4.0, 1.0, 3.0])
+        
+        status, dispatch = solve_dispatch_greedy(profit, capacities, max_total_kw=4.0)
+        self.assertEqual(status, cp.OPTIMAL)
+        np.testing.assert_allclose(dispatch, [2.0, 0.0, 1.0, 1.0])
+        
+        # Minimum forces some unprofitable dispatch
+        status, dispatch = solve_dispatch_greedy(profit, capacities, min_total_kw=8.0)
+        np.testing.assert_allclose(dispatch, [2.0, 2.0, 1.0, 3.0])
+        
+        # Tied marginal prosumers split in proportion to capacity
+        status, dispatch = solve_dispatch_greedy(np.array([0.1, 0.1]), np.array([1.0, 3.0]), max_total_kw=2.0)
+        np.testing.assert_allclose(dispatch, [0.5, 1.5])
+        
+        status, _ = solve_dispatch_greedy(profit, capacities, min_total_kw=20.0)
+        self.assertEqual(status, cp.INFEASIBLE)
+
+
+class TestModule4Gateway(unittest.TestCase):
+    """Test the optimization tool's LLM calls through a stub gateway (no API key needed)."""
+    
+    @unittest.skipIf(not MAIN_IMPORTS_AVAILABLE, "Main module imports not available")
+    def test_guidance_batch_through_gateway(self):
+        """Test guidance for several opportunities is fetched concurrently and in order."""
+        from llm_gateway import LLMGateway, StubBackend
+        
+        backend = StubBackend(latency_seconds=0.01, responder=lambda prompt: prompt.split("Market Price: ")[1][:7])
+        tool = OptimizationTool(solver=GREEDY_SOLVER, gateway=LLMGateway(backend, max_concurrency=4))
+        
+        opportunities = []
+        for i in range(6):
+            opportunity = TestMarketOpportunity()
+            opportunity.opportunity_id = f"opp_{i}"
+            opportunity.market_price_mwh = 80.0 + i
+            opportunities.append(opportunity)
+        coalition = [TestCoalitionMember(f"prosumer_{i:03d}", 400 + i * 100, 60 + i) for i in range(4)]
+        
+        guidance = tool.generate_guidance_batch([(opp, coalition, None) for opp in opportunities])
+        
+        self.assertEqual([g["llm_analysis"] for g in guidance], [f"${80 + i}.00/" for i in range(6)])
+        self.assertGreater(backend.max_in_flight, 1)
+        
+        # Prefetched guidance is used without another LLM call
+        result = tool.formulate_and_submit_bid(opportunities[0], coalition, guidance=guidance[0])
+        self.assertTrue(result.success)
+        self.assertEqual(backend.calls, 6)
+
+
 class TestModule4Integration(unittest.TestCase):
     """Test integrated system functionality."""
     
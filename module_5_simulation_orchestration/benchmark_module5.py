@@ -0,0 +1,158 @@
+"""
+Benchmark script for Module 5: Market Data Lookup and Rolling-Horizon Optimization
+Compares the indexed market data lookup against a full-table scan per timestep,
+times fleet-wide rolling-horizon plans (first solve and warm re-solves), and
+measures simulation throughput with the hybrid LLM step answered by the
+offline backend at several synthetic latencies (no API key needed).
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import warnings
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from market_index import MarketDataIndex
+from rolling_horizon import RollingHorizonOptimizer
+from fleet_generator import FleetGenerator
+from simulation import VPPSimulationOrchestrator
+from offline_llm import OfflineBackend
+from llm_gateway import LLMGateway
+
+warnings.filterwarnings('ignore', category=FutureWarning)
+
+
+def scan_lookup(market_data: pd.DataFrame, timestamp) -> Optional[Dict]:
+    """Reference lookup: parse and scan the full timestamp column."""
+    market_times = pd.to_datetime(market_data['timestamp'])
+    closest_idx = (market_times - timestamp).abs().idxmin()
+
+    if (market_times.iloc[closest_idx] - timestamp).total_seconds() < 3600:
+        return market_data.iloc[closest_idx].to_dict()
+    return None
+
+
+def make_market_data(periods: int) -> pd.DataFrame:
+    """Synthetic 15-minute market data for benchmarking."""
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2023-01-01', periods=periods, freq='15min'),
+        'lmp': rng.uniform(20, 120, periods),
+        'spin_price': rng.uniform(2, 15, periods),
+        'nonspin_price': rng.uniform(1, 8, periods)
+    })
+
+
+def time_lookups(lookup, timestamps) -> float:
+    """Return mean seconds per lookup."""
+    start = time.perf_counter()
+    for ts in timestamps:
+        lookup(ts)
+    return (time.perf_counter() - start) / len(timestamps)
+
+
+def benchmark_rolling_horizon(fleet_size: int, horizon_steps: int, resolves: int = 3) -> dict:
+    """Time the first rolling-horizon plan (including build) and subsequent re-solves."""
+    fleet = FleetGenerator(data_path="../module_1_data_simulation/data").create_fleet_state(fleet_size)
+    optimizer = RollingHorizonOptimizer(horizon_steps=horizon_steps)
+    start = datetime(2023, 8, 1, 12, 0)
+    step = timedelta(hours=optimizer.step_hours)
+    hours = np.arange(horizon_steps + resolves + 1) * optimizer.step_hours
+    prices = 60.0 + 40.0 * np.sin((hours + 12.0) / 24.0 * 2 * np.pi - 1.5)
+
+    first_start = time.perf_counter()
+    plan = optimizer.step(fleet, prices, start)
+    first_seconds = time.perf_counter() - first_start
+
+    resolve_start = time.perf_counter()
+    for k in range(1, resolves + 1):
+        optimizer.step(fleet, prices[k:], start + k * step)
+    resolve_seconds = (time.perf_counter() - resolve_start) / resolves
+
+    return {
+        'status': plan.status,
+        'variables': sum(v.size for v in optimizer._problem.variables()),
+        'first_seconds': first_seconds,
+        'resolve_seconds': resolve_seconds
+    }
+
+
+def benchmark_llm_latency(latency: Optional[float], fleet_size: int, hours: int) -> dict:
+    """Run a short simulation with an offline LLM at the given latency (None = no LLM step)."""
+    gateway = LLMGateway(OfflineBackend(latency_seconds=latency)) if latency is not None else None
+    orchestrator = VPPSimulationOrchestrator("../module_1_data_simulation/data", llm_gateway=gateway)
+    orchestrator.results_path = Path(tempfile.mkdtemp())
+    try:
+        start = time.perf_counter()
+        orchestrator.run_full_simulation(fleet_size=fleet_size, duration_hours=hours)
+        elapsed = time.perf_counter() - start
+    finally:
+        shutil.rmtree(orchestrator.results_path, ignore_errors=True)
+    return {
+        'timesteps_per_second': hours / elapsed,
+        'llm_calls': gateway.stats.backend_calls if gateway else 0,
+        'llm_seconds': gateway.stats.total_backend_seconds if gateway else 0.0
+    }
+
+
+def main():
+    """Run the market lookup benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark market data lookup")
+    parser.add_argument('--hours', type=int, nargs='+', default=[744, 8760],
+                        help="Simulation lengths in hours (one lookup per hour)")
+    parser.add_argument('--mpc-sizes', type=int, nargs='*', default=[500, 2000],
+                        help="Fleet sizes for the rolling-horizon benchmark")
+    parser.add_argument('--mpc-steps', type=int, default=96, help="Rolling-horizon length in 15-minute steps")
+    parser.add_argument('--llm-latency', type=float, nargs='*', default=[0.0, 0.1, 0.5],
+                        help="Offline LLM latencies (s) for the simulation throughput benchmark")
+    parser.add_argument('--llm-hours', type=int, default=24, help="Simulation length for the LLM benchmark")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("MODULE 5 MARKET LOOKUP BENCHMARK")
+    print("=" * 60)
+
+    for hours in args.hours:
+        market_data = make_market_data(hours * 4)
+        start = market_data['timestamp'].iloc[0]
+        timestamps = [start + timedelta(hours=h) for h in range(hours)]
+
+        build_start = time.perf_counter()
+        index = MarketDataIndex(market_data)
+        build_seconds = time.perf_counter() - build_start
+
+        scan_sample = timestamps[::max(1, hours // 200)]
+        assert all(scan_lookup(market_data, ts) == index.lookup(ts) for ts in scan_sample[:20])
+
+        scan_us = time_lookups(lambda ts: scan_lookup(market_data, ts), scan_sample) * 1e6
+        index_us = time_lookups(index.lookup, timestamps) * 1e6
+
+        print(f"{hours:>6}h ({len(market_data)} rows): scan {scan_us:9.1f} us/step, "
+              f"index {index_us:6.1f} us/step ({scan_us / index_us:,.0f}x), "
+              f"index build {build_seconds * 1000:.1f} ms")
+
+    for fleet_size in args.mpc_sizes:
+        result = benchmark_rolling_horizon(fleet_size, args.mpc_steps)
+        print(f"MPC {fleet_size:>6} prosumers x {args.mpc_steps} steps ({result['variables']:,} variables): "
+              f"first plan {result['first_seconds']:6.2f}s, re-solve {result['resolve_seconds']:6.2f}s "
+              f"[{result['status']}]")
+
+    if args.llm_latency:
+        os.environ.setdefault('VPP_LLM_BACKEND', 'offline')  # keyless baseline engine
+        baseline = benchmark_llm_latency(None, fleet_size=50, hours=args.llm_hours)
+        print(f"Simulation without LLM step: {baseline['timesteps_per_second']:8.1f} timesteps/s")
+        for latency in args.llm_latency:
+            result = benchmark_llm_latency(latency, fleet_size=50, hours=args.llm_hours)
+            print(f"Offline LLM {latency * 1000:6.0f} ms:      {result['timesteps_per_second']:8.1f} timesteps/s, "
+                  f"{result['llm_calls']} LLM calls, {result['llm_seconds']:.2f}s in the LLM")
+
+
+if __name__ == "__main__":
+    main()
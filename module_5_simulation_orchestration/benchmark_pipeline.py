@@ -0,0 +1,268 @@
+"""
+Pipeline Benchmark Suite for VPP LLM Agent - Module 5
+Times the hot paths of the whole pipeline at several fleet sizes: fleet
+generation, round-1 bid collection, coalition formation (ranking,
+counter-offers, responses), a full negotiation, the OptimizationTool and
+CentralizedOptimizer solves, one simulation timestep and a short full run.
+
+Runs offline (the LLM steps use the offline backend, no API key needed).
+The fleet generator needs a load profile per prosumer, so the benchmark runs
+on a scratch copy of the Module 1 market and solar data with a synthetic load
+store as large as the largest fleet (two days of load; state updates wrap
+around the data period).
+Results are written as JSON; with --baseline, each case is compared against a
+stored result file and the script exits with status 1 when any case got
+slower than the tolerance allows, so it can gate a deploy:
+
+    python benchmark_pipeline.py --output baseline.json             # once, on the reference commit
+    python benchmark_pipeline.py --baseline baseline.json           # on the candidate
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+os.environ.setdefault('VPP_LLM_BACKEND', 'offline')  # keyless engines
+
+import cvxpy as cp
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from simulation import VPPSimulationOrchestrator, load_market_data
+from load_store import LoadProfileStore
+from load_synthesis import iter_load_matrix_chunks
+from centralized_optimizer import CentralizedOptimizer
+from optimization_tool import OptimizationTool
+from offline_llm import OfflineBackend
+from llm_gateway import LLMGateway
+
+warnings.filterwarnings('ignore', category=FutureWarning)
+
+CASES = [
+    "fleet_generation", "fleet_state_generation", "bid_collection", "coalition_formation",
+    "negotiation", "optimization_tool", "centralized_ecos", "centralized_greedy",
+    "simulation_timestep", "short_run"
+]
+
+
+def make_benchmark_data(source: str, num_profiles: int, target: Path, days: int = 2) -> pd.DataFrame:
+    """
+    Build a data directory with `num_profiles` synthetic load profiles.
+
+    Args:
+        source: Module 1 data directory (market and solar data are copied)
+        num_profiles: Number of households in the load store
+        target: Directory to create
+        days: Days of 15-minute load to synthesize, from the market data start
+
+    Returns:
+        The market data
+    """
+    target.mkdir(parents=True, exist_ok=True)
+    for name in ("market_data.csv", "solar_data.csv"):
+        shutil.copy(Path(source) / name, target / name)
+    market_data = load_market_data(target)
+    timestamps = pd.date_range(market_data['timestamp'].iloc[0].normalize(), periods=days * 96, freq='15min')
+    profile_ids = list(range(1, num_profiles + 1))
+    LoadProfileStore.write(
+        LoadProfileStore.default_path(target), timestamps, profile_ids,
+        iter_load_matrix_chunks(timestamps, profile_ids, dtype=np.float32)
+    )
+    return market_data
+
+
+def time_case(fn: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """Run fn `repeat` times; return the timings in seconds."""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return {"median_s": statistics.median(runs), "min_s": min(runs), "runs": runs}
+
+
+def benchmark_fleet_size(
+    fleet_size: int,
+    cases: List[str],
+    data_path: str,
+    market_data: pd.DataFrame,
+    repeat: int,
+    hours: int,
+    seed: int = 42
+) -> Dict[str, Dict[str, Any]]:
+    """Run the selected cases for one fleet size."""
+    results_dir = Path(tempfile.mkdtemp())
+    try:
+        orchestrator = VPPSimulationOrchestrator(data_path, market_data=market_data, log_file=None)
+        orchestrator.results_path = results_dir
+        orchestrator._initialize_simulation(fleet_size, None, seed)
+        fleet = orchestrator._current_fleet_state()
+        current_time = orchestrator._get_current_timestamp(12, 1)  # Midday: solar and EVs away
+        opportunity = orchestrator._create_market_opportunity(
+            orchestrator._get_market_data_for_timestamp(current_time), current_time
+        )
+        engine = orchestrator.negotiation_engine
+        bids = engine._collect_initial_bids(opportunity, fleet)
+        coalition = engine.run_negotiation(opportunity, fleet.snapshot()).coalition_members
+
+        def form_coalition():
+            ranked = engine._evaluate_and_rank_bids(bids, opportunity, top_k=engine.max_counter_offers)
+            offers = engine._generate_counter_offers(ranked, opportunity, competing_offers=len(bids))
+            responses = engine._collect_counter_responses(offers, fleet)
+            return engine._form_final_coalition(responses, opportunity)
+
+        def short_run():
+            run = VPPSimulationOrchestrator(data_path, market_data=market_data, log_file=None)
+            run.results_path = results_dir
+            run.run_full_simulation(fleet_size=fleet_size, duration_hours=hours, random_seed=seed)
+
+        tool = OptimizationTool(gateway=LLMGateway(OfflineBackend()))
+        ecos, greedy = CentralizedOptimizer(solver=cp.ECOS), CentralizedOptimizer(solver="greedy")
+        generator = orchestrator.fleet_generator
+        runners: Dict[str, Tuple[Callable[[], Any], int]] = {
+            "fleet_generation": (lambda: generator.create_prosumer_fleet(fleet_size, random_seed=seed), repeat),
+            "fleet_state_generation": (lambda: generator.create_fleet_state(fleet_size, random_seed=seed), repeat),
+            "bid_collection": (lambda: engine._collect_initial_bids(opportunity, fleet), repeat),
+            "coalition_formation": (form_coalition, repeat),
+            "negotiation": (lambda: engine.run_negotiation(opportunity, fleet.snapshot()), repeat),
+            "optimization_tool": (lambda: tool.formulate_and_submit_bid(opportunity, coalition), repeat),
+            "centralized_ecos": (lambda: ecos.optimize_dispatch(opportunity, fleet.snapshot(), current_time), repeat),
+            "centralized_greedy": (lambda: greedy.optimize_dispatch(opportunity, fleet.snapshot(), current_time), repeat),
+            "simulation_timestep": (lambda: orchestrator._run_timestep(current_time, 12), repeat),
+            "short_run": (short_run, 1)  # Includes fleet generation; long at large sizes
+        }
+        return {case: time_case(*runners[case]) for case in cases}
+    finally:
+        shutil.rmtree(results_dir, ignore_errors=True)
+
+
+def environment_info() -> Dict[str, str]:
+    """Versions and machine details stored with the results."""
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "cvxpy": cp.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": str(os.cpu_count())
+    }
+
+
+def compare(
+    results: Dict[str, Dict[str, Dict[str, Any]]],
+    baseline: Dict[str, Dict[str, Dict[str, Any]]],
+    tolerance: float,
+    min_delta_s: float
+) -> List[Dict[str, Any]]:
+    """
+    Compare median times against a baseline.
+
+    Args:
+        results: Current benchmarks (case -> fleet size -> timings)
+        baseline: Baseline benchmarks in the same layout
+        tolerance: Allowed slowdown as a fraction (0.25 = 25% slower)
+        min_delta_s: Slowdowns smaller than this many seconds are never regressions
+
+    Returns:
+        One row per case and fleet size present in both, with the ratio and a regression flag
+    """
+    rows = []
+    for case, sizes in results.items():
+        for size, timing in sizes.items():
+            reference = baseline.get(case, {}).get(size)
+            if reference is None:
+                continue
+            current_s, baseline_s = timing["median_s"], reference["median_s"]
+            ratio = current_s / baseline_s if baseline_s > 0 else float("inf")
+            rows.append({
+                "case": case,
+                "fleet_size": size,
+                "baseline_s": baseline_s,
+                "current_s": current_s,
+                "ratio": ratio,
+                "regression": ratio > 1.0 + tolerance and current_s - baseline_s > min_delta_s
+            })
+    return rows
+
+
+def main():
+    """Run the pipeline benchmarks and optionally compare against a baseline."""
+    parser = argparse.ArgumentParser(description="Benchmark the VPP pipeline hot paths at several fleet sizes")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20, 200, 2000, 20000],
+                        help="Fleet sizes")
+    parser.add_argument('--cases', nargs='+', default=CASES, choices=CASES, help="Cases to run")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per case (the median is compared)")
+    parser.add_argument('--hours', type=int, default=6, help="Length of the short full run")
+    parser.add_argument('--data-path', default="../module_1_data_simulation/data",
+                        help="Module 1 data with market_data.csv and solar_data.csv")
+    parser.add_argument('--output', default="results/benchmark_pipeline.json", help="Where to write the results")
+    parser.add_argument('--baseline', default=None, help="Results file to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Allowed slowdown before a case counts as a regression (0.25 = 25%%)")
+    parser.add_argument('--min-delta-ms', type=float, default=1.0,
+                        help="Ignore slowdowns smaller than this (timer noise on fast cases)")
+    parser.add_argument('--log-level', default="WARNING",
+                        help="Loguru level while timing (DEBUG output is included in the timings)")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    print("=" * 60)
+    print("VPP PIPELINE BENCHMARK")
+    print("=" * 60)
+
+    data_dir = Path(tempfile.mkdtemp())
+    benchmarks: Dict[str, Dict[str, Dict[str, Any]]] = {case: {} for case in args.cases}
+    try:
+        market_data = make_benchmark_data(args.data_path, max(args.sizes), data_dir)
+        for fleet_size in args.sizes:
+            timings = benchmark_fleet_size(fleet_size, args.cases, str(data_dir), market_data, args.repeat, args.hours)
+            for case, timing in timings.items():
+                benchmarks[case][str(fleet_size)] = timing
+                print(f"{fleet_size:>7} prosumers  {case:<24} {timing['median_s'] * 1000:10.2f} ms "
+                      f"(min {timing['min_s'] * 1000:.2f} ms)")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "environment": environment_info(),
+            "config": {"repeat": args.repeat, "hours": args.hours},
+            "benchmarks": benchmarks
+        }, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(benchmarks, baseline["benchmarks"], args.tolerance, args.min_delta_ms / 1000.0)
+        print(f"\nComparison with {args.baseline} (tolerance {args.tolerance:.0%}):")
+        for row in rows:
+            flag = "REGRESSION" if row["regression"] else ""
+            print(f"{row['fleet_size']:>7} prosumers  {row['case']:<24} {row['baseline_s'] * 1000:10.2f} ms -> "
+                  f"{row['current_s'] * 1000:10.2f} ms  {row['ratio']:5.2f}x  {flag}")
+        regressions = [row for row in rows if row["regression"]]
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
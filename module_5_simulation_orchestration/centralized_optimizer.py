@@ -8,19 +8,24 @@ over all prosumer assets to maximize total VPP profit.
 
 import os
 import sys
-import cvxpy as cp
 import numpy as np
-import pandas as pd
-from typing import Dict, List, Any, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Tuple, Union
 from datetime import datetime
 from dataclasses import dataclass
 
 # Add paths for imports
 sys.path.append('../module_2_asset_modeling')
 sys.path.append('../module_3_agentic_framework')
+sys.path.append('../module_4_negotiation_logic')
 
 from prosumer_models import Prosumer
+from fleet_state import FleetState
 from schemas import MarketOpportunity
+from telemetry import EventStream, get_event_stream, get_profiler
+from dispatch_solvers import ECOS, GREEDY_SOLVER, solve_dispatch_greedy
+
+if TYPE_CHECKING:
+    import cvxpy as cp
 
 
 @dataclass
@@ -44,14 +49,26 @@ class CentralizedOptimizer:
     serving as a theoretical upper bound for profit comparison.
     """
     
-    def __init__(self):
-        """Initialize the centralized optimizer."""
+    def __init__(self, solver: str = ECOS, verbose: bool = False, events: Optional[EventStream] = None):
+        """
+        Initialize the centralized optimizer.
+        
+        Args:
+            solver: CVXPY solver name, or "greedy" to solve the single-hour
+                dispatch LP exactly with a sort instead of CVXPY
+            verbose: Print the CVXPY solver log for every solve
+            events: Event stream for solver diagnostics (default: the
+                process-wide stream from telemetry.get_event_stream)
+        """
+        self.solver = solver
+        self.verbose = verbose
+        self.events = events if events is not None else get_event_stream()
         self.preference_violations = []
         
     def optimize_dispatch(
         self, 
         market_opportunity: MarketOpportunity,
-        prosumer_fleet: List[Prosumer],
+        prosumer_fleet: Union[List[Prosumer], FleetState],
         current_timestamp: datetime
     ) -> CentralizedResult:
         """
@@ -59,7 +76,8 @@ class CentralizedOptimizer:
         
         Args:
             market_opportunity: Market bidding opportunity
-            prosumer_fleet: List of available prosumers
+            prosumer_fleet: Available prosumers (Prosumer objects or views, or a
+                FleetState, which is evaluated fleet-wide)
             current_timestamp: Current simulation timestamp
             
         Returns:
@@ -67,14 +85,38 @@ class CentralizedOptimizer:
         """
         start_time = datetime.now()
         self.preference_violations = []
+        profiler = get_profiler()
         
         try:
-            # Filter available prosumers based on asset availability
-            available_prosumers = self._filter_available_prosumers(
-                prosumer_fleet, current_timestamp
-            )
+            with profiler.span("capacity_costs"):
+                if isinstance(prosumer_fleet, FleetState):
+                    prosumer_ids, max_capacities, marginal_costs, violations = self._fleet_capacity_costs(
+                        prosumer_fleet
+                    )
+                    self.preference_violations.extend(violations)
+                else:
+                    # Filter available prosumers based on asset availability
+                    available_prosumers = self._filter_available_prosumers(
+                        prosumer_fleet, current_timestamp
+                    )
+                    prosumer_ids = [p.prosumer_id for p in available_prosumers]
+                
+                    # Extract prosumer capacities and costs
+                    max_capacities = []
+                    marginal_costs = []
+                
+                    for prosumer in available_prosumers:
+                        capacity, cost, violations = self._calculate_prosumer_capacity_cost(
+                            prosumer, market_opportunity.market_type, current_timestamp
+                        )
+                        max_capacities.append(capacity)
+                        marginal_costs.append(cost)
+                        self.preference_violations.extend(violations)
+                
+                    max_capacities = np.array(max_capacities)
+                    marginal_costs = np.array(marginal_costs)
             
-            if not available_prosumers:
+            if not prosumer_ids:
                 return CentralizedResult(
                     success=False,
                     coalition_members=[],
@@ -88,26 +130,7 @@ class CentralizedOptimizer:
                 )
             
             # Set up optimization problem
-            n_prosumers = len(available_prosumers)
-            prosumer_ids = [p.prosumer_id for p in available_prosumers]
-            
-            # Decision variables
-            dispatch_vars = cp.Variable(n_prosumers, nonneg=True)  # kW dispatch per prosumer
-            
-            # Extract prosumer capacities and costs
-            max_capacities = []
-            marginal_costs = []
-            
-            for prosumer in available_prosumers:
-                capacity, cost, violations = self._calculate_prosumer_capacity_cost(
-                    prosumer, market_opportunity.market_type, current_timestamp
-                )
-                max_capacities.append(capacity)
-                marginal_costs.append(cost)
-                self.preference_violations.extend(violations)
-            
-            max_capacities = np.array(max_capacities)
-            marginal_costs = np.array(marginal_costs)
+            n_prosumers = len(prosumer_ids)
             
             # Profit-based objective: maximize (market_price - marginal_cost) * dispatch
             bid_price = market_opportunity.market_price_mwh * 0.95  # Conservative bid
@@ -116,14 +139,6 @@ class CentralizedOptimizer:
             # Convert to profit per kW ($/MWh -> $/kWh)
             profit_per_kw = profit_margins / 1000.0  # $/kWh
             
-            objective = cp.Maximize(cp.sum(cp.multiply(profit_per_kw, dispatch_vars)))
-            
-            # Constraints
-            constraints = [
-                # Capacity constraints
-                dispatch_vars <= max_capacities
-            ]
-            
             # Market size constraints
             total_available_kw = np.sum(max_capacities)
             max_required_kw = market_opportunity.required_capacity_mw * 1000.0
@@ -132,22 +147,21 @@ class CentralizedOptimizer:
             # Maximum is the smaller of available capacity or market requirement
             max_dispatch_kw = min(total_available_kw, max_required_kw)
             
-            if max_dispatch_kw > 0:
-                constraints.append(cp.sum(dispatch_vars) <= max_dispatch_kw)
-            
-            # Debug constraints
-            print(f"Max capacities: {max_capacities}")
-            print(f"Required capacity: {market_opportunity.required_capacity_mw} MW")
-            print(f"Total available capacity: {total_available_kw} kW")
-            print(f"Max dispatch allowed: {max_dispatch_kw} kW")
+            with profiler.span("dispatch_solve"):
+                if self.solver == GREEDY_SOLVER:
+                    # Box constraints plus one total limit: exact fractional knapsack
+                    status, optimal_dispatch = solve_dispatch_greedy(
+                        profit_per_kw, max_capacities,
+                        max_total_kw=max_dispatch_kw if max_dispatch_kw > 0 else np.inf
+                    )
+                    optimal_value = float(profit_per_kw @ optimal_dispatch)
+                else:
+                    status, optimal_dispatch, optimal_value = self._solve_dispatch_cvxpy(
+                        profit_per_kw, max_capacities, max_dispatch_kw, market_opportunity.required_capacity_mw
+                    )
             
-            # Solve optimization problem
-            problem = cp.Problem(objective, constraints)
-            problem.solve(solver=cp.ECOS, verbose=True)
-            
-            if problem.status not in ["infeasible", "unbounded"]:
+            if status not in ["infeasible", "unbounded"]:
                 # Extract solution
-                optimal_dispatch = dispatch_vars.value
                 optimal_bid_price = market_opportunity.market_price_mwh * 0.95  # Conservative bid
                 
                 dispatch_schedule = {
@@ -159,7 +173,7 @@ class CentralizedOptimizer:
                 
                 # Calculate actual expected profit
                 total_dispatched_kw = sum(dispatch_schedule.values())
-                total_profit_per_hour = problem.value if problem.value else 0.0
+                total_profit_per_hour = optimal_value if optimal_value else 0.0
                 expected_profit = total_profit_per_hour  # Already in $ from optimization
                 
                 # Calculate satisfaction score (moderate baseline - doesn't consider detailed preferences)
@@ -192,7 +206,8 @@ class CentralizedOptimizer:
                 
         except Exception as e:
             optimization_time = (datetime.now() - start_time).total_seconds()
-            print(f"Centralized optimization error: {e}")
+            self.events.error("centralized_optimization_error", "Centralized optimization error: {error}",
+                              source="centralized_optimizer", error=str(e))
             return CentralizedResult(
                 success=False,
                 total_bid_capacity_mw=0.0,
@@ -204,6 +219,48 @@ class CentralizedOptimizer:
                 optimization_time_seconds=optimization_time
             )
     
+    def _solve_dispatch_cvxpy(
+        self,
+        profit_per_kw: np.ndarray,
+        max_capacities: np.ndarray,
+        max_dispatch_kw: float,
+        required_capacity_mw: float
+    ) -> Tuple[str, np.ndarray, Optional[float]]:
+        """Solve the single-hour dispatch LP with CVXPY."""
+        import cvxpy as cp
+        
+        n_prosumers = len(max_capacities)
+        
+        # Decision variables
+        dispatch_vars = cp.Variable(n_prosumers, nonneg=True)  # kW dispatch per prosumer
+        
+        objective = cp.Maximize(cp.sum(cp.multiply(profit_per_kw, dispatch_vars)))
+        
+        # Constraints
+        constraints = [
+            # Capacity constraints
+            dispatch_vars <= max_capacities
+        ]
+        
+        if max_dispatch_kw > 0:
+            constraints.append(cp.sum(dispatch_vars) <= max_dispatch_kw)
+        
+        self.events.debug(
+            "centralized_dispatch_problem",
+            "Dispatch LP: {prosumers} prosumers, {available_kw:.1f} kW available, "
+            "required {required_mw} MW, max dispatch {max_dispatch_kw:.1f} kW",
+            source="centralized_optimizer", prosumers=n_prosumers, available_kw=float(np.sum(max_capacities)),
+            required_mw=required_capacity_mw, max_dispatch_kw=max_dispatch_kw
+        )
+        
+        # Solve optimization problem
+        problem = cp.Problem(objective, constraints)
+        problem.solve(solver=self.solver, verbose=self.verbose)
+        get_profiler().add("canonicalize", problem.compilation_time or 0.0)
+        get_profiler().add("solver", getattr(problem.solver_stats, 'solve_time', 0.0) or 0.0)
+        
+        return problem.status, dispatch_vars.value, problem.value
+    
     def _filter_available_prosumers(
         self, 
         prosumer_fleet: List[Prosumer], 
@@ -232,6 +289,48 @@ class CentralizedOptimizer:
         
         return available
     
+    def _fleet_capacity_costs(self, fleet: FleetState) -> Tuple[List[str], np.ndarray, np.ndarray, List[str]]:
+        """
+        Fleet-wide _filter_available_prosumers and _calculate_prosumer_capacity_cost.
+        
+        Returns:
+            Tuple of (prosumer_ids, max_capacities, marginal_costs, violations)
+            for the available prosumers, in fleet order
+        """
+        c = fleet.columns
+        has_bess = c["has_bess"] & (c["bess_capacity_kwh"] > 0)
+        ev_plugged = c["has_ev"] & c["ev_is_plugged_in"]
+        bess_soc_kwh = (c["bess_current_soc_percent"] / 100.0) * c["bess_capacity_kwh"]
+        ev_soc_kwh = (c["ev_current_soc_percent"] / 100.0) * c["ev_battery_capacity_kwh"]
+        
+        # Same availability rules as _filter_available_prosumers
+        available = np.flatnonzero(
+            (has_bess & (bess_soc_kwh > c["bess_capacity_kwh"] * 0.1))
+            | (ev_plugged & (ev_soc_kwh > c["ev_battery_capacity_kwh"] * 0.2))
+        )
+        
+        # Same capacities and costs as _calculate_prosumer_capacity_cost
+        bess = c["has_bess"][available]
+        ev = ev_plugged[available]
+        bess_capacity = np.where(bess, np.minimum(bess_soc_kwh[available] * 0.9, c["bess_max_power_kw"][available]), 0.0)
+        ev_capacity = np.where(ev, np.minimum(ev_soc_kwh[available] * 0.8, c["ev_max_charge_power_kw"][available]), 0.0)
+        total_capacity = bess_capacity + ev_capacity
+        weighted_cost = bess_capacity * 50.0 + ev_capacity * 80.0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg_cost = np.where(total_capacity > 0, weighted_cost / total_capacity, 100.0)
+        
+        ids = c["prosumer_id"][available]
+        backup_violated = bess & (c["backup_power_hours"][available] > 2.0)
+        ev_violated = ev & (fleet.ev_charging_requirement_kwh()[available] > 0)
+        violations = []
+        for k in np.flatnonzero(backup_violated | ev_violated):
+            if backup_violated[k]:
+                violations.append(f"{ids[k]}: Violated backup power requirement")
+            if ev_violated[k]:
+                violations.append(f"{ids[k]}: Violated EV charging requirement")
+        
+        return list(ids), total_capacity, avg_cost, violations
+    
     def _calculate_prosumer_capacity_cost(
         self, 
         prosumer: Prosumer, 
@@ -287,12 +386,14 @@ class CentralizedOptimizer:
         
         return total_capacity, avg_cost, violations
     
-    def _estimate_clearing_probability(self, market_price: float, bid_price: cp.Variable) -> float:
+    def _estimate_clearing_probability(self, market_price: float, bid_price: "cp.Variable") -> float:
         """
         Estimate probability of bid clearing based on market conditions.
         
         Simplified model: higher bid prices have lower clearing probability.
         """
+        import cvxpy as cp
+        
         # Linear probability model
         prob = cp.maximum(0.1, 1.0 - (bid_price - market_price) / (market_price * 0.5))
         return cp.minimum(1.0, prob)
@@ -0,0 +1,180 @@
+"""
+Simulation Checkpoints for VPP LLM Agent - Module 5
+
+Periodic snapshots of a running simulation so a long run can be resumed after
+a crash without repeating completed timesteps (and their LLM and solver
+calls). A checkpoint holds the fleet state, the NumPy and Python RNG states,
+the next timestep index, the run configuration, the metrics sink state and
+(unless the run streams metrics without keeping them) the metrics collected
+so far.
+
+Checkpoints are single .npz files. Fleet columns and metrics are stored
+column-wise as plain arrays (no pickling), so a month-long run with a
+200-prosumer fleet is only a few hundred kilobytes. Writes go to a temporary
+file that is then renamed over the target, so a crash while writing leaves
+the previous checkpoint intact.
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Add paths for imports
+sys.path.append('../module_2_asset_modeling')
+
+from fleet_state import FleetState
+
+
+# Format version written to every checkpoint
+CHECKPOINT_VERSION = 1
+
+_FLEET_PREFIX = "fleet/"
+_METRIC_PREFIX = "metric/"
+
+
+def records_to_columns(records: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Convert a list of flat metric dicts to one array per field."""
+    if not records:
+        return {}
+    columns = {}
+    for name in records[0]:
+        values = [record[name] for record in records]
+        if isinstance(values[0], datetime):
+            columns[name] = pd.to_datetime(values).values.astype('datetime64[ns]')
+        else:
+            columns[name] = np.asarray(values)
+    return columns
+
+
+def columns_to_records(columns: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """Inverse of records_to_columns (datetimes come back as pd.Timestamp)."""
+    if not columns:
+        return []
+    converted = {}
+    for name, values in columns.items():
+        if np.issubdtype(values.dtype, np.datetime64):
+            converted[name] = list(pd.DatetimeIndex(values))
+        else:
+            converted[name] = values.tolist()
+    n = len(next(iter(converted.values())))
+    return [{name: values[i] for name, values in converted.items()} for i in range(n)]
+
+
+@dataclass
+class SimulationCheckpoint:
+    """Everything needed to continue a simulation run."""
+    next_timestep: int
+    total_timesteps: int
+    start_timestamp: datetime
+    fleet: FleetState
+    metrics: List[Dict[str, Any]]
+    numpy_rng_state: Tuple
+    python_rng_state: Tuple
+    run_config: Dict[str, Any] = field(default_factory=dict)
+    elapsed_seconds: float = 0.0
+    sink_state: Dict[str, Any] = field(default_factory=dict)
+
+    @staticmethod
+    def capture_rng_states() -> Tuple[Tuple, Tuple]:
+        """Current global NumPy and Python RNG states."""
+        return np.random.get_state(), random.getstate()
+
+    def restore_rng_states(self) -> None:
+        """Restore the global NumPy and Python RNG states."""
+        np.random.set_state(self.numpy_rng_state)
+        random.setstate(self.python_rng_state)
+
+    def save(self, path) -> Path:
+        """
+        Atomically write the checkpoint.
+
+        Args:
+            path: Target .npz file
+
+        Returns:
+            Path of the written checkpoint
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        np_name, np_keys, np_pos, np_has_gauss, np_cached_gauss = self.numpy_rng_state
+        py_version, py_internal, py_gauss_next = self.python_rng_state
+        meta = {
+            "version": CHECKPOINT_VERSION,
+            "next_timestep": int(self.next_timestep),
+            "total_timesteps": int(self.total_timesteps),
+            "start_timestamp": pd.Timestamp(self.start_timestamp).isoformat(),
+            "run_config": self.run_config,
+            "elapsed_seconds": float(self.elapsed_seconds),
+            "sink_state": self.sink_state,
+            "numpy_rng": [np_name, int(np_pos), int(np_has_gauss), float(np_cached_gauss)],
+            "python_rng": [py_version, py_gauss_next]
+        }
+
+        arrays = {
+            "meta": np.array(json.dumps(meta)),
+            "numpy_rng_keys": np.asarray(np_keys, dtype=np.uint32),
+            "python_rng_internal": np.asarray(py_internal, dtype=np.int64)
+        }
+        arrays.update({_FLEET_PREFIX + k: v for k, v in self.fleet.to_arrays().items()})
+        arrays.update({_METRIC_PREFIX + k: v for k, v in records_to_columns(self.metrics).items()})
+
+        # Write next to the target, then rename over it
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, **arrays)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_name, path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            raise
+        return path
+
+    @classmethod
+    def load(cls, path) -> "SimulationCheckpoint":
+        """
+        Read a checkpoint written by save().
+
+        Args:
+            path: Checkpoint .npz file
+
+        Returns:
+            SimulationCheckpoint
+        """
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("version") != CHECKPOINT_VERSION:
+                raise ValueError(f"Unsupported checkpoint version {meta.get('version')} in {path}")
+
+            fleet_arrays = {k[len(_FLEET_PREFIX):]: data[k] for k in data.files if k.startswith(_FLEET_PREFIX)}
+            metric_columns = {k[len(_METRIC_PREFIX):]: data[k] for k in data.files if k.startswith(_METRIC_PREFIX)}
+
+            np_name, np_pos, np_has_gauss, np_cached_gauss = meta["numpy_rng"]
+            numpy_rng_state = (np_name, data["numpy_rng_keys"].copy(), np_pos, np_has_gauss, np_cached_gauss)
+            py_version, py_gauss_next = meta["python_rng"]
+            python_rng_state = (py_version, tuple(int(x) for x in data["python_rng_internal"]), py_gauss_next)
+
+        return cls(
+            next_timestep=meta["next_timestep"],
+            total_timesteps=meta["total_timesteps"],
+            start_timestamp=pd.Timestamp(meta["start_timestamp"]),
+            fleet=FleetState.from_arrays(fleet_arrays),
+            metrics=columns_to_records(metric_columns),
+            numpy_rng_state=numpy_rng_state,
+            python_rng_state=python_rng_state,
+            run_config=meta.get("run_config", {}),
+            elapsed_seconds=meta.get("elapsed_seconds", 0.0),
+            sink_state=meta.get("sink_state", {})
+        )
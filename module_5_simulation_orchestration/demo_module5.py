@@ -211,7 +211,7 @@ def demo_quick_simulation():
         print("   Duration: 6 hours")
         print("   Frequency: Every 2 hours")
         
-        orchestrator = VPPSimulationOrchestrator()
+        orchestrator = VPPSimulationOrchestrator(log_file="simulation.log")
         
         # Run very short simulation
         start_time = time.time()
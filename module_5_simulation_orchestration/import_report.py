@@ -0,0 +1,135 @@
+"""
+Import-Time Report for VPP LLM Agent - Module 5
+Measures how long the simulation and negotiation modules take to import in a
+fresh interpreter (python -X importtime) and which packages dominate.
+
+The LLM clients (langchain_google_genai, google.generativeai), LangGraph and
+CVXPY are imported on first use, so importing the simulation only pays for
+pandas, numpy, pydantic and loguru. The report lists any of those heavy
+backends that got loaded anyway and exits with status 1 when a module exceeds
+its import budget or pulls one in, so a new top-level import is caught early:
+
+    python import_report.py                      # simulation and main_negotiation
+    python import_report.py --modules dashboard  # any module on the Module 5 path
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Import budget per module (seconds, cold interpreter; VPP_IMPORT_BUDGET_S overrides)
+IMPORT_BUDGET_S = float(os.environ.get("VPP_IMPORT_BUDGET_S", 1.5))
+
+# Backends that must only be imported on first use
+LAZY_BACKENDS = ["cvxpy", "langgraph", "langchain_google_genai", "google.generativeai"]
+
+MODULE_DIRS = [
+    "../module_1_data_simulation",
+    "../module_2_asset_modeling",
+    "../module_3_agentic_framework",
+    "../module_4_negotiation_logic",
+    "../module_6_visualization_dashboard"
+]
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, float, float]]:
+    """
+    Parse python -X importtime output.
+
+    Args:
+        stderr: Interpreter stderr with "import time: self | cumulative | name" lines
+
+    Returns:
+        (module, nesting depth, self seconds, cumulative seconds) per imported module
+    """
+    rows = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, (len(indent) - 1) // 2, int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    return rows
+
+
+def measure_import(module: str) -> Dict[str, object]:
+    """
+    Import a module in a fresh interpreter and report its import time.
+
+    Args:
+        module: Module name, importable from this directory or the module paths
+
+    Returns:
+        Dictionary with total_s, the module's direct imports by cumulative
+        time (imports) and the lazy backends that were loaded (loaded_backends)
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([os.getcwd()] + MODULE_DIRS + [env.get("PYTHONPATH", "")])
+    probe = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {LAZY_BACKENDS!r} if m in sys.modules))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        capture_output=True, text=True, env=env
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+
+    # Nested imports are listed before the module that triggered them
+    rows = parse_importtime(completed.stderr)
+    end = max(i for i, (name, depth, _, _) in enumerate(rows) if depth == 0 and name == module)
+    direct = []
+    for name, depth, _, cumulative in reversed(rows[:end]):
+        if depth == 0:
+            break
+        if depth == 1:
+            direct.append((name, cumulative))
+    loaded = completed.stdout.strip().splitlines()[-1] if completed.stdout.strip() else ""
+    return {
+        "total_s": rows[end][3],
+        "imports": sorted(direct, key=lambda item: item[1], reverse=True),
+        "loaded_backends": [name for name in loaded.split(",") if name]
+    }
+
+
+def main():
+    """Print the import-time report and check it against the budget."""
+    parser = argparse.ArgumentParser(description="Report cold import times of the VPP modules")
+    parser.add_argument('--modules', nargs='+', default=["simulation", "main_negotiation"],
+                        help="Modules to import")
+    parser.add_argument('--budget', type=float, default=IMPORT_BUDGET_S,
+                        help="Import budget per module in seconds")
+    parser.add_argument('--top', type=int, default=10, help="Packages listed per module")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("VPP IMPORT-TIME REPORT")
+    print("=" * 60)
+
+    failures = []
+    for module in args.modules:
+        report = measure_import(module)
+        print(f"\n{module}: {report['total_s'] * 1000:.0f} ms (budget {args.budget * 1000:.0f} ms)")
+        for name, cumulative in report["imports"][:args.top]:
+            print(f"  {name:<40} {cumulative * 1000:8.1f} ms")
+        if report["loaded_backends"]:
+            print(f"  eagerly loaded: {', '.join(report['loaded_backends'])}")
+            failures.append(f"{module} imports {', '.join(report['loaded_backends'])}")
+        if report["total_s"] > args.budget:
+            failures.append(f"{module} took {report['total_s']:.2f} s")
+
+    if failures:
+        print("\nImport checks failed:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nAll imports within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Market Data Index for VPP LLM Agent - Module 5
+
+Pre-built timestamp index over the market data so the simulation loop can
+find the market row for a timestep in O(1) (regular grids) or O(log N)
+(irregular data) instead of scanning the whole table every step.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class MarketDataIndex:
+    """
+    Nearest-timestamp lookup over market data rows.
+
+    Lookup semantics match the original scan: pick the row whose timestamp is
+    closest to the query (ties go to the first row in table order), and return
+    it only if that row's timestamp is less than `tolerance_seconds` after the
+    query. Earlier rows are accepted at any distance.
+    """
+
+    def __init__(self, market_data: pd.DataFrame, tolerance_seconds: float = 3600):
+        """
+        Build the index.
+
+        Args:
+            market_data: Market data with a 'timestamp' column
+            tolerance_seconds: Maximum amount the matched row may lie after the query
+        """
+        self.source = market_data
+        self.tolerance_ns = int(tolerance_seconds * 1e9)
+        self.records: List[Dict[str, Any]] = market_data.to_dict('records')
+
+        times_ns = pd.to_datetime(market_data['timestamp']).values.astype('datetime64[ns]').astype(np.int64)
+        order = np.argsort(times_ns, kind='stable')
+        self.row_times_ns = times_ns
+        self.times_ns = times_ns[order]
+        self.row_of = order
+
+        # Regular grid: sorted in table order with a constant positive step
+        self.step_ns = 0
+        if len(times_ns) > 1:
+            steps = np.diff(times_ns)
+            if steps[0] > 0 and np.all(steps == steps[0]):
+                self.step_ns = int(steps[0])
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def position(self, timestamp) -> Optional[int]:
+        """
+        Return the table row index nearest to `timestamp` (ignoring tolerance).
+
+        Args:
+            timestamp: Query time (datetime, pd.Timestamp or string)
+
+        Returns:
+            Row index into the original market data, or None if it is empty
+        """
+        n = len(self.times_ns)
+        if n == 0:
+            return None
+        ts_ns = pd.Timestamp(timestamp).value
+
+        if self.step_ns:
+            # Direct slot computation; exact halfway points round down (earlier row)
+            slot, remainder = divmod(ts_ns - int(self.times_ns[0]), self.step_ns)
+            if 2 * remainder > self.step_ns:
+                slot += 1
+            return int(min(max(slot, 0), n - 1))
+
+        pos = int(np.searchsorted(self.times_ns, ts_ns, side='left'))
+        if pos == 0:
+            return int(self.row_of[0])
+        if pos == n:
+            return int(self.row_of[n - 1])
+
+        # Leftmost row with the preceding timestamp (first in table order among duplicates)
+        before = int(np.searchsorted(self.times_ns, self.times_ns[pos - 1], side='left'))
+        before_gap = ts_ns - int(self.times_ns[before])
+        after_gap = int(self.times_ns[pos]) - ts_ns
+        if before_gap != after_gap:
+            return int(self.row_of[before] if before_gap < after_gap else self.row_of[pos])
+        return int(min(self.row_of[before], self.row_of[pos]))
+
+    def lookup(self, timestamp) -> Optional[Dict[str, Any]]:
+        """
+        Return the market record for `timestamp`, or None outside tolerance.
+
+        Args:
+            timestamp: Query time (datetime, pd.Timestamp or string)
+
+        Returns:
+            Dict with the market row's columns, or None
+        """
+        row = self.position(timestamp)
+        if row is None:
+            return None
+
+        if int(self.row_times_ns[row]) - pd.Timestamp(timestamp).value < self.tolerance_ns:
+            return dict(self.records[row])
+        return None
@@ -0,0 +1,212 @@
+"""
+Streaming Metrics Sink for VPP LLM Agent - Module 5
+
+Writes per-timestep simulation metrics to disk in row batches while the run
+is going, and keeps running aggregates so the end-of-run summary does not
+need to rebuild a DataFrame from every row.
+
+Output formats:
+- "csv": one CSV file, appended one batch at a time (the default, read by the
+  Module 6 dashboard)
+- "parquet": a directory of Parquet part files, one per batch, readable with
+  pd.read_parquet(path); requires pyarrow
+- "auto": Parquet when pyarrow is installed, CSV otherwise
+
+The sink can also be reopened from a saved state (see SimulationCheckpoint).
+Any rows written after that state are dropped, so a resumed run never
+duplicates rows.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional
+    pa = None
+    pq = None
+
+
+# Timestamp format for CSV output (matches a full-run DataFrame.to_csv)
+CSV_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class RunningAggregates:
+    """Row count and per-field sums, updated as rows arrive."""
+
+    def __init__(self):
+        self.count = 0
+        self.sums: Dict[str, float] = {}
+
+    def update(self, row: Dict[str, Any]) -> None:
+        """Add one row; booleans count as 0/1, non-numeric fields are skipped."""
+        self.count += 1
+        for name, value in row.items():
+            if isinstance(value, (bool, int, float, np.number, np.bool_)):
+                self.sums[name] = self.sums.get(name, 0.0) + float(value)
+
+    def sum(self, name: str) -> float:
+        """Sum of a field over all rows."""
+        return self.sums.get(name, 0.0)
+
+    def mean(self, name: str) -> float:
+        """Mean of a field (success rate for boolean fields); NaN with no rows."""
+        return self.sums.get(name, 0.0) / self.count if self.count else float('nan')
+
+    def state(self) -> Dict[str, Any]:
+        """JSON-serializable snapshot."""
+        return {"count": self.count, "sums": dict(self.sums)}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "RunningAggregates":
+        """Rebuild from state()."""
+        aggregates = cls()
+        aggregates.count = int(state.get("count", 0))
+        aggregates.sums = {k: float(v) for k, v in state.get("sums", {}).items()}
+        return aggregates
+
+
+class MetricsSink:
+    """Batched, append-only writer for per-timestep metric rows."""
+
+    def __init__(
+        self,
+        results_path,
+        basename: str = "simulation_results",
+        fmt: str = "csv",
+        batch_size: int = 256
+    ):
+        """
+        Initialize the sink (nothing is written until open()).
+
+        Args:
+            results_path: Directory for the output
+            basename: Output name without extension
+            fmt: "csv", "parquet" or "auto"
+            batch_size: Rows buffered before each write
+        """
+        if fmt == "auto":
+            fmt = "parquet" if pq is not None else "csv"
+        if fmt not in ("csv", "parquet"):
+            raise ValueError(f"Unknown metrics format: {fmt}")
+        if fmt == "parquet" and pq is None:
+            raise ImportError("Parquet metrics output requires pyarrow")
+
+        self.format = fmt
+        self.batch_size = max(1, int(batch_size))
+        self.path = Path(results_path) / f"{basename}.{fmt}"
+
+        self.aggregates = RunningAggregates()
+        self.rows_written = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._csv_bytes = 0
+        self._parts_written = 0
+
+    def open(self, state: Optional[Dict[str, Any]] = None) -> "MetricsSink":
+        """
+        Start a new output, or continue one from a saved state().
+
+        Args:
+            state: Sink state from a checkpoint; writing continues in the output
+                named there, in the format it was started in (whatever fmt this
+                sink was created with), and anything written after the state is
+                discarded
+        """
+        self._buffer = []
+        if state is None:
+            self.aggregates = RunningAggregates()
+            self.rows_written = self._csv_bytes = self._parts_written = 0
+            self._remove_output()
+        else:
+            self.path = Path(state.get("path", self.path))
+            fmt = state.get("format", self.path.suffix.lstrip(".") or self.format)
+            if fmt not in ("csv", "parquet"):
+                raise ValueError(f"Unknown metrics format in sink state: {fmt}")
+            if fmt == "parquet" and pq is None:
+                raise ImportError("Resuming Parquet metrics output requires pyarrow")
+            self.format = fmt
+            self.aggregates = RunningAggregates.from_state(state["aggregates"])
+            self.rows_written = int(state["rows_written"])
+            self._csv_bytes = int(state.get("csv_bytes", 0))
+            self._parts_written = int(state.get("parts_written", 0))
+            self._truncate_output()
+        return self
+
+    def append(self, row: Dict[str, Any]) -> None:
+        """Add one metrics row; it reaches disk with the next batch."""
+        self.aggregates.update(row)
+        self._buffer.append(row)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered rows."""
+        if not self._buffer:
+            return
+        frame = pd.DataFrame(self._buffer)
+
+        if self.format == "csv":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", newline="") as f:
+                frame.to_csv(f, index=False, header=self.rows_written == 0, date_format=CSV_DATE_FORMAT)
+                f.flush()
+                self._csv_bytes = f.tell()
+        else:
+            self.path.mkdir(parents=True, exist_ok=True)
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            pq.write_table(table, self.path / f"part-{self._parts_written:05d}.parquet")
+            self._parts_written += 1
+
+        self.rows_written += len(frame)
+        self._buffer = []
+
+    def close(self) -> None:
+        """Flush remaining rows."""
+        self.flush()
+
+    def state(self) -> Dict[str, Any]:
+        """Flush, then return a JSON-serializable state for checkpoints."""
+        self.flush()
+        return {
+            "path": str(self.path),
+            "format": self.format,
+            "rows_written": self.rows_written,
+            "csv_bytes": self._csv_bytes,
+            "parts_written": self._parts_written,
+            "aggregates": self.aggregates.state()
+        }
+
+    def read(self) -> pd.DataFrame:
+        """Read back everything written so far."""
+        self.flush()
+        if self.rows_written == 0:
+            return pd.DataFrame()
+        if self.format == "csv":
+            return pd.read_csv(self.path, parse_dates=["timestamp"])
+        return pd.read_parquet(self.path)
+
+    def _remove_output(self) -> None:
+        """Delete output from a previous run."""
+        if self.format == "csv":
+            if self.path.exists():
+                self.path.unlink()
+        elif self.path.exists():
+            for part in self.path.glob("part-*.parquet"):
+                part.unlink()
+
+    def _truncate_output(self) -> None:
+        """Drop output written after the restored state."""
+        if self.format == "csv":
+            if self.path.exists():
+                with open(self.path, "r+b") as f:
+                    f.truncate(self._csv_bytes)
+            elif self.rows_written:
+                raise FileNotFoundError(f"Metrics output to resume not found: {self.path}")
+        else:
+            for part in self.path.glob("part-*.parquet"):
+                if int(part.stem.split("-")[1]) >= self._parts_written:
+                    part.unlink()
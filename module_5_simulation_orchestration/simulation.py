@@ -12,10 +12,9 @@ import json
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, asdict
 from pathlib import Path
-from tqdm import tqdm
 import time
 from loguru import logger
 
@@ -25,15 +24,42 @@ sys.path.append('../module_2_asset_modeling')
 sys.path.append('../module_3_agentic_framework')
 sys.path.append('../module_4_negotiation_logic')
 
-# Configure logging
-logger.add("simulation.log", rotation="10 MB")
-
 # Import from previous modules
 from prosumer_models import Prosumer
 from fleet_generator import FleetGenerator
 from schemas import MarketOpportunity, AgentState
 from main_negotiation import CoreNegotiationEngine
+from optimization_tool import OptimizationTool
+from llm_gateway import LLMGateway
 from centralized_optimizer import CentralizedOptimizer
+from market_index import MarketDataIndex
+from fleet_state import FleetState
+from state_propagation import StatePropagator
+from checkpoint import SimulationCheckpoint
+from metrics_sink import MetricsSink, RunningAggregates
+from telemetry import WARNING, get_event_stream, get_profiler
+
+# Log files that already have a sink, so repeated orchestrators do not write every line twice
+_LOG_SINKS: Dict[str, int] = {}
+
+# Removes the event-stream forwarding below (None until the first orchestrator is built)
+_EVENT_LOG_UNSUBSCRIBE: Optional[Callable[[], None]] = None
+
+
+def forward_events_to_log() -> None:
+    """Send negotiation and optimizer warnings to the log (once per process; progress events stay in memory)."""
+    global _EVENT_LOG_UNSUBSCRIBE
+    if _EVENT_LOG_UNSUBSCRIBE is None:
+        _EVENT_LOG_UNSUBSCRIBE = get_event_stream().subscribe(
+            lambda event: logger.log(event.level_name, f"[{event.name}] {event.text}"), level=WARNING
+        )
+
+
+def add_log_file(path: str) -> None:
+    """Send the simulation log to a file (once per path, rotated at 10 MB)."""
+    path = os.path.abspath(path)
+    if path not in _LOG_SINKS:
+        _LOG_SINKS[path] = logger.add(path, rotation="10 MB")
 
 
 @dataclass
@@ -112,25 +138,88 @@ class VPPSimulationOrchestrator:
     and provides comprehensive performance comparison.
     """
     
-    def __init__(self, data_path: str = "../module_1_data_simulation/data"):
-        """Initialize the simulation orchestrator."""
+    def __init__(
+        self,
+        data_path: str = "../module_1_data_simulation/data",
+        mpc_horizon_steps: Optional[int] = None,
+        market_data: Optional[pd.DataFrame] = None,
+        results_format: str = "csv",
+        keep_metrics_in_memory: bool = True,
+        llm_gateway: Optional[LLMGateway] = None,
+        profile: bool = False,
+        log_file: Optional[str] = None
+    ):
+        """
+        Initialize the simulation orchestrator.
+        
+        Args:
+            data_path: Path to Module 1 data
+            mpc_horizon_steps: If set, update BESS/EV states between timesteps with a
+                rolling-horizon plan of this many 15-minute steps instead of random noise
+            market_data: Already-loaded market data (skips reading market_data.csv)
+            results_format: Per-timestep results format: "csv", "parquet" (needs
+                pyarrow) or "auto"
+            keep_metrics_in_memory: Also keep every SimulationMetrics in
+                self.simulation_metrics; with False, rows only go to the results file
+            llm_gateway: If set, the agentic approach adds the hybrid LLM-to-solver
+                optimization step (LLM guidance through this gateway, then the
+                dispatch solve) to each negotiated coalition, as
+                IntegratedNegotiationSystem does; use an offline gateway to
+                measure how LLM latency affects throughput
+            profile: Enable the process-wide profiler (also enabled by
+                VPP_PROFILE=1); profiled runs record a per-timestep phase
+                breakdown and write phase_timings.csv and profile.folded
+            log_file: Also write the simulation log to this file, e.g.
+                "simulation.log" (None keeps the default stderr sink only)
+        """
+        forward_events_to_log()
+        if log_file is not None:
+            add_log_file(log_file)
+        
         self.data_path = Path(data_path)
         self.results_path = Path("results")
         self.results_path.mkdir(exist_ok=True)
         
-        # Load market data
-        self.market_data = self._load_market_data()
+        # Load market data and build the timestamp index used every timestep
+        self.market_data = market_data if market_data is not None else self._load_market_data()
+        self.market_index = MarketDataIndex(self.market_data)
         
         # Initialize engines
-        self.negotiation_engine = CoreNegotiationEngine()
-        self.centralized_optimizer = CentralizedOptimizer()
+        self.negotiation_engine = CoreNegotiationEngine(gateway=llm_gateway)
+        self.optimization_tool = (
+            OptimizationTool(solver="greedy", gateway=llm_gateway) if llm_gateway is not None else None
+        )
+        self.centralized_optimizer = CentralizedOptimizer(solver="greedy")  # Exact fast path for the hourly loop
         self.fleet_generator = FleetGenerator(str(self.data_path))
-        
-        # Simulation state
-        self.prosumer_fleet = []
+        self.rolling_horizon = None
+        if mpc_horizon_steps:
+            from rolling_horizon import RollingHorizonOptimizer  # Loads CVXPY
+            self.rolling_horizon = RollingHorizonOptimizer(horizon_steps=mpc_horizon_steps)
+        
+        # Memory-mapped household loads shared with the fleet generator
+        # (None when Module 1 only produced per-profile CSVs)
+        self.load_store = self.fleet_generator.load_store
+        self.state_propagator = StatePropagator.from_fleet_generator(self.fleet_generator)
+        
+        # Simulation state: the FleetState is authoritative; Prosumer objects
+        # are only built when prosumer_fleet is read (checkpoints, reports)
+        self.fleet_state: Optional[FleetState] = None
+        self._prosumer_objects: Optional[List[Prosumer]] = []
+        self.committed_dispatch_kw: Dict[str, float] = {}  # Cleared agentic coalition, by prosumer
         self.simulation_metrics = []
         self.current_timestep = 0
         
+        # Per-timestep results are streamed to disk as the run goes
+        self.results_format = results_format
+        self.keep_metrics_in_memory = keep_metrics_in_memory
+        self.metrics_sink: Optional[MetricsSink] = None
+        
+        # Phase timing (spans in the negotiation, optimizers, LLM gateway and here)
+        self.profiler = get_profiler()
+        if profile:
+            self.profiler.enable()
+        self.phase_timings: List[Dict[str, Any]] = []  # Seconds per span, one row per timestep
+        
         logger.info("VPP Simulation Orchestrator initialized")
     
     def run_full_simulation(
@@ -138,7 +227,11 @@ class VPPSimulationOrchestrator:
         fleet_size: int = 200,  # Scaled up 10x from original 20
         start_timestamp: Optional[datetime] = None,
         duration_hours: int = 744,  # 31 days (August) = 31 * 24 = 744 hours
-        opportunity_frequency_hours: int = 1  # Market opportunities every hour
+        opportunity_frequency_hours: int = 1,  # Market opportunities every hour
+        random_seed: int = 42,
+        checkpoint_path: Optional[str] = None,
+        checkpoint_every: int = 24,
+        resume_from: Optional[str] = None
     ) -> SimulationSummary:
         """
         Run the complete simulation comparing agentic vs centralized approaches.
@@ -148,32 +241,78 @@ class VPPSimulationOrchestrator:
             start_timestamp: Start time (defaults to data start)
             duration_hours: Total simulation duration
             opportunity_frequency_hours: Hours between market opportunities
+            random_seed: Seed for fleet generation and the simulation's random draws
+            checkpoint_path: If set, write a checkpoint here every `checkpoint_every` timesteps
+            checkpoint_every: Timesteps between checkpoints
+            resume_from: Checkpoint to continue from; the run configuration stored in it
+                replaces fleet_size, start_timestamp, duration and frequency, and
+                checkpoints keep going to the same file unless checkpoint_path is given
             
         Returns:
             SimulationSummary with complete results
         """
-        start_time = datetime.now()
-        logger.info(f"Starting VPP simulation: {fleet_size} prosumers, {duration_hours}h duration")
+        from tqdm import tqdm
         
-        # Initialize simulation
-        self._initialize_simulation(fleet_size, start_timestamp)
+        start_time = datetime.now()
         
-        # Calculate timesteps
-        total_timesteps = duration_hours // opportunity_frequency_hours
+        if resume_from is not None:
+            checkpoint = SimulationCheckpoint.load(resume_from)
+            self._restore_checkpoint(checkpoint)
+            opportunity_frequency_hours = checkpoint.run_config.get(
+                "opportunity_frequency_hours", opportunity_frequency_hours
+            )
+            total_timesteps = checkpoint.total_timesteps
+            first_timestep = checkpoint.next_timestep
+            run_config = checkpoint.run_config
+            checkpoint_path = checkpoint_path or resume_from
+            self._open_metrics_sink(checkpoint.sink_state)
+            
+            # Count the time already spent before the checkpoint
+            start_time -= timedelta(seconds=checkpoint.elapsed_seconds)
+            logger.info(f"Resuming VPP simulation from {resume_from} at timestep "
+                        f"{first_timestep}/{total_timesteps}")
+        else:
+            logger.info(f"Starting VPP simulation: {fleet_size} prosumers, {duration_hours}h duration")
+            
+            # Initialize simulation
+            self._initialize_simulation(fleet_size, start_timestamp, random_seed)
+            
+            # Calculate timesteps
+            total_timesteps = duration_hours // opportunity_frequency_hours
+            first_timestep = 0
+            run_config = {
+                "fleet_size": fleet_size,
+                "duration_hours": duration_hours,
+                "opportunity_frequency_hours": opportunity_frequency_hours,
+                "random_seed": random_seed
+            }
+            self._open_metrics_sink()
         
         # Main simulation loop
-        for timestep in tqdm(range(total_timesteps), desc="Simulation Progress"):
+        for timestep in tqdm(range(first_timestep, total_timesteps), desc="Simulation Progress",
+                             initial=first_timestep, total=total_timesteps):
+            totals_before = self.profiler.breakdown() if self.profiler.enabled else None
             try:
                 current_time = self._get_current_timestamp(timestep, opportunity_frequency_hours)
-                metrics = self._run_timestep(current_time, timestep)
-                self.simulation_metrics.append(metrics)
-                
-                # Update prosumer states
-                self._update_prosumer_states(current_time, opportunity_frequency_hours)
+                with self.profiler.span("simulation_step"):
+                    metrics = self._run_timestep(current_time, timestep)
+                    self._record_metrics(metrics)
+                    
+                    # Update prosumer states
+                    with self.profiler.span("state_update"):
+                        self._update_prosumer_states(current_time, opportunity_frequency_hours)
                 
             except Exception as e:
                 logger.error(f"Error in timestep {timestep}: {e}")
-                continue
+            
+            if totals_before is not None:
+                self._record_phase_timings(timestep, totals_before)
+            
+            self.current_timestep = timestep + 1
+            if checkpoint_path and (timestep + 1) % checkpoint_every == 0 and timestep + 1 < total_timesteps:
+                self._save_checkpoint(checkpoint_path, total_timesteps, run_config, start_time)
+        
+        self.metrics_sink.close()
         
         # Generate final results
         summary = self._generate_simulation_summary(start_time)
@@ -182,12 +321,83 @@ class VPPSimulationOrchestrator:
         logger.info(f"Simulation completed in {summary.total_simulation_time_minutes:.1f} minutes")
         return summary
     
-    def _initialize_simulation(self, fleet_size: int, start_timestamp: Optional[datetime]):
+    @property
+    def prosumer_fleet(self) -> List[Prosumer]:
+        """Prosumer objects with the current fleet state (built on first read after a change)."""
+        if self._prosumer_objects is None:
+            self._prosumer_objects = self.fleet_state.to_prosumers() if self.fleet_state is not None else []
+        return self._prosumer_objects
+    
+    @prosumer_fleet.setter
+    def prosumer_fleet(self, prosumers: List[Prosumer]):
+        self.fleet_state = FleetState.from_prosumers(prosumers) if prosumers else None
+        self._prosumer_objects = prosumers
+    
+    def _save_checkpoint(self, path: str, total_timesteps: int, run_config: Dict[str, Any], start_time: datetime):
+        """Write a checkpoint of the run after the current timestep."""
+        numpy_rng_state, python_rng_state = SimulationCheckpoint.capture_rng_states()
+        SimulationCheckpoint(
+            next_timestep=self.current_timestep,
+            total_timesteps=total_timesteps,
+            start_timestamp=self.start_timestamp,
+            fleet=self._current_fleet_state(),
+            metrics=[asdict(m) for m in self.simulation_metrics],
+            numpy_rng_state=numpy_rng_state,
+            python_rng_state=python_rng_state,
+            run_config=run_config,
+            elapsed_seconds=(datetime.now() - start_time).total_seconds(),
+            sink_state=self.metrics_sink.state()
+        ).save(path)
+        logger.debug(f"Checkpoint written at timestep {self.current_timestep}: {path}")
+    
+    def _restore_checkpoint(self, checkpoint: SimulationCheckpoint):
+        """Restore fleet, metrics, clock and RNG state from a checkpoint."""
+        self.fleet_state, self._prosumer_objects = checkpoint.fleet, None
+        self.committed_dispatch_kw = {}
+        self.simulation_metrics = [SimulationMetrics(**record) for record in checkpoint.metrics]
+        self.start_timestamp = checkpoint.start_timestamp
+        self.current_timestep = checkpoint.next_timestep
+        checkpoint.restore_rng_states()
+    
+    def _open_metrics_sink(self, sink_state: Optional[Dict[str, Any]] = None):
+        """
+        Open the per-timestep results sink for a new or resumed run.
+        
+        Args:
+            sink_state: Sink state from a checkpoint; when missing on resume (a
+                checkpoint from an older version), the restored metrics are
+                written again from the start
+        """
+        self.metrics_sink = MetricsSink(self.results_path, fmt=self.results_format)
+        if sink_state:
+            self.metrics_sink.open(sink_state)
+        else:
+            self.metrics_sink.open()
+            for metrics in self.simulation_metrics:
+                self.metrics_sink.append(asdict(metrics))
+    
+    def _record_metrics(self, metrics: SimulationMetrics):
+        """Stream one timestep's metrics to the sink (and keep them if configured)."""
+        if self.keep_metrics_in_memory:
+            self.simulation_metrics.append(metrics)
+        self.metrics_sink.append(asdict(metrics))
+    
+    def _record_phase_timings(self, timestep: int, totals_before: Dict[str, float]):
+        """Keep the seconds each span took during one timestep."""
+        row: Dict[str, Any] = {"timestep": timestep}
+        for name, total in self.profiler.breakdown().items():
+            elapsed = total - totals_before.get(name, 0.0)
+            if elapsed > 0:
+                row[name] = elapsed
+        self.phase_timings.append(row)
+    
+    def _initialize_simulation(self, fleet_size: int, start_timestamp: Optional[datetime], random_seed: int = 42):
         """Initialize the simulation with prosumer fleet and data."""
         logger.info(f"Initializing simulation with {fleet_size} prosumers")
         
-        # Generate prosumer fleet
-        self.prosumer_fleet = self.fleet_generator.create_prosumer_fleet(fleet_size)
+        # Generate prosumer fleet (also seeds the global random generators)
+        self.prosumer_fleet = self.fleet_generator.create_prosumer_fleet(fleet_size, random_seed=random_seed)
+        self.committed_dispatch_kw = {}
         
         # Set starting timestamp
         if start_timestamp is None:
@@ -200,6 +410,7 @@ class VPPSimulationOrchestrator:
         """Run a single simulation timestep with both approaches."""
         
         # Get market conditions
+        self.committed_dispatch_kw = {}
         market_row = self._get_market_data_for_timestamp(current_time)
         if market_row is None:
             return self._create_empty_metrics(current_time)
@@ -207,26 +418,47 @@ class VPPSimulationOrchestrator:
         # Create market opportunity
         opportunity = self._create_market_opportunity(market_row, current_time)
         
+        # Each approach gets its own copy-on-write snapshot of the fleet, so
+        # neither sees the other's changes; a snapshot copies only the columns it writes
+        fleet = self._current_fleet_state()
+        
         # Run agentic approach
         agentic_start = time.time()
-        agentic_result = self.negotiation_engine.run_negotiation(
-            opportunity, self.prosumer_fleet.copy(), self.market_data
-        )
+        with self.profiler.span("agentic"):
+            agentic_fleet = fleet.snapshot()
+            agentic_result = self.negotiation_engine.run_negotiation(opportunity, agentic_fleet, self.market_data)
+            agentic_capacity_mw = agentic_result.total_capacity_mw
+            agentic_bid_price = agentic_result.final_bid_price
+            if self.optimization_tool is not None and agentic_result.success:
+                # Hybrid LLM-to-solver step on the negotiated coalition
+                with self.profiler.span("optimization_tool"):
+                    optimization = self.optimization_tool.formulate_and_submit_bid(
+                        opportunity, agentic_result.coalition_members
+                    )
+                if optimization.success:
+                    agentic_capacity_mw = optimization.total_bid_capacity_mw
+                    agentic_bid_price = optimization.optimal_bid_price_mwh
         agentic_time = time.time() - agentic_start
         
         # Run centralized approach
         centralized_start = time.time()
-        centralized_result = self.centralized_optimizer.optimize_dispatch(
-            opportunity, self.prosumer_fleet.copy(), current_time
-        )
+        with self.profiler.span("centralized"):
+            centralized_result = self.centralized_optimizer.optimize_dispatch(
+                opportunity, fleet.snapshot(), current_time
+            )
         centralized_time = time.time() - centralized_start
         
         # Calculate actual profits (simplified clearing simulation)
         agentic_actual_profit = self._calculate_actual_profit(
-            agentic_result.total_capacity_mw,
-            agentic_result.final_bid_price,
+            agentic_capacity_mw,
+            agentic_bid_price,
             market_row['lmp']
         ) if agentic_result.success else 0.0
+        if agentic_actual_profit > 0:
+            # The agentic bid cleared: its coalition dispatches until the next update
+            self.committed_dispatch_kw = {
+                member.prosumer_id: member.committed_capacity_kw for member in agentic_result.coalition_members
+            }
         
         centralized_actual_profit = self._calculate_actual_profit(
             centralized_result.total_bid_capacity_mw,
@@ -243,8 +475,8 @@ class VPPSimulationOrchestrator:
             
             # Agentic results
             agentic_success=agentic_result.success,
-            agentic_bid_capacity_mw=agentic_result.total_capacity_mw,
-            agentic_bid_price_mwh=agentic_result.final_bid_price,
+            agentic_bid_capacity_mw=agentic_capacity_mw,
+            agentic_bid_price_mwh=agentic_bid_price,
             agentic_expected_profit=0.0,  # Would need market clearing model
             agentic_actual_profit=agentic_actual_profit,
             agentic_prosumer_satisfaction=agentic_result.prosumer_satisfaction_avg,
@@ -265,8 +497,8 @@ class VPPSimulationOrchestrator:
             # Comparative metrics
             profit_difference=agentic_actual_profit - centralized_actual_profit,
             satisfaction_difference=agentic_result.prosumer_satisfaction_avg - 0.0,
-            capacity_difference_mw=agentic_result.total_capacity_mw - centralized_result.total_bid_capacity_mw,
-            price_difference_mwh=agentic_result.final_bid_price - centralized_result.optimal_bid_price_mwh
+            capacity_difference_mw=agentic_capacity_mw - centralized_result.total_bid_capacity_mw,
+            price_difference_mwh=agentic_bid_price - centralized_result.optimal_bid_price_mwh
         )
         
         logger.debug(f"Timestep {timestep}: Agentic profit=${agentic_actual_profit:.2f}, "
@@ -280,9 +512,7 @@ class VPPSimulationOrchestrator:
         from datetime import timedelta
         
         # Calculate total available fleet capacity
-        total_capacity_kw = sum(
-            prosumer.get_available_capacity_kw() for prosumer in self.prosumer_fleet
-        )
+        total_capacity_kw = float(self._current_fleet_state().available_capacity_kw().sum())
         
         # Set required capacity to be achievable (50-80% of total available capacity)
         required_capacity_kw = min(total_capacity_kw * 0.7, 100.0)  # Max 100kW for residential VPP
@@ -312,26 +542,56 @@ class VPPSimulationOrchestrator:
         else:
             return 0.0  # Bid didn't clear
     
+    def _current_fleet_state(self) -> FleetState:
+        """Columnar state of the prosumer fleet (empty before a fleet is generated)."""
+        if self.fleet_state is None:
+            self.fleet_state = FleetState(0)
+        return self.fleet_state
+    
     def _update_prosumer_states(self, current_time: datetime, hours_elapsed: int):
-        """Update prosumer asset states based on time progression."""
-        for prosumer in self.prosumer_fleet:
-            # Update battery states based on load and solar
-            if prosumer.bess:
-                # Simplified state update - would use actual load/solar data
-                load_change = np.random.normal(0, 1.0)  # kWh change
-                # Use charge/discharge methods instead of update_soc
-                if load_change > 0:
-                    # Net energy available - charge battery
-                    prosumer.bess.charge(load_change * 4, 0.25)  # Convert kWh to kW for 15min
-                else:
-                    # Net energy needed - discharge battery
-                    prosumer.bess.discharge(abs(load_change) * 4, 0.25)
-            
-            # Update EV states
-            if prosumer.ev:
-                # Simplified EV behavior
-                if np.random.random() < 0.1:  # 10% chance to unplug/plug
-                    prosumer.ev.is_plugged_in = not prosumer.ev.is_plugged_in
+        """
+        Advance BESS/EV states to the next timestep in 15-minute intervals.
+        
+        Loads come from each prosumer's load profile, solar from the irradiance
+        data, and the cleared agentic coalition discharges its committed
+        capacity for the opportunity's hour (see StatePropagator).
+        """
+        fleet = self._current_fleet_state()
+        if self.rolling_horizon is not None:
+            self._update_prosumer_states_mpc(fleet, current_time, hours_elapsed)
+        else:
+            dispatch_kw = np.zeros(len(fleet))
+            for prosumer_id, capacity_kw in self.committed_dispatch_kw.items():
+                dispatch_kw[fleet.index_of(prosumer_id)] = capacity_kw
+            self.state_propagator.advance(fleet, current_time, hours_elapsed, dispatch_kw, dispatch_hours=1.0)
+        self._prosumer_objects = None  # Rebuilt from the fleet state if prosumer_fleet is read
+    
+    def _update_prosumer_states_mpc(self, fleet: FleetState, current_time: datetime, hours_elapsed: int):
+        """Advance BESS/EV states by re-planning and applying the first step of each plan."""
+        step_hours = self.rolling_horizon.step_hours
+        step = timedelta(hours=step_hours)
+        
+        has_ev = fleet.columns["has_ev"]
+        for k in range(max(1, int(round(hours_elapsed / step_hours)))):
+            step_time = current_time + k * step
+            # EVs follow the same data-driven schedule as the non-MPC updates
+            plugged = self.state_propagator.ev_plugged_in_at(fleet, step_time)
+            fleet.writable_column("ev_is_plugged_in")[has_ev] = plugged[has_ev]
+            prices = self._get_price_forecast(step_time, self.rolling_horizon.horizon_steps, step)
+            plan = self.rolling_horizon.step(fleet, prices, step_time)
+            if not plan.success:
+                logger.warning(f"Rolling-horizon plan failed at {step_time}: {plan.status}")
+    
+    def _get_price_forecast(self, start: datetime, steps: int, step: timedelta) -> np.ndarray:
+        """LMP for each step from `start` (perfect foresight; gaps hold the last known price)."""
+        prices = np.empty(steps)
+        last_price = 0.0
+        for k in range(steps):
+            row = self._get_market_data_for_timestamp(start + k * step)
+            if row is not None:
+                last_price = float(row['lmp'])
+            prices[k] = last_price
+        return prices
     
     def _get_current_timestamp(self, timestep: int, frequency_hours: int) -> datetime:
         """Get the current simulation timestamp."""
@@ -339,13 +599,12 @@ class VPPSimulationOrchestrator:
     
     def _get_market_data_for_timestamp(self, timestamp: datetime) -> Optional[Dict]:
         """Get market data for a specific timestamp."""
-        # Find closest timestamp in market data
-        market_times = pd.to_datetime(self.market_data['timestamp'])
-        closest_idx = (market_times - timestamp).abs().idxmin()
+        # Rebuild the index if the market data was replaced
+        if self.market_index.source is not self.market_data:
+            self.market_index = MarketDataIndex(self.market_data)
         
-        if (market_times.iloc[closest_idx] - timestamp).total_seconds() < 3600:  # Within 1 hour
-            return self.market_data.iloc[closest_idx].to_dict()
-        return None
+        # Closest timestamp in market data, within 1 hour
+        return self.market_index.lookup(timestamp)
     
     def _create_empty_metrics(self, timestamp: datetime) -> SimulationMetrics:
         """Create empty metrics for failed timesteps."""
@@ -363,33 +622,35 @@ class VPPSimulationOrchestrator:
     
     def _generate_simulation_summary(self, start_time: datetime) -> SimulationSummary:
         """Generate comprehensive simulation summary."""
-        if not self.simulation_metrics:
-            raise ValueError("No simulation metrics available")
-        
-        df = pd.DataFrame([asdict(m) for m in self.simulation_metrics])
+        # Running aggregates from the sink; metrics set directly (without a run) are aggregated here
+        if self.metrics_sink is not None and self.metrics_sink.aggregates.count > 0:
+            stats = self.metrics_sink.aggregates
+        else:
+            stats = RunningAggregates()
+            for metrics in self.simulation_metrics:
+                stats.update(asdict(metrics))
         
-        # Calculate aggregated statistics
-        agentic_successful = df[df['agentic_success'] == True]
-        centralized_successful = df[df['centralized_success'] == True]
+        if stats.count == 0:
+            raise ValueError("No simulation metrics available")
         
         summary = SimulationSummary(
-            total_timesteps=len(df),
-            simulation_duration_hours=len(df),  # Assuming 1-hour intervals
+            total_timesteps=stats.count,
+            simulation_duration_hours=stats.count,  # Assuming 1-hour intervals
             
             # Agentic performance
-            agentic_total_profit=df['agentic_actual_profit'].sum(),
-            agentic_avg_satisfaction=df['agentic_prosumer_satisfaction'].mean(),
-            agentic_success_rate=len(agentic_successful) / len(df),
-            agentic_avg_coalition_size=df['agentic_coalition_size'].mean(),
-            agentic_avg_negotiation_rounds=df['agentic_negotiation_rounds'].mean(),
-            agentic_total_capacity_mwh=df['agentic_bid_capacity_mw'].sum(),
+            agentic_total_profit=stats.sum('agentic_actual_profit'),
+            agentic_avg_satisfaction=stats.mean('agentic_prosumer_satisfaction'),
+            agentic_success_rate=stats.mean('agentic_success'),
+            agentic_avg_coalition_size=stats.mean('agentic_coalition_size'),
+            agentic_avg_negotiation_rounds=stats.mean('agentic_negotiation_rounds'),
+            agentic_total_capacity_mwh=stats.sum('agentic_bid_capacity_mw'),
             
             # Centralized performance
-            centralized_total_profit=df['centralized_actual_profit'].sum(),
-            centralized_avg_satisfaction=df['centralized_prosumer_satisfaction'].mean(),
-            centralized_success_rate=len(centralized_successful) / len(df),
-            centralized_total_violations=df['centralized_preference_violations'].sum(),
-            centralized_total_capacity_mwh=df['centralized_bid_capacity_mw'].sum(),
+            centralized_total_profit=stats.sum('centralized_actual_profit'),
+            centralized_avg_satisfaction=stats.mean('centralized_prosumer_satisfaction'),
+            centralized_success_rate=stats.mean('centralized_success'),
+            centralized_total_violations=int(stats.sum('centralized_preference_violations')),
+            centralized_total_capacity_mwh=stats.sum('centralized_bid_capacity_mw'),
             
             # Comparative analysis
             profit_advantage_percent=0.0,  # Will calculate below
@@ -397,8 +658,8 @@ class VPPSimulationOrchestrator:
             efficiency_ratio=0.0,  # Will calculate below
             
             # Computational performance
-            agentic_avg_time_seconds=df['agentic_optimization_time'].mean(),
-            centralized_avg_time_seconds=df['centralized_optimization_time'].mean(),
+            agentic_avg_time_seconds=stats.mean('agentic_optimization_time'),
+            centralized_avg_time_seconds=stats.mean('centralized_optimization_time'),
             total_simulation_time_minutes=(datetime.now() - start_time).total_seconds() / 60
         )
         
@@ -424,10 +685,11 @@ class VPPSimulationOrchestrator:
     
     def _save_results(self, summary: SimulationSummary):
         """Save simulation results to files."""
-        # Save detailed timestep data
-        df = pd.DataFrame([asdict(m) for m in self.simulation_metrics])
-        results_file = self.results_path / "simulation_results.csv"
-        df.to_csv(results_file, index=False)
+        # Detailed timestep data is already on disk; write it now only if metrics
+        # were set without a run
+        if self.metrics_sink is None:
+            self._open_metrics_sink()
+        self.metrics_sink.close()
         
         # Save summary statistics
         summary_file = self.results_path / "simulation_summary.json"
@@ -437,8 +699,29 @@ class VPPSimulationOrchestrator:
         # Save human-readable report
         self._generate_report(summary)
         
+        if self.phase_timings:
+            self.save_profile()
+        
         logger.info(f"Results saved to {self.results_path}")
     
+    def save_profile(self, directory: Optional[str] = None) -> Tuple[Path, Path]:
+        """
+        Write the profiling results of the run.
+        
+        Args:
+            directory: Output directory (defaults to the results directory)
+            
+        Returns:
+            Paths of phase_timings.csv (seconds per span and timestep) and
+            profile.folded (folded stacks for flamegraph.pl or speedscope)
+        """
+        directory = Path(directory) if directory is not None else self.results_path
+        timings_file = directory / "phase_timings.csv"
+        folded_file = directory / "profile.folded"
+        pd.DataFrame(self.phase_timings).fillna(0.0).to_csv(timings_file, index=False)
+        self.profiler.write_folded(folded_file)
+        return timings_file, folded_file
+    
     def _generate_report(self, summary: SimulationSummary):
         """Generate human-readable simulation report."""
         report_file = self.results_path / "simulation_report.md"
@@ -447,7 +730,7 @@ class VPPSimulationOrchestrator:
             f.write("# VPP LLM Agent Simulation Report\n\n")
             f.write(f"**Simulation Date**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
             f.write(f"**Duration**: {summary.simulation_duration_hours} hours ({summary.total_timesteps} timesteps)\n")
-            f.write(f"**Fleet Size**: {len(self.prosumer_fleet)} prosumers\n\n")
+            f.write(f"**Fleet Size**: {len(self._current_fleet_state())} prosumers\n\n")
             
             f.write("## Performance Comparison\n\n")
             f.write("| Metric | Agentic Model | Centralized Model | Advantage |\n")
@@ -475,18 +758,23 @@ class VPPSimulationOrchestrator:
     
     def _load_market_data(self) -> pd.DataFrame:
         """Load market data from Module 1."""
-        market_file = self.data_path / "market_data.csv"
-        if not market_file.exists():
-            raise FileNotFoundError(f"Market data not found: {market_file}")
-        
-        df = pd.read_csv(market_file)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        return df
+        return load_market_data(self.data_path)
+
+
+def load_market_data(data_path) -> pd.DataFrame:
+    """Load market_data.csv from a Module 1 data directory."""
+    market_file = Path(data_path) / "market_data.csv"
+    if not market_file.exists():
+        raise FileNotFoundError(f"Market data not found: {market_file}")
+    
+    df = pd.read_csv(market_file)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df
 
 
 def main():
     """Run the complete VPP simulation."""
-    orchestrator = VPPSimulationOrchestrator()
+    orchestrator = VPPSimulationOrchestrator(log_file="simulation.log")
     
     # Run simulation with different configurations
     print("Starting VPP LLM Agent Simulation...")
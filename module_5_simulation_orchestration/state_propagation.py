@@ -0,0 +1,198 @@
+"""
+State Propagation for VPP LLM Agent - Module 5
+
+Advances the physical state of the whole fleet between market timesteps in
+15-minute intervals, driven by the Module 1 data instead of random noise:
+
+- each prosumer's load is its assigned load profile row (times its
+  load_scale) at that interval
+- solar generation is the irradiance series times each installed array
+- batteries cover net household load, store surplus solar and deliver the
+  dispatch committed to the market (FleetState.step)
+- EVs leave at their charge deadline, drive until they return in the
+  evening, and charge towards their departure SOC while plugged in
+
+Every interval is a handful of array operations over the fleet. Timestamps
+outside the data period wrap around it, so a simulation longer than the data
+(or starting at an arbitrary date) replays the same days at the same time of
+day.
+"""
+
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+# Add paths for imports
+sys.path.append('../module_1_data_simulation')
+sys.path.append('../module_2_asset_modeling')
+
+from fleet_state import FleetState, INTERVALS_PER_HOUR
+from load_store import LoadProfileStore
+
+
+# Time EVs are back home and plugged in again
+EV_RETURN_TIME = "18:00"
+
+# Average consumption of an EV while away from home (kW)
+EV_DRIVING_KW = 1.0
+
+
+def _times_ns(timestamps) -> np.ndarray:
+    """Timestamps as int64 nanoseconds."""
+    return pd.to_datetime(pd.Series(timestamps)).values.astype('datetime64[ns]').astype(np.int64)
+
+
+def _parse_minutes(hhmm: str) -> int:
+    """Minutes after midnight of an "HH:MM" string."""
+    hours, minutes = (int(part) for part in hhmm.split(":")[:2])
+    return hours * 60 + minutes
+
+
+class StatePropagator:
+    """Fleet-wide, data-driven BESS/EV state updates at 15-minute resolution."""
+
+    def __init__(
+        self,
+        load_source: Union[LoadProfileStore, List[pd.DataFrame]],
+        solar_data: pd.DataFrame,
+        step_hours: float = 1.0 / INTERVALS_PER_HOUR,
+        ev_return_time: str = EV_RETURN_TIME,
+        ev_driving_kw: float = EV_DRIVING_KW
+    ):
+        """
+        Initialize the propagator.
+
+        Args:
+            load_source: Module 1 load store, or per-profile load DataFrames
+                (profile_N is the N-th DataFrame, as the fleet generator assigns them)
+            solar_data: Solar data with timestamp and generation_kw_per_kw_installed columns
+            step_hours: Interval length in hours
+            ev_return_time: "HH:MM" at which EVs are plugged in again
+            ev_driving_kw: Average consumption of unplugged EVs in kW
+        """
+        self.step_hours = step_hours
+        self.ev_return_minutes = _parse_minutes(ev_return_time)
+        self.ev_driving_kw = ev_driving_kw
+
+        if isinstance(load_source, LoadProfileStore):
+            self.load_store: Optional[LoadProfileStore] = load_source
+            self.load_kw = load_source.load_kw  # memory-mapped, time-major
+            self.load_times_ns = load_source.timestamps.asi8
+        else:
+            self.load_store = None
+            self.load_kw = np.column_stack([df['load_kw'].to_numpy(dtype=np.float32) for df in load_source])
+            self.load_times_ns = _times_ns(load_source[0]['timestamp'])
+
+        self.solar_per_kw = solar_data['generation_kw_per_kw_installed'].to_numpy(dtype=np.float64)
+        self.solar_times_ns = _times_ns(solar_data['timestamp'])
+
+        self._bound_fleet: Optional[FleetState] = None
+        self._profile_rows = np.empty(0, dtype=np.int64)
+        self._has_profile = np.empty(0, dtype=bool)
+        self._ev_departure = np.empty(0, dtype=np.int64)
+
+    @classmethod
+    def from_fleet_generator(cls, generator, **kwargs) -> "StatePropagator":
+        """Build a propagator over the load and solar data a FleetGenerator has loaded."""
+        load_source = generator.load_store if generator.load_store is not None else generator.load_profiles
+        return cls(load_source, generator.solar_data, **kwargs)
+
+    @staticmethod
+    def _interval_index(times_ns: np.ndarray, timestamp) -> int:
+        """Index of the interval covering a timestamp, wrapping around the data period."""
+        step_ns = times_ns[1] - times_ns[0] if len(times_ns) > 1 else 1
+        return int(((pd.Timestamp(timestamp).value - times_ns[0]) // step_ns) % len(times_ns))
+
+    def bind(self, fleet: FleetState) -> None:
+        """
+        Resolve each prosumer's load profile row and EV departure time.
+
+        Called automatically for a new fleet; call it again after changing
+        load_profile_id or ev_charge_deadline in place.
+        """
+        # "profile_N" -> N (parsing each distinct name once); anything else keeps its current load
+        codes, names = pd.factorize(fleet.columns["load_profile_id"])
+        suffixes = [str(name)[len("profile_"):] if str(name).startswith("profile_") else "" for name in names]
+        parsed = np.array([int(s) if s.isdigit() else 0 for s in suffixes] + [0], dtype=np.int64)
+        profile_ids = parsed[codes]  # code -1 (missing) reads the trailing 0
+        numeric = profile_ids > 0
+
+        if self.load_store is not None:
+            has_profile = numeric & np.isin(profile_ids, self.load_store.profile_ids)
+            rows = np.zeros(fleet.n, dtype=np.int64)
+            rows[has_profile] = self.load_store.rows(profile_ids[has_profile])
+        else:
+            has_profile = numeric & (profile_ids >= 1) & (profile_ids <= self.load_kw.shape[1])
+            rows = np.where(has_profile, profile_ids - 1, 0)
+
+        self._bound_fleet = fleet
+        self._profile_rows = rows
+        self._has_profile = has_profile
+        self._ev_departure = fleet.ev_departure_minutes()
+
+    def load_at(self, fleet: FleetState, timestamp) -> np.ndarray:
+        """Household load of every prosumer at a timestamp (kW)."""
+        if fleet is not self._bound_fleet:
+            self.bind(fleet)
+        load = fleet.columns["current_load_kw"].copy()
+        row = self.load_kw[self._interval_index(self.load_times_ns, timestamp)]
+        idx = np.flatnonzero(self._has_profile)
+        load[idx] = row[self._profile_rows[idx]] * fleet.columns["load_scale"][idx]
+        return load
+
+    def solar_at(self, timestamp) -> float:
+        """Solar generation per kW installed at a timestamp."""
+        return float(self.solar_per_kw[self._interval_index(self.solar_times_ns, timestamp)])
+
+    def ev_plugged_in_at(self, fleet: FleetState, timestamp) -> np.ndarray:
+        """Whether each EV is home at a timestamp (away from its deadline until the return time)."""
+        if fleet is not self._bound_fleet:
+            self.bind(fleet)
+        timestamp = pd.Timestamp(timestamp)
+        minute = timestamp.hour * 60 + timestamp.minute
+        away_minutes = (self.ev_return_minutes - self._ev_departure) % 1440
+        return (minute - self._ev_departure) % 1440 >= away_minutes
+
+    def advance(
+        self,
+        fleet: FleetState,
+        start: datetime,
+        hours: float,
+        dispatch_kw: Optional[np.ndarray] = None,
+        dispatch_hours: float = 0.0
+    ) -> Dict[str, np.ndarray]:
+        """
+        Advance the fleet over a period, one FleetState.step per interval.
+
+        Args:
+            fleet: Fleet to update in place
+            start: Start of the period
+            hours: Length of the period
+            dispatch_kw: Committed battery discharge per prosumer (kW)
+            dispatch_hours: How long the dispatch lasts from the start of the period
+
+        Returns:
+            Per-prosumer totals over the period: solar_kwh, bess_charged_kwh,
+            bess_discharged_kwh, ev_charged_kwh, ev_driven_kwh and grid_kwh
+        """
+        start = pd.Timestamp(start)
+        totals: Dict[str, np.ndarray] = {}
+        for k in range(max(1, int(round(hours / self.step_hours)))):
+            timestamp = start + pd.Timedelta(hours=k * self.step_hours)
+            dispatching = dispatch_kw is not None and k * self.step_hours < dispatch_hours - 1e-9
+            result = fleet.step(
+                self.load_at(fleet, timestamp),
+                self.solar_at(timestamp),
+                dispatch_kw=dispatch_kw if dispatching else 0.0,
+                ev_plugged_in=self.ev_plugged_in_at(fleet, timestamp),
+                ev_driving_kw=self.ev_driving_kw,
+                duration_hours=self.step_hours
+            )
+            for key, value in result.items():
+                if key.endswith("_kw"):
+                    key, value = key[:-3] + "_kwh", value * self.step_hours
+                totals[key] = totals[key] + value if key in totals else value
+        return totals
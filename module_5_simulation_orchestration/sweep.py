@@ -0,0 +1,282 @@
+"""
+Scenario Sweep Runner for VPP LLM Agent - Module 5
+
+Runs a grid of simulation configurations (fleet size, seed, price scenario,
+duration) across a process pool and collects every SimulationSummary into a
+single results table.
+
+Each worker builds one VPPSimulationOrchestrator when it starts and reuses it
+for every configuration it runs, so the negotiation engine, fleet generator,
+solar data and load profiles are loaded once per worker, not once per run.
+Market data is read once by the parent and published to the workers through
+shared memory; household loads come from Module 1's memory-mapped load store,
+which the OS already shares between processes.
+
+Usage:
+    python sweep.py --fleet-sizes 50 200 --seeds 1 2 3 --price-scales 0.8 1.0 1.2 --workers 8
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from itertools import product
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from simulation import VPPSimulationOrchestrator, load_market_data
+
+
+# Market data columns scaled by a price scenario
+PRICE_COLUMNS = ("lmp", "spin_price", "nonspin_price")
+
+
+@dataclass(frozen=True)
+class SweepConfig:
+    """One simulation configuration in a sweep."""
+    fleet_size: int = 200
+    seed: int = 42
+    price_scale: float = 1.0
+    duration_hours: int = 744
+    opportunity_frequency_hours: int = 1
+
+    @property
+    def label(self) -> str:
+        """Directory-safe name for this configuration's results."""
+        return (f"n{self.fleet_size}_s{self.seed}_p{self.price_scale:g}"
+                f"_h{self.duration_hours}_f{self.opportunity_frequency_hours}")
+
+
+def build_sweep_grid(
+    fleet_sizes: Sequence[int] = (200,),
+    seeds: Sequence[int] = (42,),
+    price_scales: Sequence[float] = (1.0,),
+    duration_hours: Sequence[int] = (744,),
+    opportunity_frequency_hours: Sequence[int] = (1,)
+) -> List[SweepConfig]:
+    """
+    Build the full cartesian grid of sweep configurations.
+
+    Returns:
+        List of SweepConfig, ordered by fleet size, then seed, price scale,
+        duration and frequency
+    """
+    return [
+        SweepConfig(int(n), int(seed), float(scale), int(hours), int(frequency))
+        for n, seed, scale, hours, frequency in product(
+            fleet_sizes, seeds, price_scales, duration_hours, opportunity_frequency_hours
+        )
+    ]
+
+
+class SharedMarketData:
+    """
+    Numeric market data held in shared memory.
+
+    Timestamps (int64 nanoseconds) and the float columns live in two shared
+    blocks; workers attach by name and rebuild the DataFrame without reading
+    or parsing the CSV again.
+    """
+
+    def __init__(self, times_block, values_block, columns: List[str], n_rows: int, owner: bool):
+        self._times_block = times_block
+        self._values_block = values_block
+        self.columns = columns
+        self.n_rows = n_rows
+        self.owner = owner
+
+    @classmethod
+    def create(cls, market_data: pd.DataFrame) -> "SharedMarketData":
+        """Copy market data into new shared-memory blocks."""
+        columns = [c for c in market_data.columns if c != 'timestamp']
+        n_rows = len(market_data)
+
+        times = pd.to_datetime(market_data['timestamp']).values.astype('datetime64[ns]').astype(np.int64)
+        values = market_data[columns].to_numpy(dtype=np.float64).T  # (columns, rows)
+
+        times_block = shared_memory.SharedMemory(create=True, size=max(1, times.nbytes))
+        values_block = shared_memory.SharedMemory(create=True, size=max(1, values.nbytes))
+        np.ndarray(times.shape, dtype=np.int64, buffer=times_block.buf)[:] = times
+        np.ndarray(values.shape, dtype=np.float64, buffer=values_block.buf)[:] = values
+        return cls(times_block, values_block, columns, n_rows, owner=True)
+
+    def handle(self) -> Dict[str, Any]:
+        """Picklable description used by workers to attach."""
+        return {
+            "times": self._times_block.name,
+            "values": self._values_block.name,
+            "columns": self.columns,
+            "n_rows": self.n_rows
+        }
+
+    @classmethod
+    def attach(cls, handle: Dict[str, Any]) -> "SharedMarketData":
+        """Attach to blocks created by another process."""
+        return cls(
+            shared_memory.SharedMemory(name=handle["times"]),
+            shared_memory.SharedMemory(name=handle["values"]),
+            list(handle["columns"]), int(handle["n_rows"]), owner=False
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """Rebuild the market DataFrame (values are copied out of shared memory)."""
+        times = np.ndarray((self.n_rows,), dtype=np.int64, buffer=self._times_block.buf)
+        values = np.ndarray((len(self.columns), self.n_rows), dtype=np.float64, buffer=self._values_block.buf)
+        frame = pd.DataFrame({'timestamp': pd.to_datetime(times.copy())})
+        for i, column in enumerate(self.columns):
+            frame[column] = values[i].copy()
+        return frame
+
+    def close(self) -> None:
+        """Detach; the creating process also frees the blocks."""
+        for block in (self._times_block, self._values_block):
+            block.close()
+            if self.owner:
+                block.unlink()
+
+
+def scale_prices(market_data: pd.DataFrame, price_scale: float) -> pd.DataFrame:
+    """Return a copy of the market data with every price column multiplied by price_scale."""
+    scaled = market_data.copy()
+    for column in PRICE_COLUMNS:
+        if column in scaled.columns:
+            scaled[column] = scaled[column] * price_scale
+    return scaled
+
+
+# Per-process state, set up once by _init_worker
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(data_path: str, market_handle: Optional[Dict[str, Any]], results_root: str) -> None:
+    """Load shared data and build the worker's orchestrator."""
+    if market_handle is not None:
+        shared = SharedMarketData.attach(market_handle)
+        market_data = shared.to_frame()
+        shared.close()
+    else:
+        market_data = load_market_data(data_path)
+
+    _WORKER["market_data"] = market_data
+    _WORKER["results_root"] = Path(results_root)
+    _WORKER["orchestrator"] = VPPSimulationOrchestrator(data_path, market_data=market_data)
+
+
+def _run_config(config: SweepConfig) -> Dict[str, Any]:
+    """Run one configuration on this worker's orchestrator and return its results row."""
+    orchestrator: VPPSimulationOrchestrator = _WORKER["orchestrator"]
+
+    # Fresh per-run state; data and engines are reused
+    orchestrator.market_data = scale_prices(_WORKER["market_data"], config.price_scale)
+    orchestrator.results_path = _WORKER["results_root"] / config.label
+    orchestrator.results_path.mkdir(parents=True, exist_ok=True)
+    orchestrator.simulation_metrics = []
+    orchestrator.current_timestep = 0
+
+    row: Dict[str, Any] = asdict(config)
+    row["label"] = config.label
+    row["worker_pid"] = os.getpid()
+    row["error"] = None
+
+    start = time.perf_counter()
+    try:
+        summary = orchestrator.run_full_simulation(
+            fleet_size=config.fleet_size,
+            duration_hours=config.duration_hours,
+            opportunity_frequency_hours=config.opportunity_frequency_hours,
+            random_seed=config.seed
+        )
+        row.update(asdict(summary))
+    except Exception as e:
+        row["error"] = str(e)
+    row["wall_seconds"] = time.perf_counter() - start
+    return row
+
+
+def run_sweep(
+    configs: Sequence[SweepConfig],
+    data_path: str = "../module_1_data_simulation/data",
+    max_workers: Optional[int] = None,
+    results_root: str = "results/sweep",
+    mp_context=None
+) -> pd.DataFrame:
+    """
+    Run every configuration and collect the results.
+
+    Args:
+        configs: Configurations to run
+        data_path: Path to Module 1 data
+        max_workers: Worker processes (defaults to the CPU count); 0 runs
+            serially in this process
+        results_root: Directory for per-configuration result files
+        mp_context: Optional multiprocessing context for the pool
+
+    Returns:
+        DataFrame with one row per configuration, in input order: the
+        configuration, its SimulationSummary fields, wall time, worker pid
+        and error (None when the run succeeded)
+    """
+    configs = list(configs)
+    if not configs:
+        return pd.DataFrame()
+
+    if max_workers == 0:
+        _init_worker(data_path, None, results_root)
+        rows = [_run_config(config) for config in configs]
+        return pd.DataFrame(rows)
+
+    shared = SharedMarketData.create(load_market_data(data_path))
+    try:
+        workers = min(max_workers or os.cpu_count() or 1, len(configs))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(data_path, shared.handle(), results_root)
+        ) as pool:
+            rows = list(pool.map(_run_config, configs, chunksize=1))
+    finally:
+        shared.close()
+
+    return pd.DataFrame(rows)
+
+
+def main():
+    """Run a scenario sweep from the command line."""
+    parser = argparse.ArgumentParser(description="Run a VPP simulation scenario sweep")
+    parser.add_argument('--fleet-sizes', type=int, nargs='+', default=[200])
+    parser.add_argument('--seeds', type=int, nargs='+', default=[42])
+    parser.add_argument('--price-scales', type=float, nargs='+', default=[1.0],
+                        help="Multipliers applied to all market prices")
+    parser.add_argument('--duration-hours', type=int, nargs='+', default=[744])
+    parser.add_argument('--frequency-hours', type=int, nargs='+', default=[1])
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (0 = run serially)")
+    parser.add_argument('--data-path', default="../module_1_data_simulation/data")
+    parser.add_argument('--results-root', default="results/sweep")
+    parser.add_argument('--output', default="results/sweep_results.csv")
+    args = parser.parse_args()
+
+    configs = build_sweep_grid(args.fleet_sizes, args.seeds, args.price_scales,
+                               args.duration_hours, args.frequency_hours)
+    print(f"Running {len(configs)} configurations...")
+
+    start = time.perf_counter()
+    results = run_sweep(configs, args.data_path, args.workers, args.results_root)
+    elapsed = time.perf_counter() - start
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    results.to_csv(args.output, index=False)
+
+    columns = [c for c in ("label", "agentic_total_profit", "centralized_total_profit",
+                           "agentic_avg_satisfaction", "wall_seconds", "error") if c in results.columns]
+    print(results[columns].to_string(index=False))
+    print(f"\nSweep finished in {elapsed:.1f}s; results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,7 +19,6 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
 from pathlib import Path
-import google.generativeai as genai
 from dotenv import load_dotenv
 import subprocess
 import logging
@@ -64,6 +63,13 @@ logger.info(f"First 5 Python paths: {sys.path[:5]}")
 # Load environment variables
 load_dotenv(base_path / ".env")
 
+from llm_gateway import LLMGateway, GeminiBackend
+from llm_cache import LLMResponseCache
+from telemetry import get_event_stream, logging_subscriber
+
+# Negotiation and optimizer events appear in the execution logs
+get_event_stream().subscribe(logging_subscriber(logging.getLogger("vpp.events")))
+
 class ModuleRunner:
     """Handles running individual modules and capturing their output."""
     
@@ -625,13 +631,18 @@ class VPPDashboard:
         try:
             api_key = os.getenv('GEMINI_API_KEY')
             if api_key:
+                import google.generativeai as genai  # Only needed with a key; slow to import
+                
                 genai.configure(api_key=api_key)
                 self.gemini_model = genai.GenerativeModel('gemini-1.5-flash')
+                self.gemini_gateway = LLMGateway(GeminiBackend(self.gemini_model), cache=LLMResponseCache.from_env())
             else:
                 self.gemini_model = None
+                self.gemini_gateway = None
         except Exception as e:
             logger.warning(f"Failed to setup Gemini API: {str(e)}")
             self.gemini_model = None
+            self.gemini_gateway = None
             
     def render_header(self):
         """Render the comprehensive dashboard header."""
@@ -1738,11 +1749,11 @@ class VPPDashboard:
                         4. Strategic implications for deployment
                         """
                         
-                        response = self.gemini_model.generate_content(analysis_prompt)
+                        response_text = self.gemini_gateway.generate_sync(analysis_prompt)
                         
                         st.markdown('<div class="success-box">', unsafe_allow_html=True)
                         st.markdown("### 🧠 Enhanced AI Analysis Results")
-                        st.markdown(response.text)
+                        st.markdown(response_text)
                         st.markdown('</div>', unsafe_allow_html=True)
                         
                     except Exception as e: